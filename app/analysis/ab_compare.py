@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, List
 
+import numpy as np
+
 
 @dataclass
 class ABComparison:
@@ -88,3 +90,28 @@ def compare_ab(mix_metrics: Dict[str, float], ref_metrics: Dict[str, float]) ->
         dynamics_diff_summary=dynamics_summary,
         match_suggestions=suggestions,
     )
+
+
+@dataclass
+class MultiABComparison:
+    consensus_target: Dict[str, float]
+    consensus: ABComparison
+    per_reference: List[ABComparison]
+
+
+def consensus_metrics(ref_metrics: List[Dict[str, float]]) -> Dict[str, float]:
+    """Per-metric median across references, so one outlier master does not set the target."""
+    keys = [key for key in ref_metrics[0] if all(key in item for item in ref_metrics)]
+    values = np.array([[float(item[key]) for key in keys] for item in ref_metrics], dtype=float)
+    return dict(zip(keys, np.median(values, axis=0).tolist()))
+
+
+def compare_references(mix_metrics: Dict[str, float], ref_metrics: List[Dict[str, float]]) -> MultiABComparison:
+    if not ref_metrics:
+        raise ValueError("At least one reference is required")
+    target = consensus_metrics(ref_metrics)
+    return MultiABComparison(
+        consensus_target=target,
+        consensus=compare_ab(mix_metrics, target),
+        per_reference=[compare_ab(mix_metrics, item) for item in ref_metrics],
+    )
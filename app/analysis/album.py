@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .genre_profiles import get_profile
+
+DEFAULT_TRUE_PEAK_CEILING_DB = -1.0
+
+
+@dataclass
+class AlbumTrack:
+    job_id: str
+    integrated_lufs: float
+    offset_from_album_lu: float
+    spectral_tilt_db_per_oct: float
+    true_peak_db: float
+    within_lufs_target: bool
+
+
+@dataclass
+class AlbumReport:
+    track_count: int
+    lufs_target: List[float]
+    true_peak_ceiling_db: float
+    album_lufs: float
+    loudness_spread_lu: float
+    tilt_spread_db_per_oct: float
+    true_peak_max_db: float
+    true_peak_margin_db: float
+    tracks: List[AlbumTrack]
+    notes: List[str]
+
+
+def compute_album_report(
+    results: List[Dict[str, Any]],
+    genre: str,
+    mode: str,
+    vocal_style: Optional[str] = None,
+) -> AlbumReport:
+    """Aggregate per-track results into album-level loudness, tonal and peak consistency."""
+    if not results:
+        raise ValueError("Album report needs at least one analyzed track")
+    profile = get_profile(genre, mode, vocal_style)
+    lufs_target = list(profile.get("lufs_target", [-16, -12]))
+    ceiling = float(profile.get("true_peak_max", DEFAULT_TRUE_PEAK_CEILING_DB))
+
+    lufs = np.array([item["metrics"]["loudness"]["integrated_lufs"] for item in results], dtype=float)
+    tilt = np.array([item["metrics"]["spectral"]["spectral_tilt_db_per_oct"] for item in results], dtype=float)
+    peaks = np.array([item["metrics"]["loudness"]["true_peak_db"] for item in results], dtype=float)
+
+    # Album loudness is the power average of the tracks, as if played back to back.
+    album_lufs = float(10.0 * np.log10(np.mean(10.0 ** (lufs / 10.0))))
+    within = (lufs >= lufs_target[0]) & (lufs <= lufs_target[1])
+    tracks = [
+        AlbumTrack(
+            job_id=item["job_id"],
+            integrated_lufs=float(lufs[i]),
+            offset_from_album_lu=float(lufs[i] - album_lufs),
+            spectral_tilt_db_per_oct=float(tilt[i]),
+            true_peak_db=float(peaks[i]),
+            within_lufs_target=bool(within[i]),
+        )
+        for i, item in enumerate(results)
+    ]
+
+    loudness_spread = float(np.ptp(lufs))
+    tilt_spread = float(np.ptp(tilt))
+    true_peak_max = float(np.max(peaks))
+
+    notes: List[str] = []
+    if loudness_spread > 2.0:
+        notes.append(f"Lydstyrken varierer med {loudness_spread:.1f} LU mellom sporene; jevn ut nivået på tvers av albumet.")
+    if tilt_spread > 0.5:
+        notes.append("Tonal balanse varierer mellom sporene; vurder å matche diskant og bass på tvers av albumet.")
+    if true_peak_max > ceiling:
+        notes.append(f"Minst ett spor overskrider true-peak-taket på {ceiling:.1f} dBTP.")
+    if not np.all(within):
+        notes.append("Noen spor ligger utenfor lydstyrkemålet for sjangeren.")
+    if not notes:
+        notes.append("Albumet er konsistent i lydstyrke, tonal balanse og toppnivå.")
+
+    return AlbumReport(
+        track_count=len(results),
+        lufs_target=lufs_target,
+        true_peak_ceiling_db=ceiling,
+        album_lufs=album_lufs,
+        loudness_spread_lu=loudness_spread,
+        tilt_spread_db_per_oct=tilt_spread,
+        true_peak_max_db=true_peak_max,
+        true_peak_margin_db=float(ceiling - true_peak_max),
+        tracks=tracks,
+        notes=notes,
+    )
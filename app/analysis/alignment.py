@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .features import load_feature_tracks, load_manifest
+
+ALIGNMENT_SEGMENT_SEC = 10.0
+DRIFT_WINDOW_SEC = 30.0
+DRIFT_SEARCH_SEC = 2.0
+MIN_WINDOW_CORRELATION = 0.2
+SILENCE_LUFS = -70.0
+
+
+@dataclass
+class AlignmentSegment:
+    start_sec: float
+    end_sec: float
+    loudness_diff_lu: float
+    correlation_diff: float
+    band_diffs_db: Dict[str, float]
+
+
+@dataclass
+class Alignment:
+    offset_sec: float
+    drift_ratio: float
+    confidence: float
+    overlap_sec: float
+    loudness_diff_lu: float
+    segments: List[AlignmentSegment]
+
+
+def _standardize(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    values = values - np.mean(values)
+    std = np.std(values)
+    return values / std if std > 1e-12 else values
+
+
+def _parabolic_offset(values: np.ndarray, peak: int) -> float:
+    """Sub-sample position of a peak from a parabola through it and its neighbours."""
+    if peak <= 0 or peak >= len(values) - 1:
+        return 0.0
+    left, centre, right = values[peak - 1], values[peak], values[peak + 1]
+    denominator = left - 2.0 * centre + right
+    if not np.isfinite(denominator) or denominator >= 0:
+        return 0.0
+    return float(0.5 * (left - right) / denominator)
+
+
+def cross_correlation_lag(a: np.ndarray, b: np.ndarray, max_lag: Optional[int] = None) -> Tuple[float, float]:
+    """Frame lag maximizing sum_t a[t + lag] * b[t], refined to sub-frame precision.
+
+    Returns the lag and the overlap-normalized correlation at the peak (about
+    -1..1, since both envelopes are standardized first).
+    """
+    a = _standardize(a)
+    b = _standardize(b)
+    la, lb = len(a), len(b)
+    nfft = 1 << (la + lb - 2).bit_length()
+    circular = np.fft.irfft(np.fft.rfft(a, nfft) * np.conj(np.fft.rfft(b, nfft)), nfft)
+    corr = np.concatenate([circular[nfft - (lb - 1):], circular[:la]])
+    lags = np.arange(-(lb - 1), la)
+
+    overlap = np.minimum(lb, la - lags) - np.maximum(0, -lags)
+    # Lags with only a sliver of overlap produce spurious peaks.
+    usable = overlap >= max(8, min(la, lb) // 4)
+    if max_lag is not None:
+        usable &= np.abs(lags) <= max_lag
+    if not np.any(usable):
+        return 0.0, 0.0
+    normalized = np.where(usable, corr / np.maximum(overlap, 1), -np.inf)
+
+    peak = int(np.argmax(normalized))
+    return float(lags[peak]) + _parabolic_offset(normalized, peak), float(normalized[peak])
+
+
+def estimate_drift(a: np.ndarray, b: np.ndarray, lag: float, window: int, search: int) -> Tuple[float, float]:
+    """Fit lag(t) = offset + drift * t from windowed local lags around a global lag.
+
+    Each window of `b` is matched against `a` within +/- `search` frames of the
+    global lag; the local lags are then fitted with a correlation-weighted line.
+    """
+    a = _standardize(a)
+    b = _standardize(b)
+    if len(b) < window or len(a) < window:
+        return lag, 0.0
+    candidates = np.lib.stride_tricks.sliding_window_view(a, window)
+    times: List[float] = []
+    local_lags: List[float] = []
+    weights: List[float] = []
+    for start in range(0, len(b) - window + 1, max(1, window // 2)):
+        lo = start + int(round(lag)) - search
+        hi = start + int(round(lag)) + search
+        if lo < 0 or hi >= len(candidates):
+            continue
+        scores = candidates[lo:hi + 1] @ b[start:start + window] / window
+        best = int(np.argmax(scores))
+        if scores[best] < MIN_WINDOW_CORRELATION:
+            continue
+        times.append(start + window / 2.0)
+        local_lags.append(float(lo + best - start) + _parabolic_offset(scores, best))
+        weights.append(float(scores[best]))
+    if len(times) < 3:
+        return lag, 0.0
+    drift, offset = np.polyfit(times, local_lags, 1, w=weights)
+    return float(offset), float(drift)
+
+
+def _interpolate(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Linear interpolation of frames (1-D or 2-D, frames first) at fractional positions."""
+    base = np.clip(np.floor(positions).astype(int), 0, len(values) - 1)
+    upper = np.minimum(base + 1, len(values) - 1)
+    frac = positions - base
+    if values.ndim > 1:
+        frac = frac[:, None]
+    return values[base] * (1.0 - frac) + values[upper] * frac
+
+
+def _segment_means(values: np.ndarray, segment_ids: np.ndarray, count: int) -> np.ndarray:
+    totals = np.zeros((count,) + values.shape[1:])
+    np.add.at(totals, segment_ids, values)
+    hits = np.bincount(segment_ids, minlength=count).astype(float)
+    shape = (count,) + (1,) * (values.ndim - 1)
+    return totals / np.maximum(hits, 1.0).reshape(shape)
+
+
+def align_tracks(
+    tracks_a: Dict[str, np.ndarray],
+    tracks_b: Dict[str, np.ndarray],
+    hop_sec: float,
+    band_names: List[str],
+    segment_sec: float = ALIGNMENT_SEGMENT_SEC,
+    drift: bool = True,
+) -> Alignment:
+    """Align `b` onto `a` by their onset envelopes and diff the curves per segment of `a`.
+
+    A positive offset means the material appears later in `a` than in `b`;
+    diffs are `a - b`.
+    """
+    onset_a = tracks_a["onset_strength"].astype(np.float64)
+    onset_b = tracks_b["onset_strength"].astype(np.float64)
+    lag, confidence = cross_correlation_lag(onset_a, onset_b)
+    slope = 0.0
+    if drift:
+        lag, slope = estimate_drift(
+            onset_a,
+            onset_b,
+            lag,
+            window=int(round(DRIFT_WINDOW_SEC / hop_sec)),
+            search=int(round(DRIFT_SEARCH_SEC / hop_sec)),
+        )
+
+    # Frame i of `a` holds what `b` had at (i - lag) / (1 + drift).
+    frames_a = np.arange(len(onset_a), dtype=np.float64)
+    positions = (frames_a - lag) / (1.0 + slope)
+    valid = (positions >= 0.0) & (positions <= len(onset_b) - 1)
+    loud_a = tracks_a["short_term_lufs"].astype(np.float64)
+    loud_b = _interpolate(tracks_b["short_term_lufs"].astype(np.float64), positions)
+    active = valid & (loud_a > SILENCE_LUFS) & (loud_b > SILENCE_LUFS)
+    if not np.any(active):
+        return Alignment(lag * hop_sec, slope, confidence, 0.0, 0.0, [])
+
+    index = np.flatnonzero(active)
+    segment_frames = max(1, int(round(segment_sec / hop_sec)))
+    segment_ids = index // segment_frames
+    count = int(segment_ids.max()) + 1
+    hits = np.bincount(segment_ids, minlength=count)
+
+    loudness = _segment_means(loud_a[index] - loud_b[index], segment_ids, count)
+    correlation = _segment_means(
+        tracks_a["correlation"][index].astype(np.float64)
+        - _interpolate(tracks_b["correlation"].astype(np.float64), positions[index]),
+        segment_ids,
+        count,
+    )
+    bands = _segment_means(
+        tracks_a["band_energies_db"][index].astype(np.float64)
+        - _interpolate(tracks_b["band_energies_db"].astype(np.float64), positions[index]),
+        segment_ids,
+        count,
+    )
+
+    segments = [
+        AlignmentSegment(
+            start_sec=seg * segment_frames * hop_sec,
+            end_sec=min((seg + 1) * segment_frames, len(onset_a)) * hop_sec,
+            loudness_diff_lu=float(loudness[seg]),
+            correlation_diff=float(correlation[seg]),
+            band_diffs_db={name: float(bands[seg, i]) for i, name in enumerate(band_names)},
+        )
+        for seg in range(count)
+        if hits[seg]
+    ]
+    return Alignment(
+        offset_sec=lag * hop_sec,
+        drift_ratio=slope,
+        confidence=confidence,
+        overlap_sec=float(np.count_nonzero(valid)) * hop_sec,
+        loudness_diff_lu=float(np.mean(loud_a[index] - loud_b[index])),
+        segments=segments,
+    )
+
+
+def align_feature_dirs(
+    directory_a: str,
+    directory_b: str,
+    segment_sec: float = ALIGNMENT_SEGMENT_SEC,
+    drift: bool = True,
+) -> Alignment:
+    manifest_a = load_manifest(directory_a)
+    manifest_b = load_manifest(directory_b)
+    if manifest_a is None or manifest_b is None:
+        raise FileNotFoundError(directory_a if manifest_a is None else directory_b)
+    if abs(float(manifest_a["hop_sec"]) - float(manifest_b["hop_sec"])) > 1e-9:
+        raise ValueError("Feature tracks use different hop sizes")
+    return align_tracks(
+        load_feature_tracks(directory_a),
+        load_feature_tracks(directory_b),
+        float(manifest_a["hop_sec"]),
+        list(manifest_a["columns"]["band_energies_db"]),
+        segment_sec=segment_sec,
+        drift=drift,
+    )
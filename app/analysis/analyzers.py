@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Every selectable analyzer with the analyzers it needs, in the order the
+# engine runs them.
+ANALYZERS: Dict[str, Tuple[str, ...]] = {
+    "loudness": (),
+    "spectral": (),
+    "stereo": (),
+    "channels": (),
+    "features": (),
+    "fingerprint": ("loudness", "spectral", "stereo"),
+    "vocal": (),
+    "reverb": (),
+    "masking": (),
+    "low_end": (),
+    "transient": ("loudness",),
+    "stem_masking": (),
+    "artifacts": (),
+    "qa": (),
+    "bpm_key": (),
+    "reference_compare": ("loudness", "spectral", "stereo"),
+}
+
+# Shorthands accepted wherever analyzer names are.
+ANALYZER_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "delivery": ("loudness",),
+    "core": ("loudness", "spectral", "stereo"),
+    "tonal": ("spectral", "masking", "low_end"),
+    "vocal_chain": ("vocal", "reverb"),
+    "instrumental_chain": ("masking", "low_end", "transient", "bpm_key"),
+}
+
+
+def default_analyzers(mode: str, full: bool = False, stems: int = 0, references: bool = False) -> List[str]:
+    """What a job runs when the request does not pick analyzers itself."""
+    selected: Set[str] = {"loudness", "spectral", "stereo", "features", "fingerprint", "artifacts", "qa"}
+    if mode in {"vocal", "mix"} or full:
+        selected.update(ANALYZER_GROUPS["vocal_chain"])
+    if mode in {"instrumental", "mix"} or full:
+        selected.update(ANALYZER_GROUPS["instrumental_chain"])
+    if stems > 1:
+        selected.add("stem_masking")
+    if mode == "mix" and references:
+        selected.add("reference_compare")
+    return [name for name in ANALYZERS if name in selected]
+
+
+def resolve_analyzers(requested: Iterable[str]) -> List[str]:
+    """Expand groups and dependencies; raises ValueError for unknown names."""
+    pending = []
+    for name in requested:
+        name = name.strip()
+        if not name:
+            continue
+        if name in ANALYZER_GROUPS:
+            pending.extend(ANALYZER_GROUPS[name])
+        elif name in ANALYZERS:
+            pending.append(name)
+        else:
+            raise ValueError(f"Unknown analyzer: {name}")
+    selected: Set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(ANALYZERS[name])
+    if not selected:
+        raise ValueError("No analyzers selected")
+    return [name for name in ANALYZERS if name in selected]
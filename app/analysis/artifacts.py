@@ -32,15 +32,25 @@ def detect_artifacts(audio: np.ndarray, sr: int, extension: str) -> ArtifactRepo
         rms_vals.append(np.sqrt(np.mean(chunk ** 2)))
     rms_vals = np.array(rms_vals) if rms_vals else np.array([np.sqrt(np.mean(mono ** 2))])
 
-    gating = bool(np.percentile(rms_vals, 5) < np.percentile(rms_vals, 60) * 0.15)
-
-    crackle = bool(np.mean(np.abs(np.diff(np.sign(mono)))) > 1.5)
-
-    warble = False
+    flux = None
     if stft is not None:
         _, _, spec = stft(mono, fs=sr, nperseg=2048, noverlap=1024)
         flux = np.mean(np.diff(np.abs(spec), axis=1) ** 2, axis=0)
-        warble = bool(np.std(flux) > np.mean(flux) * 2.0)
+
+    sign_change_rate = float(np.mean(np.abs(np.diff(np.sign(mono)))))
+    return artifacts_from_stats(rms_vals, sign_change_rate, flux, extension)
+
+
+def artifacts_from_stats(
+    rms_vals: np.ndarray,
+    sign_change_rate: float,
+    flux: Optional[np.ndarray],
+    extension: str,
+) -> ArtifactReport:
+    """Artifact flags from 50/25 ms RMS windows, the mean |diff(sign)| and 2048/1024 spectral flux."""
+    gating = bool(np.percentile(rms_vals, 5) < np.percentile(rms_vals, 60) * 0.15)
+    crackle = bool(sign_change_rate > 1.5)
+    warble = bool(np.std(flux) > np.mean(flux) * 2.0) if flux is not None else False
 
     codec = extension if extension in {".mp3", ".aac", ".m4a"} else None
     notes: List[str] = []
@@ -39,7 +39,13 @@ def estimate_bpm(audio: np.ndarray, sr: int) -> TempoEstimate:
     if librosa is None:
         raise RuntimeError("librosa is required for BPM estimation")
     mono = _mono(audio)
-    onset_env = librosa.onset.onset_strength(y=mono, sr=sr)
+    return tempo_from_onset(librosa.onset.onset_strength(y=mono, sr=sr), sr)
+
+
+def tempo_from_onset(onset_env: np.ndarray, sr: int) -> TempoEstimate:
+    """Tempo estimate from a librosa onset-strength envelope (512-sample hop)."""
+    if librosa is None:
+        raise RuntimeError("librosa is required for BPM estimation")
     tempi = librosa.beat.tempo(onset_envelope=onset_env, sr=sr, aggregate=None)
     tempo = float(np.median(tempi)) if len(tempi) else 0.0
     spread = float(np.std(tempi)) if len(tempi) > 1 else tempo * 0.1
@@ -59,8 +65,11 @@ def estimate_key(audio: np.ndarray, sr: int) -> KeyEstimate:
         raise RuntimeError("librosa is required for key estimation")
     mono = _mono(audio)
     chroma = librosa.feature.chroma_cqt(y=mono, sr=sr)
-    chroma_mean = np.mean(chroma, axis=1)
+    return key_from_chroma(np.mean(chroma, axis=1))
+
 
+def key_from_chroma(chroma_mean: np.ndarray) -> KeyEstimate:
+    """Krumhansl key estimate from a time-averaged 12-bin chroma vector."""
     def score(profile: np.ndarray) -> Tuple[str, float]:
         scores = []
         for i in range(12):
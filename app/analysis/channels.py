@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import gated_loudness, gating_block_powers, k_weighting_sos, peak_to_db, spectral_from_average
+
+try:
+    from scipy.signal import get_window, resample_poly, sosfilt
+except Exception:  # pragma: no cover - optional dependency
+    sosfilt = None
+
+
+@dataclass(frozen=True)
+class ChannelLayout:
+    name: str
+    channels: Tuple[str, ...]
+
+
+# Channel order of WAVE/SMPTE deliveries.
+LAYOUTS: Dict[int, ChannelLayout] = {
+    1: ChannelLayout("mono", ("M",)),
+    2: ChannelLayout("stereo", ("L", "R")),
+    3: ChannelLayout("3.0", ("L", "R", "C")),
+    4: ChannelLayout("4.0", ("L", "R", "Ls", "Rs")),
+    5: ChannelLayout("5.0", ("L", "R", "C", "Ls", "Rs")),
+    6: ChannelLayout("5.1", ("L", "R", "C", "LFE", "Ls", "Rs")),
+    8: ChannelLayout("7.1", ("L", "R", "C", "LFE", "Lb", "Rb", "Ls", "Rs")),
+}
+# BS.1770-4 weights: side surrounds (60-120 degrees) +1.5 dB, LFE not measured.
+CHANNEL_WEIGHTS = {"M": 1.0, "L": 1.0, "R": 1.0, "C": 1.0, "LFE": 0.0, "Ls": 1.41, "Rs": 1.41, "Lb": 1.0, "Rb": 1.0}
+# BS.775 stereo downmix gains (left, right); the LFE is dropped.
+DOWNMIX_GAINS = {
+    "M": (1.0, 1.0),
+    "L": (1.0, 0.0),
+    "R": (0.0, 1.0),
+    "C": (0.7071, 0.7071),
+    "LFE": (0.0, 0.0),
+    "Ls": (0.7071, 0.0),
+    "Rs": (0.0, 0.7071),
+    "Lb": (0.7071, 0.0),
+    "Rb": (0.0, 0.7071),
+}
+
+LOUDNESS_HOP_SEC = 0.1
+CHUNK_HOPS = 100  # 10 s of audio per pass step
+STFT_SIZE = 4096
+STFT_HOP = 2048
+TRUE_PEAK_OVERSAMPLE = 4
+TRUE_PEAK_CONTEXT = 64
+
+
+@dataclass
+class ChannelMetrics:
+    name: str
+    weight: float
+    integrated_lufs: float
+    true_peak_db: float
+    sample_peak_db: float
+    band_energies_db: Dict[str, float]
+
+
+@dataclass
+class ChannelReport:
+    layout: str
+    integrated_lufs: float  # BS.1770 weighted sum over channels
+    true_peak_db: float  # loudest channel
+    downmix: Optional[str]
+    channels: List[ChannelMetrics]
+
+
+def channel_layout(count: int) -> ChannelLayout:
+    """Known layouts by channel count; anything else gets numbered channels."""
+    return LAYOUTS.get(count) or ChannelLayout(f"{count}ch", tuple(f"Ch{index + 1}" for index in range(count)))
+
+
+def downmix_matrix(layout: ChannelLayout) -> np.ndarray:
+    """(channels, 2) gains; unknown layouts keep the first pair as L/R and fold the rest in at -3 dB."""
+    gains = []
+    for index, name in enumerate(layout.channels):
+        if name in DOWNMIX_GAINS:
+            gains.append(DOWNMIX_GAINS[name])
+        else:
+            gains.append(((1.0, 0.0), (0.0, 1.0))[index] if index < 2 else (0.7071, 0.7071))
+    return np.array(gains, dtype=np.float32)
+
+
+def stereo_downmix(audio: np.ndarray) -> np.ndarray:
+    """Inputs with more than two channels folded to stereo for the stereo analyzers."""
+    if audio.ndim == 1 or audio.shape[1] <= 2:
+        return audio
+    return np.ascontiguousarray(audio @ downmix_matrix(channel_layout(audio.shape[1])), dtype=np.float32)
+
+
+def _true_peaks(audio: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Per-channel oversampled peak of [start, end), with context so the filter has settled."""
+    lo = max(0, start - TRUE_PEAK_CONTEXT)
+    hi = min(len(audio), end + TRUE_PEAK_CONTEXT)
+    up = resample_poly(audio[lo:hi], TRUE_PEAK_OVERSAMPLE, 1, axis=0)
+    own = up[(start - lo) * TRUE_PEAK_OVERSAMPLE : (end - lo) * TRUE_PEAK_OVERSAMPLE]
+    return np.max(np.abs(own), axis=0)
+
+
+def _frame_magnitudes(history: np.ndarray, window: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Summed STFT magnitudes of every whole frame in `history`, all channels in one FFT."""
+    count = (len(history) - STFT_SIZE) // STFT_HOP + 1
+    if count <= 0:
+        return np.zeros((history.shape[1], STFT_SIZE // 2 + 1)), 0
+    frames = np.lib.stride_tricks.sliding_window_view(history, STFT_SIZE, axis=0)[: count * STFT_HOP : STFT_HOP]
+    spectra = np.abs(np.fft.rfft(frames * window, axis=-1)) / window.sum()
+    return spectra.sum(axis=0), count
+
+
+def analyze_channels(audio: np.ndarray, sr: int, layout: Optional[ChannelLayout] = None) -> ChannelReport:
+    """Per-channel loudness, peaks and band energies in one chunked pass over all channels.
+
+    K-weighting, oversampling and the STFT (framed like scipy's `stft` in the
+    spectral metrics) run on the stacked channel axis, so the cost grows with
+    the channel count only inside vectorized calls.
+    """
+    if sosfilt is None:
+        raise RuntimeError("scipy is required for channel analysis")
+    if audio.ndim == 1:
+        audio = audio[:, None]
+    layout = layout or channel_layout(audio.shape[1])
+    samples, count = audio.shape
+    hop = int(round(LOUDNESS_HOP_SEC * sr))
+    chunk = hop * CHUNK_HOPS
+    sos = k_weighting_sos(sr)
+    state = np.zeros((sos.shape[0], 2, count))
+    window = get_window("hann", STFT_SIZE)[None, :]
+
+    energies: List[np.ndarray] = []
+    sample_peak = np.zeros(count)
+    true_peak = np.zeros(count)
+    magnitudes = np.zeros((count, STFT_SIZE // 2 + 1))
+    frames = 0
+    # Half a frame of leading zeros, like the zero boundary of `stft`.
+    history = np.zeros((STFT_SIZE // 2, count))
+    for start in range(0, samples, chunk):
+        block = audio[start : start + chunk].astype(np.float64)
+        weighted, state = sosfilt(sos, block, axis=0, zi=state)
+        squared = np.zeros((-(-len(block) // hop) * hop, count))
+        squared[: len(block)] = weighted ** 2
+        energies.append(squared.reshape(-1, hop, count).sum(axis=1))
+        sample_peak = np.maximum(sample_peak, np.max(np.abs(block), axis=0))
+        true_peak = np.maximum(true_peak, _true_peaks(audio, start, start + len(block)))
+
+        history = np.concatenate([history, block])
+        summed, used = _frame_magnitudes(history, window)
+        magnitudes += summed
+        frames += used
+        history = history[used * STFT_HOP :]
+    # Trailing half frame of zeros, then padding to a whole frame, as `stft` pads.
+    tail = STFT_SIZE // 2 + (-(len(history) + STFT_SIZE // 2 - STFT_SIZE)) % STFT_HOP
+    summed, used = _frame_magnitudes(np.concatenate([history, np.zeros((tail, count))]), window)
+    magnitudes += summed
+    frames += used
+
+    hop_energy = np.concatenate(energies)
+    blocks = gating_block_powers(hop_energy, sr, samples / sr)
+    weights = np.array([CHANNEL_WEIGHTS.get(name, 1.0) for name in layout.channels])
+    freqs = np.fft.rfftfreq(STFT_SIZE, 1.0 / sr)
+    channels = [
+        ChannelMetrics(
+            name=name,
+            weight=float(weights[index]),
+            integrated_lufs=gated_loudness(blocks[:, index]),
+            true_peak_db=peak_to_db(float(true_peak[index])),
+            sample_peak_db=peak_to_db(float(sample_peak[index])),
+            band_energies_db=spectral_from_average(freqs, magnitudes[index] / max(frames, 1) + 1e-9).band_energies_db,
+        )
+        for index, name in enumerate(layout.channels)
+    ]
+    return ChannelReport(
+        layout=layout.name,
+        integrated_lufs=gated_loudness(blocks @ weights),
+        true_peak_db=peak_to_db(float(np.max(true_peak))),
+        downmix="BS.775 stereo" if count > 2 else None,
+        channels=channels,
+    )
@@ -1,73 +1,216 @@
 from __future__ import annotations
 
-from dataclasses import asdict
-import json
-from typing import Any, Dict, Optional
-
-from .ab_compare import compare_ab
-from .artifacts import detect_artifacts
-from .bpm_key import estimate_bpm, estimate_key
-from .ingest import load_audio
-from .lowend import analyze_low_end
-from .masking import analyze_masking
-from .metrics import compute_loudness, compute_spectral, compute_stereo
-from .reverb import analyze_reverb
+import asyncio
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import asdict, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from .ab_compare import compare_references
+from .analyzers import ANALYZERS, default_analyzers
+from .channels import analyze_channels, stereo_downmix
+from .features import save_feature_tracks
+from .fingerprint import fingerprint_vector, save_fingerprint
+from .ingest import AudioData, load_audio
+from .partials import open_signal, segment_pool
+from .previews import build_previews
 from .report import build_report
-from .transient import analyze_transients
-from .vocal import analyze_vocal
-from .qa import analyze_qa
-from ..storage import result_path
+from .reference import comparison_metrics
+from .stems import analyze_stem_masking, sum_stems
+from ..config import settings
+from ..profiling import JobProfiler
+# A module import: loading app.references first imports this package part-way through it.
+from .. import references
+from ..retention import finalize_upload
+from ..storage import features_path, previews_path, write_result
+
+
+ProgressCallback = Callable[[float, str], None]
+PartialCallback = Callable[[Dict[str, Any]], None]
+
+REFERENCE_SUGGESTIONS = 3
+MAX_REFERENCE_WORKERS = 4
+
+
+def _ignore_progress(progress: float, stage: str) -> None:
+    return None
+
+
+def _ignore_partial(sections: Dict[str, Any]) -> None:
+    return None
 
 
 async def process_job(payload: Dict[str, Any], store) -> Dict[str, Any]:
+    """Run the analysis in a worker thread so several jobs can progress at once."""
+    loop = asyncio.get_running_loop()
+    job_id = payload["job_id"]
+
+    def progress(value: float, stage: str) -> None:
+        asyncio.run_coroutine_threadsafe(store.update(job_id, progress=value, stage=stage), loop)
+
+    def partial(sections: Dict[str, Any]) -> None:
+        asyncio.run_coroutine_threadsafe(store.publish(job_id, sections), loop)
+
+    if payload.get("profile"):
+        return await asyncio.to_thread(_run_profiled, payload, progress, partial)
+    return await asyncio.to_thread(run_analysis, payload, progress, True, partial)
+
+
+def _run_profiled(payload: Dict[str, Any], progress: ProgressCallback, partial: PartialCallback) -> Dict[str, Any]:
+    """`run_analysis` under cProfile and tracemalloc; the profile is kept even if the job fails."""
+    profiler = JobProfiler(payload["job_id"])
+
+    def staged(value: float, stage: str) -> None:
+        profiler.mark(stage)
+        progress(value, stage)
+
+    try:
+        profiler.start()
+        return run_analysis(payload, staged, True, partial)
+    finally:
+        profiler.save(profiler.stop())
+
+
+def run_analysis(
+    payload: Dict[str, Any],
+    progress: ProgressCallback = _ignore_progress,
+    persist: bool = True,
+    partial: PartialCallback = _ignore_partial,
+) -> Dict[str, Any]:
+    """Analyze one payload; with persist=False nothing is written under data/.
+
+    Sections are handed to `partial` as soon as they are known, so pollers can
+    show them before the report is built.
+    """
     job_id = payload["job_id"]
     mode = payload["mode"]
     genre = payload["genre"]
     vocal_style = payload.get("vocal_style")
     audio_path = payload.get("audio_path")
-    reference_path = payload.get("reference_path")
+    reference_uploads = payload.get("reference_uploads") or []
+    stem_uploads = payload.get("stem_uploads") or []
     extension = payload.get("extension", "")
+    start_sec = payload.get("start_sec")
+    end_sec = payload.get("end_sec")
+    # The full tier runs every detector, whatever the mode would normally select.
+    full = payload.get("tier") == "full"
+    selected = set(
+        payload.get("analyzers")
+        or default_analyzers(mode, full, len(stem_uploads), bool(reference_uploads or payload.get("reference_ids")))
+    )
+
+    pending_references: List[Future] = []
+    if mode == "mix" and reference_uploads and "reference_compare" in selected:
+        # Uploaded references are analyzed alongside the mix. They go through the
+        # library, so a reference that was seen before is matched by content hash
+        # and not decoded again.
+        pool = ThreadPoolExecutor(max_workers=min(len(reference_uploads), MAX_REFERENCE_WORKERS))
+        pending_references = [
+            pool.submit(references.reference_library.add, item["path"], item.get("name")) for item in reference_uploads
+        ]
+        pool.shutdown(wait=False)
 
-    audio_data = load_audio(audio_path)
+    stems = [load_audio(item["path"], start_sec=start_sec, end_sec=end_sec) for item in stem_uploads]
+    if audio_path:
+        audio_data = load_audio(audio_path, start_sec=start_sec, end_sec=end_sec)
+    else:
+        audio_data = _mix_from_stems(stems)
     warnings = list(audio_data.warnings)
-    await store.update(job_id, progress=0.2, stage="metrics")
+    # Surround inputs are measured per channel below; every other analyzer sees the stereo downmix.
+    surround = audio_data.audio if audio_data.num_channels > 2 else None
+    if surround is not None:
+        audio_data.audio = stereo_downmix(surround)
+        # The downmix can sum past full scale, so delivery loudness needs the channel pass.
+        if not payload.get("analyzers") or "loudness" in selected:
+            selected.add("channels")
+    progress(0.2, "metrics")
 
-    loudness = compute_loudness(audio_data.audio, audio_data.sr)
-    spectral = compute_spectral(audio_data.audio, audio_data.sr)
-    stereo = compute_stereo(audio_data.audio)
-    await store.update(job_id, progress=0.35, stage="detectors")
+    # Segment partials are cached by content, so a revision that only changed
+    # one section re-analyzes just the segments around that section. Jobs that
+    # only need whole-signal statistics skip the segment STFTs altogether.
+    signal = open_signal(
+        audio_data.audio,
+        audio_data.sr,
+        settings.segments_dir if persist else None,
+        selected,
+        _chunk_executor(payload, audio_data.duration_sec),
+    )
+    metrics: Dict[str, Any] = {}
+    channel_report = None
+    if "channels" in selected and audio_data.num_channels > 1:
+        channel_input = surround if surround is not None else audio_data.audio
+        channel_report = analyze_channels(channel_input, audio_data.sr)
+    loudness = signal.loudness() if "loudness" in selected else None
+    if loudness is not None and surround is not None and channel_report is not None:
+        # Headline loudness and true peak of a surround delivery are measured on
+        # its channels (BS.1770 weighted sum, loudest channel), not on the downmix.
+        loudness = replace(
+            loudness,
+            integrated_lufs=channel_report.integrated_lufs,
+            true_peak_db=channel_report.true_peak_db,
+        )
+    if loudness is not None:
+        metrics["loudness"] = asdict(loudness)
+    spectral = signal.spectral() if "spectral" in selected else None
+    if spectral is not None:
+        metrics["spectral"] = asdict(spectral)
+    stereo = signal.stereo() if "stereo" in selected else None
+    if stereo is not None:
+        metrics["stereo"] = asdict(stereo)
+    if channel_report is not None:
+        metrics["channels"] = asdict(channel_report)
+    partial({"provisional": True, "duration_sec": audio_data.duration_sec, "metrics": dict(metrics)})
+    progress(0.3, "features")
 
-    metrics: Dict[str, Any] = {
-        "loudness": asdict(loudness),
-        "spectral": asdict(spectral),
-        "stereo": asdict(stereo),
-    }
+    loudness_curve = None
+    if persist and "features" in selected:
+        tracks = signal.feature_tracks()
+        save_feature_tracks(tracks, features_path(job_id))
+        build_previews(
+            audio_data.audio,
+            audio_data.sr,
+            tracks.spectrogram_db,
+            tracks.spectrogram_hop_sec,
+            previews_path(job_id),
+        )
+        loudness_curve = tracks.short_term_lufs
+    mix_metrics: Optional[Dict[str, float]] = None
+    fingerprint = None
+    if {"fingerprint", "reference_compare"} & selected:
+        mix_metrics = comparison_metrics(loudness, spectral, stereo)
+    if "fingerprint" in selected:
+        if loudness_curve is None:
+            loudness_curve = signal.short_term_loudness()
+        fingerprint = fingerprint_vector(signal.third_octave(), mix_metrics, loudness_curve)
+        if persist:
+            save_fingerprint(fingerprint, features_path(job_id))
+    progress(0.35, "detectors")
+
+    if "vocal" in selected:
+        metrics["vocal"] = asdict(signal.vocal())
+    if "reverb" in selected:
+        metrics["reverb"] = asdict(signal.reverb())
+    if "masking" in selected:
+        metrics["masking"] = [asdict(item) for item in signal.masking()]
+    if "low_end" in selected:
+        metrics["low_end"] = asdict(signal.low_end())
+    if "transient" in selected:
+        metrics["transient"] = asdict(signal.transients(loudness.crest_factor_db))
 
-    if mode in {"vocal", "mix"}:
-        vocal = analyze_vocal(audio_data.audio, audio_data.sr)
-        reverb = analyze_reverb(audio_data.audio, audio_data.sr)
-        metrics["vocal"] = asdict(vocal)
-        metrics["reverb"] = asdict(reverb)
-
-    if mode in {"instrumental", "mix"}:
-        masking = analyze_masking(audio_data.audio, audio_data.sr)
-        low_end = analyze_low_end(audio_data.audio, audio_data.sr)
-        transient = analyze_transients(audio_data.audio, audio_data.sr, loudness.crest_factor_db)
-        metrics["masking"] = [asdict(item) for item in masking]
-        metrics["low_end"] = asdict(low_end)
-        metrics["transient"] = asdict(transient)
-
-    artifacts = detect_artifacts(audio_data.audio, audio_data.sr, extension)
-    qa = analyze_qa(audio_data.audio, audio_data.sr)
-    metrics["artifacts"] = asdict(artifacts)
-    metrics["qa"] = asdict(qa)
-    warnings.extend(qa.warnings)
-    warnings.extend(artifacts.notes)
+    if "artifacts" in selected:
+        artifacts = signal.artifacts(extension)
+        metrics["artifacts"] = asdict(artifacts)
+    if "qa" in selected:
+        qa = signal.qa()
+        metrics["qa"] = asdict(qa)
+        warnings.extend(qa.warnings)
+    if "artifacts" in selected:
+        warnings.extend(artifacts.notes)
 
     bpm_key: Optional[Dict[str, Any]] = None
-    if mode in {"instrumental", "mix"}:
-        tempo = estimate_bpm(audio_data.audio, audio_data.sr)
-        key = estimate_key(audio_data.audio, audio_data.sr)
+    if "bpm_key" in selected:
+        tempo = signal.tempo()
+        key = signal.key()
         bpm_key = {
             "bpm": tempo.bpm,
             "confidence": tempo.confidence,
@@ -77,35 +220,27 @@ async def process_job(payload: Dict[str, Any], store) -> Dict[str, Any]:
             "note": "Best guess only; tempo/key can be ambiguous.",
         }
 
-    await store.update(job_id, progress=0.6, stage="report")
+    if len(stems) > 1 and "stem_masking" in selected:
+        metrics["stem_masking"] = asdict(
+            analyze_stem_masking(
+                [stereo_downmix(stem.audio) for stem in stems],
+                [item.get("name") or f"stem {index + 1}" for index, item in enumerate(stem_uploads)],
+                audio_data.sr,
+            )
+        )
+
+    partial({"metrics": _serialize_metrics(metrics), "bpm_key": bpm_key})
+    progress(0.6, "report")
 
     ab_report: Optional[Dict[str, Any]] = None
-    if mode == "mix" and reference_path:
-        ref_audio = load_audio(reference_path)
-        ref_loudness = compute_loudness(ref_audio.audio, ref_audio.sr)
-        ref_spectral = compute_spectral(ref_audio.audio, ref_audio.sr)
-        ref_stereo = compute_stereo(ref_audio.audio)
-        ref_metrics = {
-            "integrated_lufs": ref_loudness.integrated_lufs,
-            "short_term_lufs": ref_loudness.short_term_lufs,
-            "true_peak_db": ref_loudness.true_peak_db,
-            "crest_factor_db": ref_loudness.crest_factor_db,
-            "spectral_tilt_db_per_oct": ref_spectral.spectral_tilt_db_per_oct,
-            "stereo_width": ref_stereo.width,
-            "stereo_correlation": ref_stereo.correlation,
-        }
-        mix_metrics = {
-            "integrated_lufs": loudness.integrated_lufs,
-            "short_term_lufs": loudness.short_term_lufs,
-            "true_peak_db": loudness.true_peak_db,
-            "crest_factor_db": loudness.crest_factor_db,
-            "spectral_tilt_db_per_oct": spectral.spectral_tilt_db_per_oct,
-            "stereo_width": stereo.width,
-            "stereo_correlation": stereo.correlation,
-        }
-        ab_report = asdict(compare_ab(mix_metrics, ref_metrics))
+    if mode == "mix" and "reference_compare" in selected and (payload.get("reference_ids") or pending_references):
+        ab_report = _compare_with_references(mix_metrics, payload.get("reference_ids") or [], pending_references)
+
+    suggestions = (
+        references.reference_library.suggest(fingerprint, k=REFERENCE_SUGGESTIONS) if fingerprint is not None else []
+    )
 
-    await store.update(job_id, progress=0.8, stage="summarizing")
+    progress(0.8, "summarizing")
 
     report = build_report(
         job_id=job_id,
@@ -117,14 +252,80 @@ async def process_job(payload: Dict[str, Any], store) -> Dict[str, Any]:
         warnings=warnings,
         bpm_key=bpm_key,
         ab_compare=ab_report,
+        region=_region(audio_data) if start_sec is not None or end_sec is not None else None,
+        reference_suggestions=suggestions or None,
+        analyzers=[name for name in ANALYZERS if name in selected] if payload.get("analyzers") else None,
     )
 
-    with open(result_path(job_id), "w", encoding="utf-8") as handle:
-        json.dump(report, handle, indent=2)
+    if not persist:
+        return report
+
+    write_result(job_id, report)
+    if payload.get("owns_upload", True):
+        payload["audio_path"] = finalize_upload(audio_path)
+        for item in reference_uploads + stem_uploads:
+            item["path"] = finalize_upload(item["path"])
 
     return report
 
 
+def _chunk_executor(payload: Dict[str, Any], duration_sec: float) -> Optional[Executor]:
+    """The segment pool for long inputs, unless the caller already parallelizes across files."""
+    workers = settings.chunk_workers or os.cpu_count() or 1
+    if workers < 2 or duration_sec < settings.chunked_min_sec or not payload.get("chunked", True):
+        return None
+    return segment_pool(workers)
+
+
+def _compare_with_references(
+    mix_metrics: Dict[str, float],
+    reference_ids: List[str],
+    pending: List[Future],
+) -> Dict[str, Any]:
+    """Per-reference diffs plus a comparison against the median of all references."""
+    entries = []
+    for ref_id in reference_ids:
+        entry = references.reference_library.get(ref_id)
+        if entry is None:
+            raise ValueError(f"Unknown reference {ref_id}")
+        entries.append(entry)
+    entries.extend(future.result() for future in pending)
+    unique = list({entry.ref_id: entry for entry in entries}.values())
+
+    comparison = compare_references(mix_metrics, [entry.metrics for entry in unique])
+    ab_report = asdict(comparison.consensus)
+    if len(unique) == 1:
+        ab_report["reference_id"] = unique[0].ref_id
+        ab_report["reference_name"] = unique[0].name
+    ab_report["consensus_target"] = comparison.consensus_target
+    ab_report["references"] = [
+        {"reference_id": entry.ref_id, "reference_name": entry.name, **asdict(item)}
+        for entry, item in zip(unique, comparison.per_reference)
+    ]
+    return ab_report
+
+
+def _mix_from_stems(stems: List[AudioData]) -> AudioData:
+    """Jobs uploaded as stems only are analyzed on the sum of the stems."""
+    mix = sum_stems([stem.audio for stem in stems])
+    return AudioData(
+        audio=mix,
+        sr=stems[0].sr,
+        duration_sec=mix.shape[0] / float(stems[0].sr),
+        num_channels=mix.shape[1],
+        warnings=list(dict.fromkeys(warning for stem in stems for warning in stem.warnings)),
+        source_format=stems[0].source_format,
+        start_sec=stems[0].start_sec,
+    )
+
+
+def _region(audio_data) -> Dict[str, float]:
+    return {
+        "start_sec": audio_data.start_sec,
+        "end_sec": audio_data.start_sec + audio_data.duration_sec,
+    }
+
+
 def _serialize_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
     """Ensure all metrics are JSON-serializable."""
     serialized: Dict[str, Any] = {}
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .metrics import SPECTRAL_BANDS, k_weighting_sos
+
+try:
+    from scipy.signal import sosfilt, stft
+except Exception:  # pragma: no cover - optional dependency
+    sosfilt = None
+    stft = None
+
+try:
+    import librosa
+except Exception:  # pragma: no cover - optional dependency
+    librosa = None
+
+
+FEATURE_HOP_SEC = 0.1
+SHORT_TERM_WINDOW_SEC = 3.0
+CORRELATION_WINDOW_SEC = 0.4
+SIBILANCE_BAND = (5000, 10000)
+LUFS_FLOOR = -120.0
+SPECTROGRAM_BINS = 128
+SPECTROGRAM_RANGE_HZ = (20.0, 20000.0)
+TRACK_NAMES = ("short_term_lufs", "band_energies_db", "correlation", "sibilance_db", "onset_strength")
+
+
+@dataclass
+class FeatureTracks:
+    hop_sec: float
+    short_term_lufs: np.ndarray
+    band_energies_db: np.ndarray
+    band_names: List[str]
+    correlation: np.ndarray
+    sibilance_db: np.ndarray
+    onset_strength: np.ndarray
+    spectrogram_db: Optional[np.ndarray] = None
+    spectrogram_hop_sec: float = 0.0
+
+    @property
+    def num_frames(self) -> int:
+        return int(self.short_term_lufs.shape[0])
+
+
+def _mono(audio: np.ndarray) -> np.ndarray:
+    if audio.ndim == 1:
+        return audio
+    return np.mean(audio, axis=1)
+
+
+def _hop_sums(signal: np.ndarray, hop: int, frames: int) -> np.ndarray:
+    padded = np.zeros(frames * hop, dtype=np.float64)
+    padded[: len(signal)] = signal[: frames * hop]
+    return padded.reshape(frames, hop).sum(axis=1)
+
+
+def _trailing_sum(values: np.ndarray, window: int) -> np.ndarray:
+    cumulative = np.concatenate([np.zeros(1), np.cumsum(values)])
+    upper = np.arange(1, len(values) + 1)
+    lower = np.maximum(upper - window, 0)
+    return cumulative[upper] - cumulative[lower]
+
+
+def _frames_to_hops(values: np.ndarray, frame_times: np.ndarray, hop_sec: float, frames: int, reduce: str) -> np.ndarray:
+    """Downsample a (time, ...) array onto the feature hop grid by mean or max."""
+    idx = np.minimum((frame_times / hop_sec).astype(int), frames - 1)
+    out_shape = (frames,) + values.shape[1:]
+    if reduce == "max":
+        out = np.full(out_shape, -np.inf)
+        np.maximum.at(out, idx, values)
+        out[np.isinf(out)] = 0.0
+        return out
+    sums = np.zeros(out_shape)
+    np.add.at(sums, idx, values)
+    counts = np.bincount(idx, minlength=frames).reshape((frames,) + (1,) * (values.ndim - 1))
+    return sums / np.maximum(counts, 1)
+
+
+def short_term_loudness_track(audio: np.ndarray, sr: int, hop_sec: float = FEATURE_HOP_SEC) -> np.ndarray:
+    """Short-term (3 s) loudness sampled every hop_sec, without the other tracks."""
+    if sosfilt is None:
+        raise RuntimeError("scipy is required for feature tracks")
+    mono = _mono(audio)
+    hop = int(round(hop_sec * sr))
+    frames = max(1, int(np.ceil(len(mono) / hop)))
+    return _short_term_track(mono, sr, hop, frames)
+
+
+def _short_term_track(mono: np.ndarray, sr: int, hop: int, frames: int) -> np.ndarray:
+    weighted = sosfilt(k_weighting_sos(sr), mono)
+    return short_term_from_energy(_hop_sums(weighted.astype(np.float64) ** 2, hop, frames), sr, hop)
+
+
+def short_term_from_energy(energy: np.ndarray, sr: int, hop: int) -> np.ndarray:
+    """Short-term loudness per hop from per-hop sums of K-weighted squared samples."""
+    frames = len(energy)
+    window = max(1, int(round(SHORT_TERM_WINDOW_SEC * sr / hop)))
+    counts = np.minimum(np.arange(1, frames + 1), window) * hop
+    mean_square = _trailing_sum(energy, window) / counts
+    lufs = -0.691 + 10.0 * np.log10(np.maximum(mean_square, 1e-30))
+    return np.maximum(lufs, LUFS_FLOOR)
+
+
+def _correlation_track(audio: np.ndarray, sr: int, hop: int, frames: int) -> np.ndarray:
+    if audio.ndim == 1 or audio.shape[1] == 1:
+        return np.ones(frames)
+    left = audio[:, 0].astype(np.float64)
+    right = audio[:, 1].astype(np.float64)
+    hop_sums = np.stack(
+        [_hop_sums(series, hop, frames) for series in (left, right, left * left, right * right, left * right)]
+    )
+    return correlation_from_hop_sums(hop_sums, sr, hop)
+
+
+def correlation_from_hop_sums(hop_sums: np.ndarray, sr: int, hop: int) -> np.ndarray:
+    """Windowed L/R correlation from (5, frames) hop sums of L, R, L^2, R^2 and L*R."""
+    frames = hop_sums.shape[1]
+    window = max(1, int(round(CORRELATION_WINDOW_SEC * sr / hop)))
+    sum_l, sum_r, sum_ll, sum_rr, sum_lr = [_trailing_sum(row, window) for row in hop_sums]
+    count = np.minimum(np.arange(1, frames + 1), window) * hop
+    cov = count * sum_lr - sum_l * sum_r
+    var = (count * sum_ll - sum_l ** 2) * (count * sum_rr - sum_r ** 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where(var > 1e-18, cov / np.sqrt(np.maximum(var, 1e-30)), 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def log_spectrogram(mag: np.ndarray, freqs: np.ndarray) -> np.ndarray:
+    """Collapse linear STFT bins onto log-spaced frequency rows (low to high)."""
+    edges = np.geomspace(SPECTROGRAM_RANGE_HZ[0], SPECTROGRAM_RANGE_HZ[1], SPECTROGRAM_BINS + 1)
+    rows = np.searchsorted(edges, freqs, side="right") - 1
+    valid = (rows >= 0) & (rows < SPECTROGRAM_BINS)
+    power = np.zeros((SPECTROGRAM_BINS, mag.shape[1]))
+    np.add.at(power, rows[valid], mag[valid] ** 2)
+    counts = np.bincount(rows[valid], minlength=SPECTROGRAM_BINS)[:, None]
+    # Low rows narrower than one STFT bin borrow the nearest bin's energy.
+    empty = np.flatnonzero(counts[:, 0] == 0)
+    if len(empty):
+        centers = np.sqrt(edges[:-1] * edges[1:])[empty]
+        nearest = np.clip(np.searchsorted(freqs, centers), 0, len(freqs) - 1)
+        power[empty] = mag[nearest] ** 2
+        counts[empty] = 1
+    return (10.0 * np.log10(power / counts + 1e-18)).astype(np.float32)
+
+
+def compute_feature_tracks(audio: np.ndarray, sr: int, hop_sec: float = FEATURE_HOP_SEC) -> FeatureTracks:
+    if stft is None or sosfilt is None:
+        raise RuntimeError("scipy is required for feature tracks")
+    mono = _mono(audio)
+    hop = int(round(hop_sec * sr))
+    frames = max(1, int(np.ceil(len(mono) / hop)))
+
+    freqs, times, spec = stft(mono, fs=sr, nperseg=4096, noverlap=2048)
+    mag = np.abs(spec) + 1e-9
+
+    if librosa is not None:
+        onset = librosa.onset.onset_strength(y=mono, sr=sr)
+        onset_times = librosa.frames_to_time(np.arange(len(onset)), sr=sr)
+    else:
+        flux = np.sum(np.maximum(np.diff(mag, axis=1), 0.0), axis=0)
+        onset = np.concatenate([[0.0], flux])
+        onset_times = times
+
+    return assemble_feature_tracks(
+        hop_sec=hop_sec,
+        frames=frames,
+        short_term_lufs=_short_term_track(mono, sr, hop, frames),
+        correlation=_correlation_track(audio, sr, hop, frames),
+        band_frames=band_frame_means(mag, freqs),
+        frame_times=times,
+        onset=np.asarray(onset, dtype=np.float64),
+        onset_times=onset_times,
+        spectrogram_db=log_spectrogram(mag, freqs),
+    )
+
+
+def band_frame_means(mag: np.ndarray, freqs: np.ndarray) -> np.ndarray:
+    """(frames, bands) mean magnitude of the spectral bands plus the sibilance band."""
+    band_ranges = list(SPECTRAL_BANDS.values()) + [SIBILANCE_BAND]
+    return np.stack(
+        [
+            np.mean(mag[(freqs >= low) & (freqs < high)], axis=0)
+            if np.any((freqs >= low) & (freqs < high))
+            else np.zeros(mag.shape[1])
+            for low, high in band_ranges
+        ],
+        axis=1,
+    )
+
+
+def assemble_feature_tracks(
+    *,
+    hop_sec: float,
+    frames: int,
+    short_term_lufs: np.ndarray,
+    correlation: np.ndarray,
+    band_frames: np.ndarray,
+    frame_times: np.ndarray,
+    onset: np.ndarray,
+    onset_times: np.ndarray,
+    spectrogram_db: np.ndarray,
+) -> FeatureTracks:
+    """Put per-STFT-frame and per-onset-frame values onto the feature hop grid."""
+    band_names = list(SPECTRAL_BANDS.keys())
+    band_mag = _frames_to_hops(band_frames, frame_times, hop_sec, frames, "mean")
+    band_db = 20.0 * np.log10(np.maximum(band_mag, 1e-9))
+    return FeatureTracks(
+        hop_sec=hop_sec,
+        short_term_lufs=short_term_lufs,
+        band_energies_db=band_db[:, : len(band_names)],
+        band_names=band_names,
+        correlation=correlation,
+        sibilance_db=band_db[:, -1],
+        onset_strength=_frames_to_hops(onset, onset_times, hop_sec, frames, "max"),
+        spectrogram_db=spectrogram_db,
+        spectrogram_hop_sec=float(frame_times[1] - frame_times[0]) if len(frame_times) > 1 else hop_sec,
+    )
+
+
+def save_feature_tracks(tracks: FeatureTracks, directory: str) -> None:
+    """Store each track as its own float16 .npy so slices can be memory-mapped."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, Any] = {
+        "hop_sec": tracks.hop_sec,
+        "frames": tracks.num_frames,
+        "columns": {"band_energies_db": tracks.band_names},
+        "tracks": list(TRACK_NAMES),
+    }
+    for name in TRACK_NAMES:
+        np.save(os.path.join(directory, f"{name}.npy"), getattr(tracks, name).astype(np.float16))
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+
+
+def load_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def load_feature_tracks(directory: str, tracks: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Whole tracks as float32 arrays, for analyses that need every frame."""
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(directory)
+    names = list(tracks) if tracks else list(manifest["tracks"])
+    return {name: np.load(os.path.join(directory, f"{name}.npy")).astype(np.float32) for name in names}
+
+
+def read_feature_slice(
+    directory: str,
+    start_sec: float = 0.0,
+    end_sec: Optional[float] = None,
+    tracks: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Read only the frames in [start_sec, end_sec) for the requested tracks."""
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(directory)
+    names = list(tracks) if tracks else list(manifest["tracks"])
+    unknown = [name for name in names if name not in manifest["tracks"]]
+    if unknown:
+        raise ValueError(f"Unknown feature tracks: {', '.join(unknown)}")
+
+    hop_sec = float(manifest["hop_sec"])
+    frames = int(manifest["frames"])
+    first = min(max(0, int(np.floor(max(start_sec, 0.0) / hop_sec + 1e-9))), frames)
+    last = frames if end_sec is None else min(frames, max(first, int(np.ceil(end_sec / hop_sec - 1e-9))))
+
+    data: Dict[str, Any] = {}
+    for name in names:
+        values = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")[first:last]
+        data[name] = np.asarray(values, dtype=np.float64).round(3).tolist()
+    return {
+        "hop_sec": hop_sec,
+        "start_sec": first * hop_sec,
+        "end_sec": last * hop_sec,
+        "columns": {name: cols for name, cols in manifest["columns"].items() if name in names},
+        "tracks": data,
+    }
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .reference import THIRD_OCTAVE_CENTERS_HZ, ReferenceProfile
+
+DYNAMIC_FEATURES = ["integrated_lufs", "crest_factor_db", "loudness_range_lu", "loudness_std_lu", "stereo_width", "stereo_correlation"]
+FINGERPRINT_FILE = "fingerprint.npy"
+FINGERPRINT_SIZE = len(THIRD_OCTAVE_CENTERS_HZ) + len(DYNAMIC_FEATURES)
+
+# Fixed per-dimension scales bring dB, LU and ratio features onto comparable
+# units, so stored vectors never need re-normalizing as the library grows.
+_SCALES = np.concatenate(
+    [
+        np.full(len(THIRD_OCTAVE_CENTERS_HZ), 6.0),
+        np.array([3.0, 3.0, 3.0, 2.0, 0.2, 0.3]),
+    ]
+).astype(np.float32)
+
+
+@dataclass
+class Neighbor:
+    ref_id: str
+    distance: float
+
+
+def fingerprint_vector(
+    third_octave_db: np.ndarray,
+    metrics: Dict[str, float],
+    loudness_curve: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Tonal shape (band levels relative to their mean) plus loudness, crest and width stats."""
+    bands = np.asarray(third_octave_db, dtype=np.float64)
+    tonal = bands - np.mean(bands)
+    curve = np.asarray(loudness_curve if loudness_curve is not None else [], dtype=np.float64)
+    curve = curve[np.isfinite(curve) & (curve > -70.0)]
+    if len(curve) > 1:
+        loudness_range = float(np.percentile(curve, 95) - np.percentile(curve, 10))
+        loudness_std = float(np.std(curve))
+    else:
+        loudness_range = 0.0
+        loudness_std = 0.0
+    dynamic = np.array(
+        [
+            metrics.get("integrated_lufs", -23.0),
+            metrics.get("crest_factor_db", 0.0),
+            loudness_range,
+            loudness_std,
+            metrics.get("stereo_width", 0.0),
+            metrics.get("stereo_correlation", 1.0),
+        ],
+        dtype=np.float64,
+    )
+    dynamic = np.nan_to_num(dynamic, nan=0.0, posinf=0.0, neginf=-70.0)
+    return np.concatenate([tonal, dynamic]).astype(np.float32)
+
+
+def profile_fingerprint(profile: ReferenceProfile) -> np.ndarray:
+    return fingerprint_vector(profile.third_octave_db, profile.metrics, profile.loudness_curve)
+
+
+def save_fingerprint(vector: np.ndarray, directory: str) -> None:
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    np.save(os.path.join(directory, FINGERPRINT_FILE), np.asarray(vector, dtype=np.float32))
+
+
+def load_fingerprint(directory: str) -> Optional[np.ndarray]:
+    path = os.path.join(directory, FINGERPRINT_FILE)
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+class FingerprintIndex:
+    """Brute-force k-nearest-neighbour search over a dense (n, d) float32 matrix."""
+
+    def __init__(self) -> None:
+        self._ids: List[str] = []
+        self._matrix = np.zeros((0, FINGERPRINT_SIZE), dtype=np.float32)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def rebuild(self, ids: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        self._ids = list(ids)
+        if vectors:
+            self._matrix = np.stack([np.asarray(vec, dtype=np.float32) for vec in vectors]) / _SCALES
+        else:
+            self._matrix = np.zeros((0, FINGERPRINT_SIZE), dtype=np.float32)
+        self._sq_norms = np.einsum("ij,ij->i", self._matrix, self._matrix)
+
+    def add(self, ref_id: str, vector: np.ndarray) -> None:
+        row = (np.asarray(vector, dtype=np.float32) / _SCALES)[None, :]
+        self._ids.append(ref_id)
+        self._matrix = np.concatenate([self._matrix, row], axis=0)
+        self._sq_norms = np.concatenate([self._sq_norms, np.einsum("ij,ij->i", row, row)])
+
+    def remove(self, ref_id: str) -> None:
+        if ref_id not in self._ids:
+            return
+        keep = np.array([item != ref_id for item in self._ids])
+        self._ids = [item for item in self._ids if item != ref_id]
+        self._matrix = self._matrix[keep]
+        self._sq_norms = self._sq_norms[keep]
+
+    def search(self, vector: np.ndarray, k: int = 5, metric: str = "l2", exclude: Optional[str] = None) -> List[Neighbor]:
+        if not self._ids:
+            return []
+        query = np.asarray(vector, dtype=np.float32) / _SCALES
+        if metric == "cosine":
+            center = self._matrix.mean(axis=0)
+            centered = self._matrix - center
+            q = query - center
+            norms = np.linalg.norm(centered, axis=1) * (np.linalg.norm(q) + 1e-12) + 1e-12
+            distances = 1.0 - (centered @ q) / norms
+        elif metric == "l2":
+            sq = self._sq_norms - 2.0 * (self._matrix @ query) + float(query @ query)
+            distances = np.sqrt(np.maximum(sq, 0.0))
+        else:
+            raise ValueError(f"Unknown metric {metric}")
+        if exclude is not None and exclude in self._ids:
+            distances = distances.copy()
+            distances[self._ids.index(exclude)] = np.inf
+        k = max(1, min(k, len(self._ids)))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [Neighbor(ref_id=self._ids[i], distance=float(distances[i])) for i in nearest if np.isfinite(distances[i])]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .genre_profiles import ProfileMatrix, profile_matrix
+
+# Metric behind each of PROFILE_RANGES, as (metrics section, field).
+FIT_METRICS = (
+    ("loudness", "integrated_lufs"),
+    ("spectral", "spectral_tilt_db_per_oct"),
+    ("stereo", "width"),
+    ("loudness", "crest_factor_db"),
+)
+GENRE_FIT_TOP = 3
+
+
+def metric_vector(metrics: Dict[str, Any]) -> np.ndarray:
+    """FIT_METRICS from a report's metrics; sections that were not run give NaN."""
+    return np.array(
+        [
+            np.nan if value is None else float(value)
+            for value in ((metrics.get(section) or {}).get(name) for section, name in FIT_METRICS)
+        ],
+        dtype=np.float64,
+    )
+
+
+def range_scores(values: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """(tracks, profiles, metrics) scores; the report's `_score_range`, broadcast."""
+    values = values[:, None, :]
+    distance = np.maximum(np.maximum(lows[None] - values, values - highs[None]), 0.0)
+    return np.maximum(0.0, 100.0 - distance * 5.0)
+
+
+def fit_matrix(values: np.ndarray, matrix: Optional[ProfileMatrix] = None) -> np.ndarray:
+    """(tracks, profiles) mean score over the metrics each track has."""
+    matrix = matrix or profile_matrix()
+    scores = range_scores(np.atleast_2d(values), matrix.lows, matrix.highs)
+    counts = np.sum(~np.isnan(scores), axis=2)
+    totals = np.nansum(scores, axis=2)
+    return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def _candidates(
+    matrix: ProfileMatrix,
+    modes: Sequence[Optional[str]],
+    vocal_styles: Sequence[Optional[str]],
+) -> np.ndarray:
+    """(tracks, profiles) rows each track may be matched against: its own mode and vocal style."""
+    row_modes = np.array(matrix.modes, dtype=object)
+    row_styles = np.array(matrix.vocal_styles, dtype=object)
+    track_modes = np.array(list(modes), dtype=object)[:, None]
+    track_styles = np.array(list(vocal_styles), dtype=object)[:, None]
+    same_mode = (track_modes == None) | (row_modes[None] == track_modes)  # noqa: E711
+    # Vocal tracks with a style match that style's rows; everything else the plain mode rows.
+    styled = (track_modes == "vocal") & (track_styles != None)  # noqa: E711
+    same_style = np.where(styled, row_styles[None] == track_styles, row_styles[None] == None)  # noqa: E711
+    return same_mode & same_style
+
+
+def rank_genres(
+    metrics: Dict[str, Any],
+    mode: Optional[str] = None,
+    vocal_style: Optional[str] = None,
+    top: int = GENRE_FIT_TOP,
+) -> List[Dict[str, Any]]:
+    """Best-fitting genre profiles for one track, best first."""
+    matrix = profile_matrix()
+    fits = fit_matrix(metric_vector(metrics), matrix)[0]
+    allowed = _candidates(matrix, [mode], [vocal_style])[0] & ~np.isnan(fits)
+    order = np.flatnonzero(allowed)[np.argsort(-fits[allowed], kind="stable")][:top]
+    return [
+        {
+            "genre": matrix.genres[index],
+            "mode": matrix.modes[index],
+            "vocal_style": matrix.vocal_styles[index],
+            "fit": round(float(fits[index]), 1),
+        }
+        for index in order
+    ]
+
+
+def best_fits(
+    values: np.ndarray,
+    modes: Sequence[Optional[str]],
+    vocal_styles: Sequence[Optional[str]],
+    matrix: Optional[ProfileMatrix] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """Best-fitting profile for each of many tracks (rows of `values`) in one pass."""
+    matrix = matrix or profile_matrix()
+    fits = fit_matrix(values, matrix)
+    fits = np.where(_candidates(matrix, modes, vocal_styles), fits, np.nan)
+    usable = ~np.all(np.isnan(fits), axis=1)
+    best = np.argmax(np.where(np.isnan(fits), -np.inf, fits), axis=1)
+    return [
+        {
+            "genre": matrix.genres[index],
+            "mode": matrix.modes[index],
+            "vocal_style": matrix.vocal_styles[index],
+            "fit": round(float(fits[row, index]), 1),
+        }
+        if usable[row]
+        else None
+        for row, index in enumerate(best)
+    ]
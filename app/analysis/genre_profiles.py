@@ -1,13 +1,38 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 
 from ..config import settings
 
+# Profile range keys, in the column order of the compiled matrices.
+PROFILE_RANGES = ("lufs_target", "spectral_tilt", "stereo_width", "crest_factor")
+# Used where a profile leaves a range out.
+PROFILE_DEFAULTS: Dict[str, List[float]] = {
+    "lufs_target": [-16, -12],
+    "spectral_tilt": [-1.5, -0.5],
+    "stereo_width": [0.2, 0.5],
+    "crest_factor": [8, 14],
+}
+
+
+@dataclass
+class ProfileMatrix:
+    """Every genre x mode (x vocal style) profile as rows of target ranges."""
+
+    genres: List[str]
+    modes: List[str]
+    vocal_styles: List[Optional[str]]
+    lows: np.ndarray  # (profiles, len(PROFILE_RANGES))
+    highs: np.ndarray
+
 
 _cache: Dict[str, Any] = {}
+_matrices: Dict[Path, ProfileMatrix] = {}
 
 
 def load_profiles(path: str | None = None) -> Dict[str, Any]:
@@ -16,11 +41,16 @@ def load_profiles(path: str | None = None) -> Dict[str, Any]:
         return _cache[profile_path]
     data = json.loads(profile_path.read_text(encoding="utf-8"))
     _cache[profile_path] = data
+    _matrices[profile_path] = compile_profiles(data)
     return data
 
 
-def get_profile(genre: str, mode: str, vocal_style: str | None = None) -> Dict[str, Any]:
-    profiles = load_profiles()
+def profile_matrix(path: str | None = None) -> ProfileMatrix:
+    load_profiles(path)
+    return _matrices[Path(path or settings.genre_profiles_path)]
+
+
+def _resolve(profiles: Dict[str, Any], genre: str, mode: str, vocal_style: str | None) -> Dict[str, Any]:
     genre_key = genre if genre in profiles else "default"
     profile = profiles[genre_key]
     mode_profile = profile.get("modes", {}).get(mode, {})
@@ -30,3 +60,33 @@ def get_profile(genre: str, mode: str, vocal_style: str | None = None) -> Dict[s
         mode_profile = {**mode_profile, **vocal_profiles.get(vocal_style, {})}
 
     return mode_profile
+
+
+def get_profile(genre: str, mode: str, vocal_style: str | None = None) -> Dict[str, Any]:
+    return _resolve(load_profiles(), genre, mode, vocal_style)
+
+
+def compile_profiles(profiles: Dict[str, Any]) -> ProfileMatrix:
+    """One row per genre and mode, plus one per vocal style of the vocal mode ("default" excluded).
+
+    Every vocal style gets a row in every genre, resolved like `get_profile`, so
+    genres without style overrides still compete for styled vocal tracks.
+    """
+    vocal_styles = list(dict.fromkeys(style for profile in profiles.values() for style in profile.get("vocal_styles", {})))
+    genres: List[str] = []
+    modes: List[str] = []
+    styles: List[Optional[str]] = []
+    rows: List[List[List[float]]] = []
+    for genre, profile in profiles.items():
+        if genre == "default":
+            continue
+        for mode in profile.get("modes", {}):
+            variants = [None] + (vocal_styles if mode == "vocal" else [])
+            for style in variants:
+                resolved = _resolve(profiles, genre, mode, style)
+                genres.append(genre)
+                modes.append(mode)
+                styles.append(style)
+                rows.append([resolved.get(name, PROFILE_DEFAULTS[name]) for name in PROFILE_RANGES])
+    ranges = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(PROFILE_RANGES), 2)
+    return ProfileMatrix(genres, modes, styles, ranges[:, :, 0], ranges[:, :, 1])
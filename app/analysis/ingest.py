@@ -22,6 +22,12 @@ except Exception:  # pragma: no cover - optional dependency
     librosa = None
 
 
+# Extra audio decoded on each side of a region so the resampler has settled
+# before the first kept sample; it is trimmed off again after resampling. The
+# analyzers then see the region like a file of its own, filters starting cold.
+REGION_PADDING_SEC = 0.25
+
+
 @dataclass
 class AudioData:
     audio: np.ndarray
@@ -30,6 +36,7 @@ class AudioData:
     num_channels: int
     warnings: List[str]
     source_format: Optional[str]
+    start_sec: float = 0.0
 
 
 def _resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
@@ -42,8 +49,24 @@ def _resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
     return librosa.resample(audio.T, orig_sr=orig_sr, target_sr=target_sr).T
 
 
-def load_audio(path: str, target_sr: int = 48000) -> AudioData:
+def _trim_padding(audio: np.ndarray, lead: float, keep: float, sr: int) -> np.ndarray:
+    start = int(round(lead * sr))
+    stop = start + int(round(keep * sr))
+    return audio[start:stop]
+
+
+def load_audio(
+    path: str,
+    target_sr: int = 48000,
+    start_sec: Optional[float] = None,
+    end_sec: Optional[float] = None,
+) -> AudioData:
+    """Decode a file, or only [start_sec, end_sec) of it, resampled to target_sr."""
     warnings: List[str] = []
+    region = start_sec is not None or end_sec is not None
+    start_sec = max(0.0, start_sec or 0.0)
+    if end_sec is not None and end_sec <= start_sec:
+        raise ValueError("end_sec must be greater than start_sec")
     ext = os.path.splitext(path)[1].lower()
     if ext == ".mp3":
         warnings.append("MP3-opplasting oppdaget; analysen kan være mindre nøyaktig.")
@@ -51,22 +74,42 @@ def load_audio(path: str, target_sr: int = 48000) -> AudioData:
     audio = None
     sr = None
     source_format = None
+    lead_sec = 0.0
+    keep_sec: Optional[float] = None
 
     if sf is not None:
         try:
             info = sf.info(path)
             source_format = info.format
-            audio, sr = sf.read(path, always_2d=True)
+            if region:
+                sr = info.samplerate
+                first = min(int(start_sec * sr), info.frames)
+                last = info.frames if end_sec is None else min(int(end_sec * sr), info.frames)
+                if first >= last:
+                    raise ValueError("Requested region is outside the audio file")
+                padding = int(REGION_PADDING_SEC * sr)
+                read_start = max(0, first - padding)
+                read_stop = min(info.frames, last + padding)
+                audio, sr = sf.read(path, start=read_start, stop=read_stop, always_2d=True)
+                lead_sec = (first - read_start) / float(sr)
+                keep_sec = (last - first) / float(sr)
+            else:
+                audio, sr = sf.read(path, always_2d=True)
+        except ValueError:
+            raise
         except Exception:
             audio = None
 
     if audio is None:
         if librosa is None:
             raise RuntimeError("Audio loader not available. Install soundfile or librosa.")
-        audio, sr = librosa.load(path, sr=None, mono=False)
+        duration = None if end_sec is None else end_sec - start_sec
+        audio, sr = librosa.load(path, sr=None, mono=False, offset=start_sec, duration=duration)
         if audio.ndim == 1:
             audio = audio[None, :]
         audio = audio.T
+        if region and audio.shape[0] == 0:
+            raise ValueError("Requested region is outside the audio file")
 
     if audio.ndim == 1:
         audio = audio[:, None]
@@ -75,6 +118,8 @@ def load_audio(path: str, target_sr: int = 48000) -> AudioData:
         raise RuntimeError("Could not determine sample rate")
 
     audio = _resample(audio, sr, target_sr)
+    if keep_sec is not None:
+        audio = _trim_padding(audio, lead_sec, keep_sec, target_sr)
     audio = np.ascontiguousarray(audio, dtype=np.float32)
     duration_sec = audio.shape[0] / float(target_sr)
     return AudioData(
@@ -84,4 +129,5 @@ def load_audio(path: str, target_sr: int = 48000) -> AudioData:
         num_channels=audio.shape[1],
         warnings=warnings,
         source_format=source_format,
+        start_sec=start_sec,
     )
@@ -30,9 +30,11 @@ def analyze_low_end(audio: np.ndarray, sr: int) -> LowEndReport:
 
     freqs, _, spec_mid = stft(mid, fs=sr, nperseg=4096, noverlap=2048)
     _, _, spec_side = stft(side, fs=sr, nperseg=4096, noverlap=2048)
-    mag_mid = np.mean(np.abs(spec_mid), axis=1)
-    mag_side = np.mean(np.abs(spec_side), axis=1)
+    return low_end_from_averages(freqs, np.mean(np.abs(spec_mid), axis=1), np.mean(np.abs(spec_side), axis=1))
 
+
+def low_end_from_averages(freqs: np.ndarray, mag_mid: np.ndarray, mag_side: np.ndarray) -> LowEndReport:
+    """Low-end report from frame-averaged mid and side STFT magnitudes."""
     idx = (freqs >= 20) & (freqs < 120)
     mid_energy = float(np.mean(mag_mid[idx])) if np.any(idx) else 0.0
     side_energy = float(np.mean(mag_side[idx])) if np.any(idx) else 0.0
@@ -23,7 +23,10 @@ def analyze_masking(audio: np.ndarray, sr: int) -> List[MaskingConflict]:
         raise RuntimeError("scipy is required for masking analysis")
     mono = np.mean(audio, axis=1) if audio.ndim > 1 else audio
     freqs, _, spec = stft(mono, fs=sr, nperseg=4096, noverlap=2048)
-    mag = np.mean(np.abs(spec), axis=1) + 1e-9
+    return masking_from_average(freqs, np.mean(np.abs(spec), axis=1) + 1e-9)
+
+
+def masking_from_average(freqs: np.ndarray, mag: np.ndarray) -> List[MaskingConflict]:
     total = float(np.mean(mag))
 
     bands = [
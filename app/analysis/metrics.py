@@ -17,6 +17,17 @@ except Exception:  # pragma: no cover - optional dependency
     stft = None
 
 
+SPECTRAL_BANDS = {
+    "sub": (20, 60),
+    "low": (60, 150),
+    "low_mid": (150, 400),
+    "mid": (400, 2000),
+    "high_mid": (2000, 6000),
+    "high": (6000, 16000),
+    "air": (16000, 20000),
+}
+
+
 @dataclass
 class LoudnessMetrics:
     integrated_lufs: float
@@ -72,19 +83,13 @@ def _spectral_features(mono: np.ndarray, sr: int) -> SpectralMetrics:
         raise RuntimeError("scipy is required for spectral metrics")
     freqs, _, spec = stft(mono, fs=sr, nperseg=4096, noverlap=2048)
     mag = np.abs(spec) + 1e-9
-    avg_mag = np.mean(mag, axis=1)
-
-    bands = {
-        "sub": (20, 60),
-        "low": (60, 150),
-        "low_mid": (150, 400),
-        "mid": (400, 2000),
-        "high_mid": (2000, 6000),
-        "high": (6000, 16000),
-        "air": (16000, 20000),
-    }
+    return spectral_from_average(freqs, np.mean(mag, axis=1))
+
+
+def spectral_from_average(freqs: np.ndarray, avg_mag: np.ndarray) -> SpectralMetrics:
+    """Spectral metrics from the frame-averaged STFT magnitude (|X| + 1e-9)."""
     band_energies_db: Dict[str, float] = {}
-    for name, (low, high) in bands.items():
+    for name, (low, high) in SPECTRAL_BANDS.items():
         idx = (freqs >= low) & (freqs < high)
         energy = float(np.mean(avg_mag[idx])) if np.any(idx) else 0.0
         band_energies_db[name] = _db(energy)
@@ -115,13 +120,77 @@ def _spectral_features(mono: np.ndarray, sr: int) -> SpectralMetrics:
     )
 
 
-def _true_peak_db(audio: np.ndarray, oversample: int = 4) -> float:
+def k_weighting_sos(sr: int) -> np.ndarray:
+    """BS.1770 K-weighting (high shelf + high pass) as second-order sections.
+
+    Uses the same RBJ biquad designs as pyloudnorm so per-frame and streaming
+    loudness match the integrated value from `compute_loudness`.
+    """
+    sections = []
+    for gain_db, q, fc, kind in ((4.0, 1 / np.sqrt(2), 1500.0, "high_shelf"), (0.0, 0.5, 38.0, "high_pass")):
+        a_gain = 10 ** (gain_db / 40.0)
+        w0 = 2.0 * np.pi * (fc / sr)
+        alpha = np.sin(w0) / (2.0 * q)
+        cos_w0 = np.cos(w0)
+        if kind == "high_shelf":
+            sqrt_a = 2 * np.sqrt(a_gain) * alpha
+            b = [
+                a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 + sqrt_a),
+                -2 * a_gain * ((a_gain - 1) + (a_gain + 1) * cos_w0),
+                a_gain * ((a_gain + 1) + (a_gain - 1) * cos_w0 - sqrt_a),
+            ]
+            a = [
+                (a_gain + 1) - (a_gain - 1) * cos_w0 + sqrt_a,
+                2 * ((a_gain - 1) - (a_gain + 1) * cos_w0),
+                (a_gain + 1) - (a_gain - 1) * cos_w0 - sqrt_a,
+            ]
+        else:
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        sections.append([*(np.array(b) / a[0]), *(np.array(a) / a[0])])
+    return np.array(sections)
+
+
+def true_peak_amplitude(audio: np.ndarray, oversample: int = 4) -> float:
+    """Peak of the 4x oversampled signal (sample peak without scipy)."""
     if resample_poly is not None:
         up = resample_poly(audio, oversample, 1, axis=0)
-        peak = float(np.max(np.abs(up)))
-    else:
-        peak = float(np.max(np.abs(audio)))
-    return _db(peak)
+        return float(np.max(np.abs(up)))
+    return float(np.max(np.abs(audio)))
+
+
+def _true_peak_db(audio: np.ndarray, oversample: int = 4) -> float:
+    return _db(true_peak_amplitude(audio, oversample))
+
+
+def peak_to_db(value: float) -> float:
+    return _db(value)
+
+
+def gating_block_powers(hop_energy: np.ndarray, sr: int, duration_sec: float) -> np.ndarray:
+    """400 ms gating-block mean squares from K-weighted energy summed per 100 ms hop.
+
+    Blocks are laid out exactly like pyloudnorm's; extra axes (e.g. channels)
+    after the first are carried through.
+    """
+    block_sec, step = 0.4, 0.25
+    count = int(np.round((duration_sec - block_sec) / (block_sec * step))) + 1
+    padded = np.zeros((count + 3,) + hop_energy.shape[1:])
+    usable = min(len(hop_energy), count + 3)
+    padded[:usable] = hop_energy[:usable]
+    cumulative = np.concatenate([np.zeros((1,) + hop_energy.shape[1:]), np.cumsum(padded, axis=0)])
+    return (cumulative[4 : count + 4] - cumulative[:count]) / (block_sec * sr)
+
+
+def gated_loudness(block_powers: np.ndarray) -> float:
+    """BS.1770 gated loudness of one channel's 400 ms block mean squares (as pyloudnorm)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        block_lufs = -0.691 + 10.0 * np.log10(block_powers)
+        above_abs = block_lufs >= -70.0
+        gamma_r = -0.691 + 10.0 * np.log10(np.mean(block_powers[above_abs])) - 10.0 if np.any(above_abs) else np.nan
+        gated = (block_lufs > gamma_r) & (block_lufs > -70.0)
+        mean_power = float(np.mean(block_powers[gated])) if np.any(gated) else 0.0
+        return float(-0.691 + 10.0 * np.log10(mean_power))
 
 
 def compute_loudness(audio: np.ndarray, sr: int) -> LoudnessMetrics:
@@ -139,16 +208,30 @@ def compute_loudness(audio: np.ndarray, sr: int) -> LoudnessMetrics:
         if len(chunk) < window:
             continue
         short_terms.append(float(meter.integrated_loudness(chunk)))
-    short_term = float(np.percentile(short_terms, 90)) if short_terms else integrated
 
-    sample_peak = float(np.max(np.abs(audio)))
-    true_peak = _true_peak_db(audio)
-    sample_peak_db = _db(sample_peak)
+    return loudness_from_parts(
+        integrated=integrated,
+        short_terms=short_terms,
+        sample_peak=float(np.max(np.abs(audio))),
+        true_peak_db=_true_peak_db(audio),
+        rms=_rms(mono),
+        rms_windows=_windowed_rms(mono, int(0.5 * sr), int(0.25 * sr)),
+    )
+
 
-    rms = _rms(mono)
+def loudness_from_parts(
+    *,
+    integrated: float,
+    short_terms: List[float],
+    sample_peak: float,
+    true_peak_db: float,
+    rms: float,
+    rms_windows: List[float],
+) -> LoudnessMetrics:
+    short_term = float(np.percentile(short_terms, 90)) if short_terms else integrated
+    sample_peak_db = _db(sample_peak)
     crest = _db(sample_peak / (rms + 1e-9))
 
-    rms_windows = _windowed_rms(mono, int(0.5 * sr), int(0.25 * sr))
     rms_db = [_db(val) for val in rms_windows]
     dynamic_range = float(np.percentile(rms_db, 95) - np.percentile(rms_db, 10))
     noise_floor = float(np.percentile(rms_db, 10))
@@ -156,7 +239,7 @@ def compute_loudness(audio: np.ndarray, sr: int) -> LoudnessMetrics:
     return LoudnessMetrics(
         integrated_lufs=integrated,
         short_term_lufs=short_term,
-        true_peak_db=true_peak,
+        true_peak_db=true_peak_db,
         sample_peak_db=sample_peak_db,
         crest_factor_db=crest,
         dynamic_range_db=dynamic_range,
@@ -178,7 +261,21 @@ def compute_stereo(audio: np.ndarray) -> StereoMetrics:
     side = 0.5 * (left - right)
     mid_energy = float(np.mean(mid ** 2) + 1e-9)
     side_energy = float(np.mean(side ** 2) + 1e-9)
-    width = float(side_energy / mid_energy)
     corr = float(np.corrcoef(left, right)[0, 1]) if len(left) > 1 else 1.0
+    return _stereo_metrics(mid_energy, side_energy, corr)
+
+
+def stereo_from_sums(count: int, sum_l: float, sum_r: float, sum_ll: float, sum_rr: float, sum_lr: float) -> StereoMetrics:
+    """Stereo metrics from running sums of L, R, L^2, R^2 and L*R."""
+    mid_energy = (sum_ll + sum_rr + 2.0 * sum_lr) / (4.0 * count) + 1e-9
+    side_energy = (sum_ll + sum_rr - 2.0 * sum_lr) / (4.0 * count) + 1e-9
+    cov = count * sum_lr - sum_l * sum_r
+    var = (count * sum_ll - sum_l ** 2) * (count * sum_rr - sum_r ** 2)
+    corr = float(cov / np.sqrt(var)) if count > 1 and var > 0 else 1.0
+    return _stereo_metrics(mid_energy, side_energy, corr)
+
+
+def _stereo_metrics(mid_energy: float, side_energy: float, corr: float) -> StereoMetrics:
+    width = float(side_energy / mid_energy)
     mono_compat = float(1.0 - max(0.0, -corr))
     return StereoMetrics(width=width, correlation=corr, mono_compatibility=mono_compat)
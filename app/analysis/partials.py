@@ -0,0 +1,698 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from functools import partial as bind
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .artifacts import ArtifactReport, artifacts_from_stats, detect_artifacts
+from .bpm_key import KeyEstimate, TempoEstimate, estimate_bpm, estimate_key, key_from_chroma, tempo_from_onset
+from .features import (
+    FEATURE_HOP_SEC,
+    FeatureTracks,
+    assemble_feature_tracks,
+    band_frame_means,
+    compute_feature_tracks,
+    correlation_from_hop_sums,
+    log_spectrogram,
+    short_term_from_energy,
+    short_term_loudness_track,
+)
+from .lowend import LowEndReport, analyze_low_end, low_end_from_averages
+from .masking import MaskingConflict, analyze_masking, masking_from_average
+from .metrics import (
+    LoudnessMetrics,
+    SpectralMetrics,
+    StereoMetrics,
+    compute_loudness,
+    compute_spectral,
+    compute_stereo,
+    gated_loudness,
+    gating_block_powers,
+    k_weighting_sos,
+    loudness_from_parts,
+    peak_to_db,
+    spectral_from_average,
+    stereo_from_sums,
+)
+from .qa import QaReport, analyze_qa, qa_from_stats
+from .reference import third_octave_from_psd, third_octave_spectrum
+from .reverb import ReverbReport, analyze_reverb, reverb_from_rms
+from .shared import SharedArray, call_with_shared, shared_memory_fits
+from .transient import TransientReport, analyze_transients, transients_from_onset
+from .vocal import VocalFindings, analyze_vocal, vocal_from_average
+
+try:
+    from scipy.signal import get_window, resample_poly, sosfilt, welch
+except Exception:  # pragma: no cover - optional dependency
+    get_window = None
+
+try:
+    import librosa
+except Exception:  # pragma: no cover - optional dependency
+    librosa = None
+
+logger = logging.getLogger(__name__)
+
+PARTIALS_VERSION = 1
+PARTIALS_SR = 48000
+# 12.8 s: a whole number of every hop used below (4800 loudness blocks, 2048
+# and 1024 STFT hops, 512 onset frames, 1200 RMS windows, 8192 Welch hops).
+SEGMENT_SAMPLES = 614400
+# Decoded audio on both sides of a segment that its partials may depend on:
+# K-weighting and resampling filters settle, and STFT/CQT frames near the
+# edge see the same samples as in a whole-file pass.
+CONTEXT_SAMPLES = 49152
+MIN_SAMPLES = 32768
+# Optional partial fields by the pass that produces them; the statistics are always there.
+PARTIAL_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "spectrum": ("mag_sum", "stft_frames"),
+    "side_spectrum": ("side_mag_sum",),
+    "bands": ("band_frames", "spectrogram_db"),
+    "flux": ("flux", "sign_changes"),
+    "onset": ("onset",),
+    "rms": ("rms",),
+    "chroma": ("chroma_sum", "chroma_frames"),
+    "welch": ("welch_sum", "welch_frames"),
+}
+ALL_GROUPS = frozenset(PARTIAL_GROUPS)
+# The groups each analyzer reads; analyzers not listed only need the statistics.
+ANALYZER_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "spectral": ("spectrum",),
+    "vocal": ("spectrum",),
+    "masking": ("spectrum",),
+    "low_end": ("spectrum", "side_spectrum"),
+    "features": ("bands", "onset"),
+    "fingerprint": ("welch",),
+    "reverb": ("rms",),
+    "transient": ("onset",),
+    "artifacts": ("flux",),
+    "bpm_key": ("onset", "chroma"),
+}
+
+LOUDNESS_HOP = 4800
+RMS_HOP = 1200
+STFT_SIZE = 4096
+STFT_HOP = 2048
+FLUX_SIZE = 2048
+FLUX_HOP = 1024
+ONSET_HOP = 512
+WELCH_SIZE = 16384
+WELCH_HOP = 8192
+TRUE_PEAK_CONTEXT = 64
+
+Partial = Dict[str, np.ndarray]
+
+
+def partial_groups(analyzers: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """The partial groups a set of analyzers reads; every group when none are given."""
+    if analyzers is None:
+        return ALL_GROUPS
+    return frozenset(group for name in analyzers for group in ANALYZER_GROUPS.get(name, ()))
+
+
+def partials_supported(sr: int, num_samples: int) -> bool:
+    return sr == PARTIALS_SR and num_samples >= MIN_SAMPLES and get_window is not None and librosa is not None
+
+
+def _block_sums(values: np.ndarray, hop: int) -> np.ndarray:
+    count = int(np.ceil(len(values) / hop))
+    padded = np.zeros(count * hop, dtype=np.float64)
+    padded[: len(values)] = values
+    return padded.reshape(count, hop).sum(axis=1)
+
+
+def _frame_magnitudes(signal: np.ndarray, offset: int, centers: np.ndarray, size: int) -> np.ndarray:
+    """|STFT| (scipy `stft` scaling) of frames centred on global sample indices.
+
+    `signal` starts at global sample `offset`; anything outside it is treated as
+    the zero padding a whole-file `stft(..., boundary="zeros")` would add.
+    """
+    window = get_window("hann", size)
+    half = size // 2
+    extended = np.concatenate([np.zeros(half), signal.astype(np.float64), np.zeros(size)])
+    frames = np.lib.stride_tricks.sliding_window_view(extended, size)[centers - offset]
+    return np.abs(np.fft.rfft(frames * window, axis=1)) / window.sum()
+
+
+def _owned_centers(start: int, end: int, length: int, hop: int) -> np.ndarray:
+    """Frame centres a segment owns; the last segment also owns the trailing padded frames."""
+    stop = end if end < length else int(np.ceil(length / hop)) * hop + 1
+    return np.arange(start, stop, hop)
+
+
+def _statistics(own: np.ndarray, weighted: np.ndarray, true_peak: float) -> Partial:
+    """Sample sums and peaks behind loudness, stereo and QA for (samples, channels) audio."""
+    mono = np.mean(own, axis=1).astype(np.float64)
+    left = own[:, 0].astype(np.float64)
+    right = own[:, 1].astype(np.float64) if own.shape[1] > 1 else left
+    return {
+        "samples": np.array(own.shape[0]),
+        "kw_energy": _block_sums(weighted ** 2, LOUDNESS_HOP),
+        "mono_energy": _block_sums(mono ** 2, RMS_HOP),
+        "mono_sum": np.array(mono.sum()),
+        "stereo_sums": np.stack(
+            [_block_sums(series, LOUDNESS_HOP) for series in (left, right, left * left, right * right, left * right)]
+        ),
+        "sample_peak": np.array(np.max(np.abs(own))),
+        "true_peak": np.array(true_peak, dtype=np.float64),
+    }
+
+
+def _segment_true_peak(audio: np.ndarray, start: int, end: int) -> float:
+    """4x oversampled peak of audio[start:end], with enough context on both sides for the filter to settle."""
+    lo = max(0, start - TRUE_PEAK_CONTEXT)
+    upsampled = resample_poly(audio[lo : min(end + TRUE_PEAK_CONTEXT, audio.shape[0])], 4, 1, axis=0)
+    return float(np.max(np.abs(upsampled[(start - lo) * 4 : (end - lo) * 4])))
+
+
+def compute_segment_statistics(audio: np.ndarray, sr: int, start: int, end: int) -> Partial:
+    """Only the statistics partial of audio[start:end], equal to that part of `compute_segment`.
+
+    Enough for analyzers that read no partial group (loudness, stereo, QA);
+    skips every STFT, onset and chroma pass.
+    """
+    pre = min(CONTEXT_SAMPLES, start)
+    # K-weighting is causal, so only the context before the segment matters.
+    chunk = audio[start - pre : end]
+    if chunk.ndim == 1:
+        chunk = chunk[:, None]
+    weighted = sosfilt(k_weighting_sos(sr), np.mean(chunk, axis=1))[pre:]
+    return _statistics(chunk[pre:], weighted, _segment_true_peak(audio, start, end))
+
+
+def compute_statistics(audio: np.ndarray, sr: int, executor: Optional[Executor] = None) -> Partial:
+    """The statistics partial of the whole signal, merged from per-segment passes.
+
+    Segments bound the memory of the oversampled true-peak pass and run on
+    `executor` like `segment_partials`; nothing is cached.
+    """
+    if audio.ndim == 1:
+        audio = audio[:, None]
+    return merge_partials(segment_partials(audio, sr, executor=executor, compute=compute_segment_statistics))
+
+
+def compute_segment(
+    audio: np.ndarray, sr: int, start: int, end: int, groups: FrozenSet[str] = ALL_GROUPS
+) -> Partial:
+    """Mergeable partial results for audio[start:end] (see `SegmentedSignal`).
+
+    Only the `groups` passes run; chroma alone is about half the cost of a
+    segment, so analyzer selections that do not read it skip it.
+    """
+    length = audio.shape[0]
+    final = end == length
+    pre = min(CONTEXT_SAMPLES, start)
+    offset = start - pre
+    chunk = audio[offset : min(end + CONTEXT_SAMPLES, length)]
+    if chunk.ndim == 1:
+        chunk = chunk[:, None]
+    mono = np.mean(chunk, axis=1)
+    own = slice(pre, pre + end - start)
+
+    weighted = sosfilt(k_weighting_sos(sr), mono)[own]
+    true_peak = _segment_true_peak(audio, start, end)
+    partial = _statistics(chunk[own], weighted, true_peak)
+
+    freqs = np.fft.rfftfreq(STFT_SIZE, 1.0 / sr)
+    centers = _owned_centers(start, end, length, STFT_HOP)
+    if {"spectrum", "bands"} & groups:
+        mag = _frame_magnitudes(mono, offset, centers, STFT_SIZE)
+    if "spectrum" in groups:
+        partial["mag_sum"] = mag.sum(axis=0)
+        partial["stft_frames"] = np.array(len(centers))
+    if "side_spectrum" in groups:
+        side_mag = _frame_magnitudes(0.5 * (chunk[:, 0] - chunk[:, -1]), offset, centers, STFT_SIZE)
+        partial["side_mag_sum"] = side_mag.sum(axis=0)
+    if "bands" in groups:
+        padded_mag = mag.T + 1e-9
+        partial["band_frames"] = band_frame_means(padded_mag, freqs)
+        partial["spectrogram_db"] = log_spectrogram(padded_mag, freqs)
+
+    if "flux" in groups:
+        flux_centers = _owned_centers(start, end, length, FLUX_HOP)
+        if start > 0:
+            flux_centers = np.concatenate([[start - FLUX_HOP], flux_centers])
+        flux_mag = _frame_magnitudes(mono, offset, flux_centers, FLUX_SIZE)
+        partial["flux"] = np.mean(np.diff(flux_mag, axis=0) ** 2, axis=1)
+        signs = np.sign(mono[pre - 1 if start > 0 else pre : pre + end - start])
+        partial["sign_changes"] = np.array(np.sum(np.abs(np.diff(signs))))
+
+    first_frame = pre // ONSET_HOP
+    last_frame = None if final else (end - offset) // ONSET_HOP
+    if "onset" in groups:
+        onset = librosa.onset.onset_strength(y=mono, sr=sr)[first_frame:last_frame]
+        partial["onset"] = onset.astype(np.float64)
+    if "rms" in groups:
+        rms = librosa.feature.rms(y=mono, frame_length=2048, hop_length=ONSET_HOP)[0][first_frame:last_frame]
+        partial["rms"] = rms.astype(np.float64)
+    if "chroma" in groups:
+        chroma = librosa.feature.chroma_cqt(y=mono, sr=sr)[:, first_frame:last_frame]
+        partial["chroma_sum"] = chroma.sum(axis=1).astype(np.float64)
+        partial["chroma_frames"] = np.array(chroma.shape[1])
+
+    if "welch" in groups:
+        welch_input = mono[pre : pre + min(end + WELCH_HOP, length) - start]
+        welch_frames = (len(welch_input) - WELCH_SIZE) // WELCH_HOP + 1 if len(welch_input) >= WELCH_SIZE else 0
+        welch_sum = np.zeros(WELCH_SIZE // 2 + 1)
+        if welch_frames:
+            welch_sum = welch(welch_input, fs=sr, nperseg=WELCH_SIZE)[1].astype(np.float64) * welch_frames
+        partial["welch_sum"] = welch_sum
+        partial["welch_frames"] = np.array(welch_frames)
+    return partial
+
+
+def _context_bounds(length: int, start: int, end: int) -> Tuple[int, int]:
+    return max(0, start - CONTEXT_SAMPLES), min(end + CONTEXT_SAMPLES, length)
+
+
+def segment_window(audio: np.ndarray, start: int, end: int) -> Tuple[np.ndarray, int, int]:
+    """The audio a segment's partials depend on, with the segment's bounds inside it.
+
+    Context and segment starts are multiples of every hop, so
+    `compute_segment(*segment_window(...))` gives bit-identical partials to
+    `compute_segment(audio, sr, start, end)` while only shipping the window.
+    """
+    lo, hi = _context_bounds(audio.shape[0], start, end)
+    return audio[lo:hi], start - lo, end - lo
+
+
+def segment_key(audio: np.ndarray, sr: int, start: int, end: int, groups: FrozenSet[str] = ALL_GROUPS) -> str:
+    """Content hash of a segment together with the context and partial groups its partials depend on.
+
+    The groups are part of the key, so a partial cached without a field is
+    never reused by a job that needs it.
+    """
+    length = audio.shape[0]
+    lo, hi = _context_bounds(length, start, end)
+    digest = hashlib.blake2b(digest_size=20)
+    header = (
+        PARTIALS_VERSION,
+        sr,
+        audio.shape[1] if audio.ndim > 1 else 1,
+        start - lo,
+        end - start,
+        hi - end,
+        end == length,
+        tuple(sorted(groups)),
+    )
+    digest.update(repr(header).encode("ascii"))
+    digest.update(np.ascontiguousarray(audio[lo:hi], dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+def _load_cached(path: str) -> Optional[Partial]:
+    try:
+        with np.load(path) as data:
+            partial = {name: data[name] for name in data.files}
+        os.utime(path)
+        return partial
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Discarding unreadable segment cache %s", path)
+        return None
+
+
+def _store_cached(path: str, partial: Partial) -> None:
+    Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **partial)
+    os.replace(tmp_path, path)
+
+
+def segment_partials(
+    audio: np.ndarray,
+    sr: int,
+    cache_dir: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    compute: Optional[Callable[[np.ndarray, int, int, int], Partial]] = None,
+    groups: FrozenSet[str] = ALL_GROUPS,
+) -> List[Partial]:
+    """Partials for every segment, reusing cached segments whose content is unchanged.
+
+    With an `executor`, missing segments are computed there (the map step);
+    `merge_partials` is the reduce step. Process pools get the audio through
+    shared memory, copied once on the first missing segment, and every task
+    attaches to it; only the segment bounds are pickled. When the audio does
+    not fit in /dev/shm, each task gets its context window pickled instead.
+    `compute` replaces `compute_segment` for partials that are never cached;
+    otherwise only the `groups` passes of `compute_segment` run.
+    """
+    if compute is not None and cache_dir:
+        raise ValueError("Only compute_segment partials are cached")
+    compute = compute or bind(compute_segment, groups=groups)
+    length = audio.shape[0]
+    partials: List[Optional[Partial]] = []
+    pending: Dict[int, Tuple[Future, Optional[str]]] = {}
+    shared: Optional[SharedArray] = None
+    windowed = False
+    reused = 0
+    try:
+        for start in range(0, length, SEGMENT_SAMPLES):
+            end = min(start + SEGMENT_SAMPLES, length)
+            path = os.path.join(cache_dir, f"{segment_key(audio, sr, start, end, groups)}.npz") if cache_dir else None
+            partial = _load_cached(path) if path else None
+            if partial is None and isinstance(executor, ProcessPoolExecutor) and shared is None and not windowed:
+                windowed = not shared_memory_fits(audio.nbytes)
+                if windowed:
+                    logger.warning("Audio does not fit in shared memory; pickling segment windows instead")
+                else:
+                    shared = SharedArray(audio)
+            if partial is None and windowed:
+                window, first, last = segment_window(audio, start, end)
+                pending[len(partials)] = (executor.submit(compute, window, sr, first, last), path)
+            elif partial is None and shared is not None:
+                shared.acquire()
+                future = executor.submit(call_with_shared, shared.handle, compute, sr, start, end)
+                future.add_done_callback(lambda _, shared=shared: shared.release())
+                pending[len(partials)] = (future, path)
+            elif partial is None and executor is not None:
+                pending[len(partials)] = (executor.submit(compute, audio, sr, start, end), path)
+            elif partial is None:
+                partial = compute(audio, sr, start, end)
+                if path:
+                    _store_cached(path, partial)
+            else:
+                reused += 1
+            partials.append(partial)
+    finally:
+        # Tasks still queued or running hold their own references.
+        if shared is not None:
+            shared.release()
+    for index, (future, path) in pending.items():
+        partials[index] = future.result()
+        if path:
+            _store_cached(path, partials[index])
+    if cache_dir:
+        logger.info("Segment partials: %d of %d reused", reused, len(partials))
+    return partials
+
+
+_segment_pool: Optional[ProcessPoolExecutor] = None
+_segment_pool_lock = threading.Lock()
+
+
+def segment_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for the segments of long inputs, shared by all jobs and started on first use.
+
+    Workers are spawned rather than forked; forking the server while job
+    threads and BLAS thread pools are running can deadlock the children.
+    """
+    global _segment_pool
+    with _segment_pool_lock:
+        if _segment_pool is None:
+            _segment_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _segment_pool
+
+
+def shutdown_segment_pool() -> None:
+    global _segment_pool
+    with _segment_pool_lock:
+        if _segment_pool is not None:
+            _segment_pool.shutdown(cancel_futures=True)
+            _segment_pool = None
+
+
+def merge_partials(partials: List[Partial]) -> Partial:
+    """Concatenate per-frame arrays and add up sums across consecutive segments.
+
+    Statistics-only partials carry a subset of the fields; only those are merged.
+    """
+    present = partials[0].keys()
+    merged: Partial = {}
+    for name in ("kw_energy", "mono_energy", "band_frames", "flux", "onset", "rms"):
+        if name in present:
+            merged[name] = np.concatenate([part[name] for part in partials])
+    for name in ("stereo_sums", "spectrogram_db"):
+        if name in present:
+            merged[name] = np.concatenate([part[name] for part in partials], axis=1)
+    for name in (
+        "samples",
+        "mono_sum",
+        "mag_sum",
+        "side_mag_sum",
+        "stft_frames",
+        "sign_changes",
+        "chroma_sum",
+        "chroma_frames",
+        "welch_sum",
+        "welch_frames",
+    ):
+        if name in present:
+            merged[name] = np.sum([part[name] for part in partials], axis=0)
+    for name in ("sample_peak", "true_peak"):
+        merged[name] = np.max([part[name] for part in partials])
+    return merged
+
+
+def prune_cache(cache_dir: str, max_bytes: int) -> int:
+    """Drop least-recently-used segment files until the cache fits in max_bytes."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+class DirectSignal:
+    """Runs every analyzer on the whole decoded signal."""
+
+    def __init__(self, audio: np.ndarray, sr: int) -> None:
+        self.audio = audio
+        self.sr = sr
+
+    def loudness(self) -> LoudnessMetrics:
+        return compute_loudness(self.audio, self.sr)
+
+    def spectral(self) -> SpectralMetrics:
+        return compute_spectral(self.audio, self.sr)
+
+    def stereo(self) -> StereoMetrics:
+        return compute_stereo(self.audio)
+
+    def feature_tracks(self) -> FeatureTracks:
+        return compute_feature_tracks(self.audio, self.sr)
+
+    def short_term_loudness(self) -> np.ndarray:
+        return short_term_loudness_track(self.audio, self.sr)
+
+    def third_octave(self) -> np.ndarray:
+        return third_octave_spectrum(self.audio, self.sr)
+
+    def vocal(self) -> VocalFindings:
+        return analyze_vocal(self.audio, self.sr)
+
+    def reverb(self) -> ReverbReport:
+        return analyze_reverb(self.audio, self.sr)
+
+    def masking(self) -> List[MaskingConflict]:
+        return analyze_masking(self.audio, self.sr)
+
+    def low_end(self) -> LowEndReport:
+        return analyze_low_end(self.audio, self.sr)
+
+    def transients(self, crest_factor_db: float) -> TransientReport:
+        return analyze_transients(self.audio, self.sr, crest_factor_db)
+
+    def artifacts(self, extension: str) -> ArtifactReport:
+        return detect_artifacts(self.audio, self.sr, extension)
+
+    def qa(self) -> QaReport:
+        return analyze_qa(self.audio, self.sr)
+
+    def tempo(self) -> TempoEstimate:
+        return estimate_bpm(self.audio, self.sr)
+
+    def key(self) -> KeyEstimate:
+        return estimate_key(self.audio, self.sr)
+
+
+class SegmentedSignal:
+    """The same analyzers, fed from merged per-segment partials instead of the signal.
+
+    Whole-file statistics are rebuilt from sums, so only segments whose content
+    changed since an earlier upload have to be analyzed again. Values agree with
+    `DirectSignal` to float precision, except that per-chunk short-term loudness
+    keeps the K-weighting filter running across chunks and librosa's 80 dB
+    onset floor is taken per segment; both only move near-silent frames.
+    """
+
+    def __init__(self, merged: Partial, sr: int, channels: int) -> None:
+        self.parts = merged
+        self.sr = sr
+        self.channels = channels
+        self.samples = int(merged["samples"])
+        self.freqs = np.fft.rfftfreq(STFT_SIZE, 1.0 / sr)
+
+    @classmethod
+    def from_audio(
+        cls,
+        audio: np.ndarray,
+        sr: int,
+        cache_dir: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        groups: FrozenSet[str] = ALL_GROUPS,
+    ) -> "SegmentedSignal":
+        channels = audio.shape[1] if audio.ndim > 1 else 1
+        partials = segment_partials(audio, sr, cache_dir, executor, groups=groups)
+        return cls(merge_partials(partials), sr, channels)
+
+    def _block_powers(self, first_hop: int, duration_sec: float) -> np.ndarray:
+        """400 ms gating-block mean squares, laid out exactly like pyloudnorm's."""
+        return gating_block_powers(self.parts["kw_energy"][first_hop:], self.sr, duration_sec)
+
+    def _windowed_rms(self, window: int, hop: int) -> np.ndarray:
+        """RMS of windows starting every `hop` samples, as `range(0, n - window, hop)` would give."""
+        energy = self.parts["mono_energy"]
+        cumulative = np.concatenate([[0.0], np.cumsum(energy)])
+        starts = np.arange(0, max(self.samples - window, 1), hop)
+        first = starts // RMS_HOP
+        last = np.minimum(first + window // RMS_HOP, len(energy))
+        lengths = np.minimum(window, self.samples - starts)
+        return np.sqrt((cumulative[last] - cumulative[first]) / lengths)
+
+    def loudness(self) -> LoudnessMetrics:
+        sr, n = self.sr, self.samples
+        integrated = gated_loudness(self._block_powers(0, n / sr))
+        window, hop = int(3.0 * sr), int(1.0 * sr)
+        short_terms = [
+            gated_loudness(self._block_powers(start // LOUDNESS_HOP, window / sr))
+            for start in range(0, max(n - window, 1), hop)
+            if start + window <= n
+        ]
+        energy = self.parts["mono_energy"]
+        return loudness_from_parts(
+            integrated=integrated,
+            short_terms=short_terms,
+            sample_peak=float(self.parts["sample_peak"]),
+            true_peak_db=peak_to_db(float(self.parts["true_peak"])),
+            rms=float(np.sqrt(np.sum(energy) / n)),
+            rms_windows=self._windowed_rms(int(0.5 * sr), int(0.25 * sr)).tolist(),
+        )
+
+    def _average_magnitude(self, name: str = "mag_sum") -> np.ndarray:
+        return self.parts[name] / int(self.parts["stft_frames"])
+
+    def spectral(self) -> SpectralMetrics:
+        return spectral_from_average(self.freqs, self._average_magnitude() + 1e-9)
+
+    def stereo(self) -> StereoMetrics:
+        if self.channels < 2:
+            return compute_stereo(np.zeros((1, 1)))
+        sums = self.parts["stereo_sums"].sum(axis=1)
+        return stereo_from_sums(self.samples, *[float(value) for value in sums])
+
+    def feature_tracks(self) -> FeatureTracks:
+        frames = max(1, int(np.ceil(self.samples / LOUDNESS_HOP)))
+        if self.channels > 1:
+            correlation = correlation_from_hop_sums(self.parts["stereo_sums"], self.sr, LOUDNESS_HOP)
+        else:
+            correlation = np.ones(frames)
+        band_frames = self.parts["band_frames"]
+        onset = self.parts["onset"]
+        return assemble_feature_tracks(
+            hop_sec=FEATURE_HOP_SEC,
+            frames=frames,
+            short_term_lufs=self.short_term_loudness(),
+            correlation=correlation,
+            band_frames=band_frames,
+            frame_times=self._stft_times(len(band_frames)),
+            onset=onset,
+            onset_times=np.arange(len(onset)) * ONSET_HOP / self.sr,
+            spectrogram_db=self.parts["spectrogram_db"],
+        )
+
+    def short_term_loudness(self) -> np.ndarray:
+        return short_term_from_energy(self.parts["kw_energy"], self.sr, LOUDNESS_HOP)
+
+    def _stft_times(self, count: int) -> np.ndarray:
+        # Same float expression as scipy's `stft`, so frames on a hop boundary
+        # land in the same feature hop.
+        half = STFT_SIZE // 2
+        return (np.arange(count) * STFT_HOP + half) / float(self.sr) - half / float(self.sr)
+
+    def third_octave(self) -> np.ndarray:
+        psd = self.parts["welch_sum"] / max(int(self.parts["welch_frames"]), 1)
+        return third_octave_from_psd(np.fft.rfftfreq(WELCH_SIZE, 1.0 / self.sr), psd)
+
+    def vocal(self) -> VocalFindings:
+        return vocal_from_average(self.freqs, self._average_magnitude() + 1e-9)
+
+    def reverb(self) -> ReverbReport:
+        return reverb_from_rms(self.parts["rms"])
+
+    def masking(self) -> List[MaskingConflict]:
+        return masking_from_average(self.freqs, self._average_magnitude() + 1e-9)
+
+    def low_end(self) -> LowEndReport:
+        return low_end_from_averages(self.freqs, self._average_magnitude(), self._average_magnitude("side_mag_sum"))
+
+    def transients(self, crest_factor_db: float) -> TransientReport:
+        return transients_from_onset(self.parts["onset"], crest_factor_db)
+
+    def artifacts(self, extension: str) -> ArtifactReport:
+        rms_vals = self._windowed_rms(int(0.05 * self.sr), int(0.025 * self.sr))
+        sign_change_rate = float(self.parts["sign_changes"]) / max(self.samples - 1, 1)
+        return artifacts_from_stats(rms_vals, sign_change_rate, self.parts["flux"], extension)
+
+    def qa(self) -> QaReport:
+        rms_left = rms_right = None
+        if self.channels > 1:
+            sums = self.parts["stereo_sums"].sum(axis=1)
+            rms_left = float(np.sqrt(sums[2] / self.samples))
+            rms_right = float(np.sqrt(sums[3] / self.samples))
+        return qa_from_stats(float(self.parts["mono_sum"]) / self.samples, rms_left, rms_right, self.sr)
+
+    def tempo(self) -> TempoEstimate:
+        return tempo_from_onset(self.parts["onset"], self.sr)
+
+    def key(self) -> KeyEstimate:
+        return key_from_chroma(self.parts["chroma_sum"] / max(int(self.parts["chroma_frames"]), 1))
+
+
+def open_signal(
+    audio: np.ndarray,
+    sr: int,
+    cache_dir: Optional[str] = None,
+    analyzers: Optional[Iterable[str]] = None,
+    executor: Optional[Executor] = None,
+):
+    """Segmented analysis when the signal supports it, otherwise the whole-signal analyzers.
+
+    Segments only compute the partial groups `analyzers` read (all of them
+    when no analyzers are given). When that is just the statistics partial,
+    nothing else is computed and nothing is cached. Segments are computed on
+    `executor` when one is given.
+    """
+    if not partials_supported(sr, audio.shape[0]):
+        return DirectSignal(audio, sr)
+    channels = audio.shape[1] if audio.ndim > 1 else 1
+    groups = partial_groups(analyzers)
+    if not groups:
+        return SegmentedSignal(compute_statistics(audio, sr, executor), sr, channels)
+    return SegmentedSignal.from_audio(audio, sr, cache_dir, executor, groups)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config import settings
+
+# How a platform moves a track towards its target:
+#   down_only     quieter tracks are left alone
+#   peak_limited  turned up only as far as the true-peak ceiling allows
+#   limiter       turned up fully, a limiter holds peaks at the ceiling
+#   up_and_down   turned up fully, nothing protects the peaks
+POLICIES = ("down_only", "peak_limited", "limiter", "up_and_down")
+
+
+@dataclass
+class PlatformTable:
+    names: List[str]
+    policies: List[str]
+    target_lufs: np.ndarray
+    ceiling_db: np.ndarray
+
+
+_cache: Dict[Path, PlatformTable] = {}
+
+
+def load_platforms(path: str | None = None) -> PlatformTable:
+    table_path = Path(path or settings.platform_targets_path)
+    if table_path in _cache:
+        return _cache[table_path]
+    data: Dict[str, Any] = json.loads(table_path.read_text(encoding="utf-8"))
+    unknown = sorted({entry["policy"] for entry in data.values()} - set(POLICIES))
+    if unknown:
+        raise ValueError(f"Unknown normalization policies: {', '.join(unknown)}")
+    table = PlatformTable(
+        names=list(data),
+        policies=[entry["policy"] for entry in data.values()],
+        target_lufs=np.array([entry["target_lufs"] for entry in data.values()], dtype=np.float64),
+        ceiling_db=np.array([entry.get("true_peak_ceiling_db", -1.0) for entry in data.values()], dtype=np.float64),
+    )
+    _cache[table_path] = table
+    return table
+
+
+def simulate_normalization(
+    integrated_lufs: Any,
+    true_peak_db: Any,
+    table: Optional[PlatformTable] = None,
+) -> Dict[str, np.ndarray]:
+    """Playback gain and resulting peaks on every platform, as (tracks, platforms) arrays.
+
+    Works from the measured integrated loudness and true peak alone; scalars
+    give a single row.
+    """
+    table = table or load_platforms()
+    integrated = np.atleast_1d(np.asarray(integrated_lufs, dtype=np.float64))[:, None]
+    peak = np.atleast_1d(np.asarray(true_peak_db, dtype=np.float64))[:, None]
+    policy = np.array(table.policies, dtype=object)[None]
+    ceiling = table.ceiling_db[None]
+
+    wanted = table.target_lufs[None] - integrated
+    gain = np.where(policy == "down_only", np.minimum(wanted, 0.0), wanted)
+    headroom = np.maximum(ceiling - peak, 0.0)
+    gain = np.where((policy == "peak_limited") & (gain > 0.0), np.minimum(gain, headroom), gain)
+
+    raised_peak = peak + gain
+    limited = np.where(policy == "limiter", np.maximum(raised_peak - ceiling, 0.0), 0.0)
+    playback_peak = raised_peak - limited
+    return {
+        "gain_db": gain,
+        "playback_lufs": integrated + gain,
+        "playback_true_peak_db": playback_peak,
+        "limiter_reduction_db": limited,
+        # Turned up past 0 dBTP with nothing catching the peaks.
+        "clips": (gain > 0.0) & (playback_peak > 0.0),
+        "over_ceiling": playback_peak > ceiling + 1e-9,
+    }
+
+
+def platform_report(loudness: Dict[str, Any], table: Optional[PlatformTable] = None) -> List[Dict[str, Any]]:
+    """Report section: how the track plays back on each platform."""
+    integrated, peak = loudness.get("integrated_lufs"), loudness.get("true_peak_db")
+    if integrated is None or peak is None or not np.isfinite(integrated) or not np.isfinite(peak):
+        return []
+    table = table or load_platforms()
+    result = simulate_normalization(integrated, peak, table)
+    section = []
+    for index, name in enumerate(table.names):
+        gain = float(result["gain_db"][0, index])
+        section.append(
+            {
+                "platform": name,
+                "target_lufs": float(table.target_lufs[index]),
+                "policy": table.policies[index],
+                "gain_db": round(gain, 2),
+                "direction": "down" if gain < -0.05 else "up" if gain > 0.05 else "none",
+                "playback_lufs": round(float(result["playback_lufs"][0, index]), 2),
+                "playback_true_peak_db": round(float(result["playback_true_peak_db"][0, index]), 2),
+                "limiter_reduction_db": round(float(result["limiter_reduction_db"][0, index]), 2),
+                "clips": bool(result["clips"][0, index]),
+                "over_ceiling": bool(result["over_ceiling"][0, index]),
+            }
+        )
+    return section
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import zlib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+PEAK_BASE_SAMPLES = 256
+PEAK_TILE_WIDTH = 1024
+SPECTROGRAM_TILE_WIDTH = 256
+SPECTROGRAM_DYNAMIC_RANGE_DB = 90.0
+
+
+@dataclass
+class PreviewLevel:
+    level: int
+    seconds_per_column: float
+    columns: int
+    tiles: int
+
+
+@dataclass
+class PreviewManifest:
+    duration_sec: float
+    peak_tile_width: int
+    spectrogram_tile_width: int
+    spectrogram_rows: int
+    waveform: List[PreviewLevel]
+    spectrogram: List[PreviewLevel]
+
+
+def _mono(audio: np.ndarray) -> np.ndarray:
+    if audio.ndim == 1:
+        return audio
+    return np.mean(audio, axis=1)
+
+
+def _tiles(columns: int, width: int) -> int:
+    return max(1, int(np.ceil(columns / width)))
+
+
+def _peak_pyramid(mono: np.ndarray) -> List[np.ndarray]:
+    """Min/max per PEAK_BASE_SAMPLES, halved in resolution until one tile is enough."""
+    columns = max(1, int(np.ceil(len(mono) / PEAK_BASE_SAMPLES)))
+    padded = np.zeros(columns * PEAK_BASE_SAMPLES, dtype=np.float32)
+    padded[: len(mono)] = mono
+    blocks = padded.reshape(columns, PEAK_BASE_SAMPLES)
+    level = np.stack([blocks.min(axis=1), blocks.max(axis=1)], axis=1)
+    levels = [level]
+    while level.shape[0] > PEAK_TILE_WIDTH:
+        if level.shape[0] % 2:
+            level = np.concatenate([level, level[-1:]], axis=0)
+        pairs = level.reshape(-1, 2, 2)
+        level = np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+        levels.append(level)
+    return levels
+
+
+def _spectrogram_pyramid(spectrogram_db: np.ndarray) -> List[np.ndarray]:
+    """Quantize to 8-bit relative to the loudest cell and average column pairs per level."""
+    top = float(np.max(spectrogram_db)) if spectrogram_db.size else 0.0
+    scaled = (spectrogram_db - (top - SPECTROGRAM_DYNAMIC_RANGE_DB)) / SPECTROGRAM_DYNAMIC_RANGE_DB
+    level = np.clip(scaled, 0.0, 1.0).astype(np.float32)
+    levels = [level]
+    while level.shape[1] > SPECTROGRAM_TILE_WIDTH:
+        if level.shape[1] % 2:
+            level = np.concatenate([level, level[:, -1:]], axis=1)
+        level = 0.5 * (level[:, 0::2] + level[:, 1::2])
+        levels.append(level)
+    return levels
+
+
+def encode_png(gray: np.ndarray) -> bytes:
+    """Encode an (rows, cols) uint8 array as an 8-bit grayscale PNG."""
+    rows, cols = gray.shape
+    raw = np.zeros((rows, cols + 1), dtype=np.uint8)
+    raw[:, 1:] = gray
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", cols, rows, 8, 0, 0, 0, 0)
+    return b"".join(
+        [
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", header),
+            chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+def build_previews(
+    audio: np.ndarray,
+    sr: int,
+    spectrogram_db: np.ndarray,
+    spectrogram_hop_sec: float,
+    directory: str,
+) -> PreviewManifest:
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    mono = _mono(audio)
+
+    waveform_levels: List[PreviewLevel] = []
+    for index, peaks in enumerate(_peak_pyramid(mono)):
+        quantized = np.clip(np.round(peaks * 127.0), -127, 127).astype(np.int8)
+        np.save(os.path.join(directory, f"peaks_{index}.npy"), quantized)
+        waveform_levels.append(
+            PreviewLevel(
+                level=index,
+                seconds_per_column=PEAK_BASE_SAMPLES * (2 ** index) / float(sr),
+                columns=int(peaks.shape[0]),
+                tiles=_tiles(peaks.shape[0], PEAK_TILE_WIDTH),
+            )
+        )
+
+    spectrogram_levels: List[PreviewLevel] = []
+    for index, image in enumerate(_spectrogram_pyramid(spectrogram_db)):
+        gray = np.round(image[::-1] * 255.0).astype(np.uint8)
+        tiles = _tiles(gray.shape[1], SPECTROGRAM_TILE_WIDTH)
+        for tile in range(tiles):
+            columns = gray[:, tile * SPECTROGRAM_TILE_WIDTH : (tile + 1) * SPECTROGRAM_TILE_WIDTH]
+            with open(os.path.join(directory, f"spec_{index}_{tile}.png"), "wb") as handle:
+                handle.write(encode_png(np.ascontiguousarray(columns)))
+        spectrogram_levels.append(
+            PreviewLevel(
+                level=index,
+                seconds_per_column=spectrogram_hop_sec * (2 ** index),
+                columns=int(gray.shape[1]),
+                tiles=tiles,
+            )
+        )
+
+    manifest = PreviewManifest(
+        duration_sec=len(mono) / float(sr),
+        peak_tile_width=PEAK_TILE_WIDTH,
+        spectrogram_tile_width=SPECTROGRAM_TILE_WIDTH,
+        spectrogram_rows=int(spectrogram_db.shape[0]),
+        waveform=waveform_levels,
+        spectrogram=spectrogram_levels,
+    )
+    with open(os.path.join(directory, "previews.json"), "w", encoding="utf-8") as handle:
+        json.dump(asdict(manifest), handle)
+    return manifest
+
+
+def load_preview_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, "previews.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def read_waveform_tile(directory: str, level: int, tile: int) -> Optional[bytes]:
+    """Return interleaved int8 min/max pairs for one waveform tile, or None if out of range."""
+    path = os.path.join(directory, f"peaks_{level}.npy")
+    if tile < 0 or not os.path.exists(path):
+        return None
+    peaks = np.load(path, mmap_mode="r")
+    start = tile * PEAK_TILE_WIDTH
+    if start >= peaks.shape[0]:
+        return None
+    return np.ascontiguousarray(peaks[start : start + PEAK_TILE_WIDTH]).tobytes()
+
+
+def spectrogram_tile_path(directory: str, level: int, tile: int) -> str:
+    return os.path.join(directory, f"spec_{level}_{tile}.png")
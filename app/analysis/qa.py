@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 
@@ -15,15 +15,18 @@ class QaReport:
 
 def analyze_qa(audio: np.ndarray, sr: int) -> QaReport:
     mono = np.mean(audio, axis=1) if audio.ndim > 1 else audio
-    dc_offset = float(np.mean(mono))
-    dc_offset_db = 20.0 * np.log10(abs(dc_offset) + 1e-9)
-
+    rms_left = rms_right = None
     if audio.ndim > 1 and audio.shape[1] > 1:
-        left = audio[:, 0]
-        right = audio[:, 1]
-        rms_left = np.sqrt(np.mean(left ** 2)) + 1e-9
-        rms_right = np.sqrt(np.mean(right ** 2)) + 1e-9
-        channel_imbalance_db = float(20.0 * np.log10(rms_left / rms_right))
+        rms_left = float(np.sqrt(np.mean(audio[:, 0] ** 2)))
+        rms_right = float(np.sqrt(np.mean(audio[:, 1] ** 2)))
+    return qa_from_stats(float(np.mean(mono)), rms_left, rms_right, sr)
+
+
+def qa_from_stats(dc_offset: float, rms_left: Optional[float], rms_right: Optional[float], sr: int) -> QaReport:
+    """QA report from the mono mean and per-channel RMS (None for mono sources)."""
+    dc_offset_db = 20.0 * np.log10(abs(dc_offset) + 1e-9)
+    if rms_left is not None and rms_right is not None:
+        channel_imbalance_db = float(20.0 * np.log10((rms_left + 1e-9) / (rms_right + 1e-9)))
     else:
         channel_imbalance_db = 0.0
 
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+from .features import FEATURE_HOP_SEC, short_term_loudness_track
+from .ingest import AudioData
+from .metrics import LoudnessMetrics, SpectralMetrics, StereoMetrics, compute_loudness, compute_spectral, compute_stereo
+
+try:
+    from scipy.signal import welch
+except Exception:  # pragma: no cover - optional dependency
+    welch = None
+
+
+# ISO 266 third-octave centres from 25 Hz to 20 kHz (base-two approximation).
+THIRD_OCTAVE_CENTERS_HZ = 1000.0 * 2.0 ** (np.arange(-16, 14) / 3.0)
+
+
+@dataclass
+class ReferenceProfile:
+    metrics: Dict[str, float]
+    third_octave_db: np.ndarray
+    loudness_curve: np.ndarray
+    hop_sec: float
+    duration_sec: float
+
+
+def comparison_metrics(loudness: LoudnessMetrics, spectral: SpectralMetrics, stereo: StereoMetrics) -> Dict[str, float]:
+    """The scalar set `compare_ab` works on, for either side of an A/B."""
+    return {
+        "integrated_lufs": loudness.integrated_lufs,
+        "short_term_lufs": loudness.short_term_lufs,
+        "true_peak_db": loudness.true_peak_db,
+        "crest_factor_db": loudness.crest_factor_db,
+        "spectral_tilt_db_per_oct": spectral.spectral_tilt_db_per_oct,
+        "stereo_width": stereo.width,
+        "stereo_correlation": stereo.correlation,
+    }
+
+
+def third_octave_spectrum(audio: np.ndarray, sr: int) -> np.ndarray:
+    """Average power per third-octave band in dB, from a long-window Welch estimate."""
+    if welch is None:
+        raise RuntimeError("scipy is required for third-octave spectra")
+    mono = np.mean(audio, axis=1) if audio.ndim > 1 else audio
+    nperseg = min(16384, max(256, len(mono)))
+    freqs, psd = welch(mono, fs=sr, nperseg=nperseg)
+    return third_octave_from_psd(freqs, psd)
+
+
+def third_octave_from_psd(freqs: np.ndarray, psd: np.ndarray) -> np.ndarray:
+    """Third-octave band levels in dB from a power spectral density on evenly spaced bins."""
+    df = freqs[1] - freqs[0]
+    lower = THIRD_OCTAVE_CENTERS_HZ * 2.0 ** (-1.0 / 6.0)
+    upper = THIRD_OCTAVE_CENTERS_HZ * 2.0 ** (1.0 / 6.0)
+    cumulative = np.concatenate([[0.0], np.cumsum(psd * df)])
+    lo_idx = np.searchsorted(freqs, lower)
+    hi_idx = np.searchsorted(freqs, upper)
+    power = cumulative[hi_idx] - cumulative[lo_idx]
+    # Bands narrower than one bin take the nearest bin's power scaled to the band width.
+    narrow = hi_idx <= lo_idx
+    if np.any(narrow):
+        nearest = np.clip(np.searchsorted(freqs, THIRD_OCTAVE_CENTERS_HZ[narrow]), 0, len(psd) - 1)
+        power[narrow] = psd[nearest] * (upper[narrow] - lower[narrow])
+    return (10.0 * np.log10(np.maximum(power, 1e-20))).astype(np.float32)
+
+
+def build_reference_profile(audio_data: AudioData) -> ReferenceProfile:
+    audio, sr = audio_data.audio, audio_data.sr
+    metrics = comparison_metrics(compute_loudness(audio, sr), compute_spectral(audio, sr), compute_stereo(audio))
+    return ReferenceProfile(
+        metrics={key: float(value) for key, value in metrics.items()},
+        third_octave_db=third_octave_spectrum(audio, sr),
+        loudness_curve=short_term_loudness_track(audio, sr).astype(np.float32),
+        hop_sec=FEATURE_HOP_SEC,
+        duration_sec=audio_data.duration_sec,
+    )
@@ -3,7 +3,9 @@ from __future__ import annotations
 from dataclasses import asdict
 from typing import Any, Dict, List, Optional
 
-from .genre_profiles import get_profile
+from .genre_fit import rank_genres
+from .genre_profiles import PROFILE_DEFAULTS, get_profile
+from .platforms import platform_report
 
 
 def _score_range(value: float, target_min: float, target_max: float, scale: float = 100.0) -> float:
@@ -27,46 +29,63 @@ def build_report(
     warnings: List[str],
     bpm_key: Optional[Dict[str, Any]] = None,
     ab_compare: Optional[Dict[str, Any]] = None,
+    region: Optional[Dict[str, float]] = None,
+    reference_suggestions: Optional[List[Dict[str, Any]]] = None,
+    analyzers: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
+    """Scores and recommendations cover only the metric sections that were run."""
     profile = get_profile(genre, mode, vocal_style)
-    loudness_target = profile.get("lufs_target", [-16, -12])
-    spectral_tilt_target = profile.get("spectral_tilt", [-1.5, -0.5])
-    stereo_target = profile.get("stereo_width", [0.2, 0.5])
-    crest_target = profile.get("crest_factor", [8, 14])
-
-    loudness_metrics = metrics["loudness"]
-    spectral_metrics = metrics["spectral"]
-    stereo_metrics = metrics["stereo"]
-
-    scores = {
-        "loudness": _score_range(loudness_metrics["integrated_lufs"], loudness_target[0], loudness_target[1]),
-        "spectral_balance": _score_range(
+    loudness_target = profile.get("lufs_target", PROFILE_DEFAULTS["lufs_target"])
+    spectral_tilt_target = profile.get("spectral_tilt", PROFILE_DEFAULTS["spectral_tilt"])
+    stereo_target = profile.get("stereo_width", PROFILE_DEFAULTS["stereo_width"])
+    crest_target = profile.get("crest_factor", PROFILE_DEFAULTS["crest_factor"])
+
+    loudness_metrics = metrics.get("loudness")
+    spectral_metrics = metrics.get("spectral")
+    stereo_metrics = metrics.get("stereo")
+
+    scores: Dict[str, float] = {}
+    if loudness_metrics:
+        scores["loudness"] = _score_range(loudness_metrics["integrated_lufs"], loudness_target[0], loudness_target[1])
+    if spectral_metrics:
+        scores["spectral_balance"] = _score_range(
             spectral_metrics["spectral_tilt_db_per_oct"],
             spectral_tilt_target[0],
             spectral_tilt_target[1],
-        ),
-        "stereo": _score_range(stereo_metrics["width"], stereo_target[0], stereo_target[1]),
-        "dynamics": _score_range(loudness_metrics["crest_factor_db"], crest_target[0], crest_target[1]),
-        "noise": max(0.0, 100.0 - abs(loudness_metrics["noise_floor_db"]))
-    }
+        )
+    if stereo_metrics:
+        scores["stereo"] = _score_range(stereo_metrics["width"], stereo_target[0], stereo_target[1])
+    if loudness_metrics:
+        scores["dynamics"] = _score_range(loudness_metrics["crest_factor_db"], crest_target[0], crest_target[1])
+        scores["noise"] = max(0.0, 100.0 - abs(loudness_metrics["noise_floor_db"]))
 
     recording_fixes: List[str] = []
     mix_fixes: List[str] = []
-
-    if loudness_metrics["true_peak_db"] > -1.0:
-        mix_fixes.append("Reduser 'true-peak' ved å senke 'ceiling' på limiter eller justere gain.")
-
-    if loudness_metrics["integrated_lufs"] < loudness_target[0]:
-        mix_fixes.append("Øk total lydstyrke med forsiktig busskomprimering og limiting.")
-    elif loudness_metrics["integrated_lufs"] > loudness_target[1]:
-        mix_fixes.append("Reduser master gain for å treffe målet for sjangeren.")
-
-    if spectral_metrics["spectral_tilt_db_per_oct"] < spectral_tilt_target[0]:
-        mix_fixes.append("Legg til presence/luft for å balansere diskanten for sjangeren.")
-    elif spectral_metrics["spectral_tilt_db_per_oct"] > spectral_tilt_target[1]:
-        mix_fixes.append("Demp øvre mellomtone eller diskant for en mykere balanse.")
-
-    if stereo_metrics["correlation"] < 0.0:
+    platforms = platform_report(loudness_metrics) if loudness_metrics else []
+
+    if loudness_metrics:
+        if loudness_metrics["true_peak_db"] > -1.0:
+            mix_fixes.append("Reduser 'true-peak' ved å senke 'ceiling' på limiter eller justere gain.")
+
+        if loudness_metrics["integrated_lufs"] < loudness_target[0]:
+            mix_fixes.append("Øk total lydstyrke med forsiktig busskomprimering og limiting.")
+        elif loudness_metrics["integrated_lufs"] > loudness_target[1]:
+            mix_fixes.append("Reduser master gain for å treffe målet for sjangeren.")
+
+        clipping = [entry["platform"] for entry in platforms if entry["clips"]]
+        if clipping:
+            mix_fixes.append(
+                f"Normalisering løfter true-peak over 0 dBTP på {', '.join(clipping)}; "
+                "kontroller toppene eller master nærmere plattformens mål."
+            )
+
+    if spectral_metrics:
+        if spectral_metrics["spectral_tilt_db_per_oct"] < spectral_tilt_target[0]:
+            mix_fixes.append("Legg til presence/luft for å balansere diskanten for sjangeren.")
+        elif spectral_metrics["spectral_tilt_db_per_oct"] > spectral_tilt_target[1]:
+            mix_fixes.append("Demp øvre mellomtone eller diskant for en mykere balanse.")
+
+    if stereo_metrics and stereo_metrics["correlation"] < 0.0:
         mix_fixes.append("Sjekk monokompatibilitet; fasekorrelasjonen er negativ.")
 
     if "vocal" in metrics:
@@ -87,7 +106,7 @@ def build_report(
         mix_fixes.append("Miksen er nær målet; gjør små justeringer i tone og lydstyrke.")
 
     executive_summary = "Totalbalansen er god, med noen få målrettede forbedringer nødvendig."
-    if min(scores.values()) < 60:
+    if scores and min(scores.values()) < 60:
         executive_summary = "Mikskvaliteten er ujevn; prioriter områdene med lavest score først."
 
     report: Dict[str, Any] = {
@@ -110,6 +129,17 @@ def build_report(
         report["bpm_key"] = bpm_key
     if ab_compare:
         report["ab_compare"] = ab_compare
+    if region:
+        report["region"] = region
+    if reference_suggestions:
+        report["reference_suggestions"] = reference_suggestions
+    if analyzers:
+        report["analyzers"] = analyzers
+    if platforms:
+        report["platforms"] = platforms
+    genre_fit = rank_genres(metrics, mode, vocal_style)
+    if genre_fit:
+        report["genre_fit"] = genre_fit
 
     report["appendix"] = {
         "notes": "Teknisk vedlegg inkluderer målte verdier for referanse.",
@@ -22,12 +22,18 @@ def analyze_reverb(audio: np.ndarray, sr: int) -> ReverbReport:
     if librosa is None:
         rms = np.sqrt(np.mean(mono ** 2))
         depth_score = float(min(1.0, rms))
-    else:
-        rms_env = librosa.feature.rms(y=mono, frame_length=2048, hop_length=512)[0]
-        high = np.percentile(rms_env, 85) + 1e-9
-        low = np.percentile(rms_env, 15) + 1e-9
-        depth_score = float(min(1.0, low / high))
+        return _reverb_report(depth_score)
+    return reverb_from_rms(librosa.feature.rms(y=mono, frame_length=2048, hop_length=512)[0])
 
+
+def reverb_from_rms(rms_env: np.ndarray) -> ReverbReport:
+    """Reverb report from the 2048/512 frame RMS envelope."""
+    high = np.percentile(rms_env, 85) + 1e-9
+    low = np.percentile(rms_env, 15) + 1e-9
+    return _reverb_report(float(min(1.0, low / high)))
+
+
+def _reverb_report(depth_score: float) -> ReverbReport:
     forwardness_score = float(max(0.0, 1.0 - depth_score))
     note = "Vocal feels forward." if forwardness_score > 0.6 else "Vocal depth may be pushing back."
 
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+
+SHARED_MEMORY_DIR = "/dev/shm"
+# Left free for other users of the tmpfs (and concurrent jobs' copies).
+SHARED_MEMORY_HEADROOM_BYTES = 32 * 1024 * 1024
+
+
+def shared_memory_fits(nbytes: int, directory: str = SHARED_MEMORY_DIR) -> bool:
+    """Whether a block of `nbytes` fits in the tmpfs behind POSIX shared memory.
+
+    The block is sparse until written, so a copy that outgrows the tmpfs
+    (64 MB by default in Docker) dies with SIGBUS instead of raising.
+    Platforms without /dev/shm do not back shared memory with a tmpfs.
+    """
+    try:
+        stats = os.statvfs(directory)
+    except (AttributeError, OSError):
+        return True
+    return nbytes + SHARED_MEMORY_HEADROOM_BYTES <= stats.f_bavail * stats.f_frsize
+
+
+@dataclass(frozen=True)
+class SharedHandle:
+    """What a worker process needs to attach to a `SharedArray`; cheap to pickle."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class SharedArray:
+    """A numpy array copied once into named shared memory, with a reference count.
+
+    The creator holds the first reference. Every task that will attach in
+    another process takes one more (`acquire`) and gives it back when it is
+    done (`release`), so the block is unlinked only after the creator and all
+    in-flight tasks are finished with it, even if the creator bails out early.
+    """
+
+    def __init__(self, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.array: Optional[np.ndarray] = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+        self.handle = SharedHandle(self._shm.name, tuple(array.shape), array.dtype.str)
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._refs == 0:
+                raise RuntimeError("Shared array already released")
+            self._refs += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def call_with_shared(handle: SharedHandle, function: Callable[..., Any], *args: Any) -> Any:
+    """Run `function(array, *args)` on the shared array, attached without copying.
+
+    Meant as the target of a process pool task; the result must not keep views
+    of the array, since the mapping is closed on return.
+    """
+    shm = shared_memory.SharedMemory(name=handle.name)
+    try:
+        return function(np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=shm.buf), *args)
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A traceback still references the array; the mapping goes when it is collected.
+            pass
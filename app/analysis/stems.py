@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy.fft import rfft
+    from scipy.signal import get_window
+except Exception:  # pragma: no cover - optional dependency
+    get_window = None
+
+STEM_FFT_SIZE = 4096
+STEM_HOP = 2048
+# Frames per batched STFT block; bounds memory at stems x block x bins.
+STEM_BLOCK_FRAMES = 128
+# Zwicker critical-band edges in Hz (Bark scale, capped at 20 kHz).
+CRITICAL_BAND_EDGES_HZ = [
+    20, 100, 200, 300, 400, 510, 630, 770, 920, 1080, 1270, 1480, 1720, 2000,
+    2320, 2700, 3150, 3700, 4400, 5300, 6400, 7700, 9500, 12000, 15500, 20000,
+]
+# A stem takes part in a band when it is within this range of the summed stems there.
+ACTIVE_RANGE_DB = 10.0
+# Two active stems mask each other when their band levels are this close.
+MASKING_RANGE_DB = 6.0
+# Bands this far below the loudest band of the summed stems count as silent.
+SILENCE_RANGE_DB = 60.0
+# Pairs must mask each other for this share of the track to be reported.
+MIN_OVERLAP = 0.05
+MIN_CONFLICT_SEC = 1.0
+MERGE_GAP_SEC = 0.5
+MAX_STEM_CONFLICTS = 10
+MAX_TIME_RANGES = 8
+
+
+@dataclass
+class StemConflict:
+    stems: List[str]
+    band_hz: str
+    overlap: float
+    time_ranges: List[List[float]]
+    note: str
+
+
+@dataclass
+class StemMaskingReport:
+    stems: List[str]
+    bands_hz: List[str]
+    overlap_matrix: List[List[List[float]]]
+    conflicts: List[StemConflict]
+
+
+def band_labels() -> List[str]:
+    edges = CRITICAL_BAND_EDGES_HZ
+    return [f"{low}-{high} Hz" for low, high in zip(edges[:-1], edges[1:])]
+
+
+def _band_matrix(sr: int) -> np.ndarray:
+    """(bins, bands) 0/1 matrix summing STFT bins into critical bands."""
+    freqs = np.fft.rfftfreq(STEM_FFT_SIZE, 1.0 / sr)
+    edges = np.asarray(CRITICAL_BAND_EDGES_HZ, dtype=np.float64)
+    band = np.searchsorted(edges, freqs, side="right") - 1
+    valid = (band >= 0) & (band < len(edges) - 1)
+    matrix = np.zeros((len(freqs), len(edges) - 1), dtype=np.float32)
+    matrix[np.flatnonzero(valid), band[valid]] = 1.0
+    return matrix
+
+
+def stem_band_levels(stems: np.ndarray, sr: int) -> np.ndarray:
+    """(stems, frames, bands) critical-band power in dB from one batched STFT.
+
+    `stems` is a (stems, samples) array of mono signals; frames follow the
+    4096/2048 grid of the offline STFT, zero-padded at both ends.
+    """
+    if get_window is None:
+        raise RuntimeError("scipy is required for stem analysis")
+    count, length = stems.shape
+    half = STEM_FFT_SIZE // 2
+    frames = length // STEM_HOP + 1
+    padded = np.zeros((count, (frames - 1) * STEM_HOP + STEM_FFT_SIZE), dtype=np.float32)
+    padded[:, half : half + length] = stems
+    window = get_window("hann", STEM_FFT_SIZE)
+    window = (window / window.sum()).astype(np.float32)
+    bands = _band_matrix(sr)
+
+    views = np.lib.stride_tricks.sliding_window_view(padded, STEM_FFT_SIZE, axis=1)[:, ::STEM_HOP]
+    power = np.empty((count, frames, bands.shape[1]), dtype=np.float32)
+    for first in range(0, frames, STEM_BLOCK_FRAMES):
+        block = views[:, first : first + STEM_BLOCK_FRAMES] * window
+        spectrum = rfft(block, axis=-1)
+        power[:, first : first + STEM_BLOCK_FRAMES] = (spectrum.real ** 2 + spectrum.imag ** 2) @ bands
+    return 10.0 * np.log10(power + 1e-12)
+
+
+def _mix_levels(levels: np.ndarray) -> np.ndarray:
+    """(frames, bands) level of the summed stems."""
+    return 10.0 * np.log10(np.sum(10.0 ** (levels / 10.0), axis=0) + 1e-12)
+
+
+def _active(levels: np.ndarray, total: np.ndarray, floor: float) -> np.ndarray:
+    audible = total > floor
+    return (levels > total - ACTIVE_RANGE_DB) & audible
+
+
+def overlap_matrix(levels: np.ndarray) -> np.ndarray:
+    """(bands, stems, stems) share of the frames in which each pair masks each other.
+
+    Pairs are compared for all stems at once; only time is walked in blocks so
+    the pairwise mask never holds more than `STEM_BLOCK_FRAMES` frames.
+    """
+    count, frames, bands = levels.shape
+    total = _mix_levels(levels)
+    floor = float(np.max(total)) - SILENCE_RANGE_DB
+    hits = np.zeros((bands, count, count))
+    for first in range(0, frames, STEM_BLOCK_FRAMES):
+        block = levels[:, first : first + STEM_BLOCK_FRAMES]
+        block_total = total[first : first + STEM_BLOCK_FRAMES]
+        active = _active(block, block_total[None], floor)
+        close = np.abs(block[:, None] - block[None, :]) <= MASKING_RANGE_DB
+        hits += (active[:, None] & active[None, :] & close).sum(axis=2, dtype=np.int64).transpose(2, 0, 1)
+    diagonal = np.arange(count)
+    hits[:, diagonal, diagonal] = 0.0
+    return hits / max(frames, 1)
+
+
+def pair_conflict_frames(levels: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """(pairs, frames) masking mask for (band, stem, stem) rows of `pairs`."""
+    total = _mix_levels(levels)
+    floor = float(np.max(total)) - SILENCE_RANGE_DB
+    by_band = levels.transpose(0, 2, 1)
+    band, first, second = pairs.T
+    mix = total.T[band]
+    level_a = by_band[first, band]
+    level_b = by_band[second, band]
+    active_a = _active(level_a, mix, floor)
+    active_b = _active(level_b, mix, floor)
+    return active_a & active_b & (np.abs(level_a - level_b) <= MASKING_RANGE_DB)
+
+
+def _runs(mask: np.ndarray, hop_sec: float) -> List[List[float]]:
+    """Merged [start, end] seconds of True runs, dropping the short ones."""
+    padded = np.concatenate([[False], mask, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    starts, ends = edges[::2], edges[1::2]
+    ranges: List[List[float]] = []
+    for start, end in zip(starts * hop_sec, ends * hop_sec):
+        if ranges and start - ranges[-1][1] <= MERGE_GAP_SEC:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return [[round(float(start), 2), round(float(end), 2)] for start, end in ranges if end - start >= MIN_CONFLICT_SEC]
+
+
+def _top_pairs(matrix: np.ndarray, limit: int) -> List[Tuple[int, int, int]]:
+    bands, count, _ = matrix.shape
+    upper = np.triu(np.ones((count, count), dtype=bool), k=1)
+    scores = np.where(upper[None], matrix, 0.0).ravel()
+    order = np.argsort(scores)[::-1][:limit]
+    return [tuple(int(value) for value in np.unravel_index(index, matrix.shape)) for index in order if scores[index] >= MIN_OVERLAP]
+
+
+def sum_stems(stems: Sequence[np.ndarray]) -> np.ndarray:
+    """The mix of (samples, channels) stems, padded to the longest; mono stems feed every channel."""
+    length = max(len(stem) for stem in stems)
+    channels = max(stem.shape[1] if stem.ndim > 1 else 1 for stem in stems)
+    mix = np.zeros((length, channels), dtype=np.float32)
+    for stem in stems:
+        stem = stem.reshape(len(stem), -1)
+        if stem.shape[1] != channels:
+            stem = np.mean(stem, axis=1, keepdims=True)
+        mix[: len(stem)] += stem
+    return mix
+
+
+def analyze_stem_masking(stems: Sequence[np.ndarray], names: Sequence[str], sr: int) -> StemMaskingReport:
+    """Pairwise time-frequency masking between stems, per critical band."""
+    length = max(len(stem) for stem in stems)
+    mono = np.zeros((len(stems), length), dtype=np.float32)
+    for index, stem in enumerate(stems):
+        mono[index, : len(stem)] = np.mean(stem, axis=1) if stem.ndim > 1 else stem
+
+    levels = stem_band_levels(mono, sr)
+    matrix = overlap_matrix(levels)
+    labels = band_labels()
+    hop_sec = STEM_HOP / float(sr)
+
+    selected = _top_pairs(matrix, MAX_STEM_CONFLICTS)
+    conflicts: List[StemConflict] = []
+    if selected:
+        # Frame masks only for the reported pairs, all of them in one shot.
+        pair_frames = pair_conflict_frames(levels, np.array(selected))
+        for (band, i, j), frames_mask in zip(selected, pair_frames):
+            conflicts.append(
+                StemConflict(
+                    stems=[names[i], names[j]],
+                    band_hz=labels[band],
+                    overlap=round(float(matrix[band, i, j]), 3),
+                    time_ranges=_runs(frames_mask, hop_sec)[:MAX_TIME_RANGES],
+                    note="Stemmene har lignende nivå i samme kritiske bånd; vurder EQ-plass eller sidechain.",
+                )
+            )
+
+    return StemMaskingReport(
+        stems=list(names),
+        bands_hz=labels,
+        overlap_matrix=np.round(matrix, 3).tolist(),
+        conflicts=conflicts,
+    )
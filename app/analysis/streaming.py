@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List
+
+import numpy as np
+
+from .channels import stereo_downmix
+from .features import CORRELATION_WINDOW_SEC, LUFS_FLOOR
+from .lowend import low_end_from_averages
+from .metrics import gated_loudness, k_weighting_sos, peak_to_db, spectral_from_average, stereo_from_sums
+from .qa import qa_from_stats
+
+try:
+    from scipy.signal import get_window, resample_poly, sosfilt
+except Exception:  # pragma: no cover - optional dependency
+    sosfilt = None
+
+STREAM_BLOCK_SEC = 0.1
+MOMENTARY_SEC = 0.4
+SHORT_TERM_SEC = 3.0
+STREAM_FFT_SIZE = 4096
+STREAM_FFT_HOP = 2048
+RECENT_SPECTRUM_FRAMES = 10
+TRUE_PEAK_TAIL = 64
+STREAM_FORMATS = {"f32": np.dtype("<f4"), "s16": np.dtype("<i2"), "s32": np.dtype("<i4")}
+
+# Per-block sums: K-weighted mono energy, L, R, L^2, R^2, L*R, mono.
+_SUM_ROWS = 7
+
+
+@dataclass
+class StreamSnapshot:
+    time_sec: float
+    momentary_lufs: float
+    short_term_lufs: float
+    integrated_lufs: float
+    true_peak_db: float
+    sample_peak_db: float
+    band_energies_db: Dict[str, float]
+    correlation: float
+    integrated: Dict[str, Any]
+
+
+def decode_pcm(payload: bytes, fmt: str, channels: int) -> np.ndarray:
+    """Interleaved little-endian PCM bytes to a (frames, channels) float array; a trailing partial frame is dropped."""
+    dtype = STREAM_FORMATS[fmt]
+    usable = len(payload) - len(payload) % (dtype.itemsize * channels)
+    audio = np.frombuffer(payload[:usable], dtype=dtype).reshape(-1, channels).astype(np.float64)
+    if dtype.kind == "i":
+        audio /= float(np.iinfo(dtype).max) + 1.0
+    return audio
+
+
+class PcmDecoder:
+    """`decode_pcm` over a message stream: bytes of a partial frame wait for the next message.
+
+    Clients may split messages anywhere, so dropping the remainder would shift
+    every later sample and swap the channels.
+    """
+
+    def __init__(self, fmt: str, channels: int) -> None:
+        self.fmt = fmt
+        self.channels = channels
+        self._frame_bytes = STREAM_FORMATS[fmt].itemsize * channels
+        self._pending = b""
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        data = self._pending + payload
+        usable = len(data) - len(data) % self._frame_bytes
+        self._pending = data[usable:]
+        return decode_pcm(data[:usable], self.fmt, self.channels)
+
+
+def _loudness(mean_square: float) -> float:
+    return float(max(-0.691 + 10.0 * np.log10(max(mean_square, 1e-30)), LUFS_FLOOR))
+
+
+def _oversampled_peak(audio: np.ndarray, start: int, end: int) -> float:
+    """4x oversampled peak of audio[start:end], filtered over the whole of `audio`."""
+    upsampled = resample_poly(audio, 4, 1, axis=0)
+    return float(np.max(np.abs(upsampled[start * 4 : end * 4])))
+
+
+class StreamingAnalyzer:
+    """Incremental meters over PCM chunks, using the same formulas as the offline report.
+
+    Loudness is measured on the K-weighted mono mix in 100 ms blocks, so the
+    integrated value gates exactly the 400 ms / 75 % overlap blocks
+    `compute_loudness` sees. Spectra come from 4096-sample Hann frames on the
+    2048 hop of the offline STFT, and the integrated section is rebuilt from
+    running sums with the `*_from_*` helpers of the offline analyzers.
+    Surround streams are metered on their stereo downmix, as offline.
+    """
+
+    def __init__(self, sr: int, channels: int) -> None:
+        if sosfilt is None:
+            raise RuntimeError("scipy is required for streaming analysis")
+        self.sr = sr
+        self.channels = min(channels, 2)
+        self._sos = k_weighting_sos(sr)
+        self._zi = np.zeros((self._sos.shape[0], 2))
+        self._block = int(round(STREAM_BLOCK_SEC * sr))
+        self._carry = np.zeros(_SUM_ROWS)
+        self._carry_count = 0
+        self._blocks: List[float] = []
+        self._recent_sums: Deque[np.ndarray] = deque(maxlen=max(1, int(round(CORRELATION_WINDOW_SEC / STREAM_BLOCK_SEC))))
+        self._totals = np.zeros(_SUM_ROWS)
+        self._samples = 0
+        self._sample_peak = 0.0
+        self._true_peak = 0.0
+        self._tail = np.zeros((0, self.channels))
+        self._tail_pending = 0
+
+        self._window = get_window("hann", STREAM_FFT_SIZE)
+        self._freqs = np.fft.rfftfreq(STREAM_FFT_SIZE, 1.0 / sr)
+        # Half a frame of leading zeros, like the zero boundary of the offline STFT.
+        self._history = np.zeros((STREAM_FFT_SIZE // 2, 2))
+        self._frames = 0
+        self._mag_sum = np.zeros(len(self._freqs))
+        self._side_sum = np.zeros(len(self._freqs))
+        self._recent_mag: Deque[np.ndarray] = deque(maxlen=RECENT_SPECTRUM_FRAMES)
+
+    def push(self, audio: np.ndarray) -> None:
+        if audio.ndim == 1:
+            audio = audio[:, None]
+        if len(audio) == 0:
+            return
+        audio = stereo_downmix(audio)
+        left = audio[:, 0]
+        right = audio[:, 1] if audio.shape[1] > 1 else left
+        mono = np.mean(audio, axis=1)
+        weighted, self._zi = sosfilt(self._sos, mono, zi=self._zi)
+
+        rows = np.stack([weighted ** 2, left, right, left * left, right * right, left * right, mono])
+        self._totals += rows.sum(axis=1)
+        self._accumulate_blocks(rows)
+        self._samples += len(audio)
+
+        self._sample_peak = max(self._sample_peak, float(np.max(np.abs(audio))))
+        self._update_true_peak(audio)
+        self._update_spectrum(mono, 0.5 * (left - right))
+
+    def update(self, audio: np.ndarray) -> StreamSnapshot:
+        self.push(audio)
+        return self.snapshot()
+
+    def _accumulate_blocks(self, rows: np.ndarray) -> None:
+        position = 0
+        total = rows.shape[1]
+        while position < total:
+            take = min(self._block - self._carry_count, total - position)
+            self._carry += rows[:, position : position + take].sum(axis=1)
+            self._carry_count += take
+            position += take
+            if self._carry_count == self._block:
+                self._blocks.append(float(self._carry[0]))
+                self._recent_sums.append(self._carry[1:6].copy())
+                self._carry = np.zeros(_SUM_ROWS)
+                self._carry_count = 0
+
+    def _update_true_peak(self, audio: np.ndarray) -> None:
+        # Like the segment true peaks, samples are only measured once the
+        # oversampling filter has context on both sides: the last half tail of
+        # input waits for the next call, and the half tail before it is past
+        # context that was measured already.
+        joined = np.concatenate([self._tail, audio])
+        start = len(self._tail) - self._tail_pending
+        end = len(joined) - TRUE_PEAK_TAIL // 2
+        if end > start:
+            self._true_peak = max(self._true_peak, _oversampled_peak(joined, start, end))
+            start = end
+        self._tail = joined[max(0, start - TRUE_PEAK_TAIL // 2) :]
+        self._tail_pending = len(joined) - start
+
+    def _pending_true_peak(self) -> float:
+        """Peak of the samples still waiting for future context, as if the stream ended here."""
+        if not self._tail_pending:
+            return 0.0
+        return _oversampled_peak(self._tail, len(self._tail) - self._tail_pending, len(self._tail))
+
+    def _update_spectrum(self, mono: np.ndarray, side: np.ndarray) -> None:
+        self._history = np.concatenate([self._history, np.stack([mono, side], axis=1)])
+        available = (len(self._history) - STREAM_FFT_SIZE) // STREAM_FFT_HOP + 1
+        if available <= 0:
+            return
+        starts = np.arange(available) * STREAM_FFT_HOP
+        frames = np.stack([self._history[start : start + STREAM_FFT_SIZE] for start in starts])
+        spectra = np.abs(np.fft.rfft(frames * self._window[None, :, None], axis=1)) / self._window.sum()
+        mags = spectra[:, :, 0]
+        self._mag_sum += mags.sum(axis=0)
+        self._side_sum += spectra[:, :, 1].sum(axis=0)
+        self._recent_mag.extend(mags)
+        self._frames += available
+        self._history = self._history[available * STREAM_FFT_HOP :]
+
+    def _window_loudness(self, seconds: float) -> float:
+        count = max(1, int(round(seconds / STREAM_BLOCK_SEC)))
+        recent = self._blocks[-count:]
+        if not recent:
+            return LUFS_FLOOR
+        return _loudness(sum(recent) / (len(recent) * self._block))
+
+    def _integrated_loudness(self) -> float:
+        per_block = int(round(MOMENTARY_SEC / STREAM_BLOCK_SEC))
+        if len(self._blocks) < per_block:
+            return LUFS_FLOOR
+        energy = np.asarray(self._blocks)
+        cumulative = np.concatenate([[0.0], np.cumsum(energy)])
+        powers = (cumulative[per_block:] - cumulative[:-per_block]) / (per_block * self._block)
+        value = gated_loudness(powers)
+        return float(max(value, LUFS_FLOOR)) if np.isfinite(value) else LUFS_FLOOR
+
+    def _recent_correlation(self) -> float:
+        if self.channels < 2 or not self._recent_sums:
+            return 1.0
+        sums = np.sum(self._recent_sums, axis=0)
+        count = len(self._recent_sums) * self._block
+        return stereo_from_sums(count, *[float(value) for value in sums]).correlation
+
+    def snapshot(self) -> StreamSnapshot:
+        recent = (
+            spectral_from_average(self._freqs, np.mean(self._recent_mag, axis=0) + 1e-9).band_energies_db
+            if self._recent_mag
+            else {}
+        )
+        integrated: Dict[str, Any] = {}
+        if self._samples:
+            sums = [float(value) for value in self._totals]
+            if self.channels > 1:
+                integrated["stereo"] = asdict(stereo_from_sums(self._samples, *sums[1:6]))
+                rms_left = float(np.sqrt(sums[3] / self._samples))
+                rms_right = float(np.sqrt(sums[4] / self._samples))
+            else:
+                rms_left = rms_right = None
+            integrated["qa"] = asdict(qa_from_stats(sums[6] / self._samples, rms_left, rms_right, self.sr))
+        if self._frames:
+            average = self._mag_sum / self._frames
+            integrated["spectral"] = asdict(spectral_from_average(self._freqs, average + 1e-9))
+            integrated["low_end"] = asdict(low_end_from_averages(self._freqs, average, self._side_sum / self._frames))
+        return StreamSnapshot(
+            time_sec=self._samples / self.sr,
+            momentary_lufs=self._window_loudness(MOMENTARY_SEC),
+            short_term_lufs=self._window_loudness(SHORT_TERM_SEC),
+            integrated_lufs=self._integrated_loudness(),
+            true_peak_db=peak_to_db(max(self._true_peak, self._pending_true_peak())),
+            sample_peak_db=peak_to_db(self._sample_peak),
+            band_energies_db=recent,
+            correlation=self._recent_correlation(),
+            integrated=integrated,
+        )
+
@@ -40,8 +40,11 @@ def analyze_vocal(audio: np.ndarray, sr: int) -> VocalFindings:
         raise RuntimeError("scipy is required for vocal analysis")
     freqs, _, spec = stft(mono, fs=sr, nperseg=4096, noverlap=2048)
     mag = np.abs(spec) + 1e-9
-    avg = np.mean(mag, axis=1)
+    return vocal_from_average(freqs, np.mean(mag, axis=1))
 
+
+def vocal_from_average(freqs: np.ndarray, avg: np.ndarray) -> VocalFindings:
+    """Vocal findings from the frame-averaged STFT magnitude (|X| + 1e-9)."""
     sibilance = _band_energy(avg, freqs, 5000, 10000)
     presence = _band_energy(avg, freqs, 2000, 5000) + 1e-9
     sibilance_ratio = sibilance / presence
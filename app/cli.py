@@ -0,0 +1,220 @@
+"""Offline bulk analysis: walk a catalog and stream one JSON line per file.
+
+Usage: python -m app.cli CATALOG_DIR -o results.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .analysis.analyzers import resolve_analyzers
+from .analysis.engine import run_analysis
+from .storage import dumps_json
+
+AUDIO_EXTENSIONS = {".wav", ".wave", ".aif", ".aiff", ".flac", ".mp3", ".ogg", ".m4a"}
+
+logger = logging.getLogger(__name__)
+
+
+def iter_audio_files(root: str, extensions: Set[str]) -> Iterator[str]:
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield os.path.join(directory, name)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def completed_digests(output_path: str) -> Set[str]:
+    """Hashes that already have a result line; truncated or failed lines are retried."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "result" in record and record.get("sha256"):
+                done.add(record["sha256"])
+    return done
+
+
+def _analyze_file(
+    path: str,
+    digest: str,
+    mode: str,
+    genre: str,
+    vocal_style: Optional[str],
+    analyzers: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    warnings.simplefilter("ignore")
+    started = time.perf_counter()
+    payload = {
+        "job_id": digest[:32],
+        "mode": mode,
+        "genre": genre,
+        "vocal_style": vocal_style,
+        "audio_path": path,
+        "reference_uploads": [],
+        "extension": os.path.splitext(path)[1].lower(),
+        "analyzers": analyzers,
+        # Files are already spread over the worker processes.
+        "chunked": False,
+    }
+    try:
+        report = run_analysis(payload, persist=False)
+    except Exception as exc:
+        return {
+            "path": path,
+            "sha256": digest,
+            "error": str(exc) or exc.__class__.__name__,
+            "elapsed_sec": time.perf_counter() - started,
+        }
+    return {
+        "path": path,
+        "sha256": digest,
+        "elapsed_sec": time.perf_counter() - started,
+        "result": report,
+    }
+
+
+class Throughput:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.analyzed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.audio_sec = 0.0
+
+    def record(self, record: Dict[str, Any]) -> None:
+        if "error" in record:
+            self.failed += 1
+            return
+        self.analyzed += 1
+        self.audio_sec += float(record["result"].get("duration_sec", 0.0))
+
+    def summary(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (
+            f"analyzed={self.analyzed} failed={self.failed} skipped={self.skipped} "
+            f"elapsed={elapsed:.1f}s files/s={self.analyzed / elapsed:.2f} "
+            f"audio_x_realtime={self.audio_sec / elapsed:.1f}"
+        )
+
+
+def _open_output(path: str):
+    handle = open(path, "ab")
+    if handle.tell() > 0:
+        with open(path, "rb") as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                handle.write(b"\n")
+    return handle
+
+
+def run_catalog(
+    root: str,
+    output_path: str,
+    *,
+    mode: str = "mix",
+    genre: str = "default",
+    vocal_style: Optional[str] = None,
+    analyzers: Optional[List[str]] = None,
+    workers: int = 1,
+    max_in_flight: Optional[int] = None,
+    extensions: Set[str] = AUDIO_EXTENSIONS,
+    report_every: int = 25,
+) -> Throughput:
+    stats = Throughput()
+    done = completed_digests(output_path)
+    limit = max_in_flight or workers * 2
+    pending: Dict[Future, Tuple[str, str]] = {}
+
+    def drain(block_until: int, handle) -> None:
+        while len(pending) > block_until:
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.pop(future)
+                record = future.result()
+                handle.write(dumps_json(record) + b"\n")
+                handle.flush()
+                stats.record(record)
+                total = stats.analyzed + stats.failed
+                if report_every and total % report_every == 0:
+                    print(stats.summary(), file=sys.stderr, flush=True)
+
+    with _open_output(output_path) as handle, ProcessPoolExecutor(max_workers=workers) as pool:
+        for path in iter_audio_files(root, extensions):
+            digest = file_digest(path)
+            if digest in done:
+                stats.skipped += 1
+                continue
+            done.add(digest)
+            pending[pool.submit(_analyze_file, path, digest, mode, genre, vocal_style, analyzers)] = (path, digest)
+            drain(limit - 1, handle)
+        drain(0, handle)
+    return stats
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze an audio catalog offline into JSON lines.")
+    parser.add_argument("root", help="Directory to scan recursively for audio files")
+    parser.add_argument("-o", "--output", required=True, help="JSON lines output; resumed if it exists")
+    parser.add_argument("--mode", default="mix", choices=["vocal", "instrumental", "mix"])
+    parser.add_argument("--genre", default="default")
+    parser.add_argument("--vocal-style", default=None)
+    parser.add_argument(
+        "--analyzers",
+        default=None,
+        help="Comma-separated analyzers or groups to run, e.g. 'delivery'; defaults to what --mode selects",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Defaults to 2x workers")
+    parser.add_argument(
+        "--extensions",
+        default=",".join(sorted(AUDIO_EXTENSIONS)),
+        help="Comma-separated file extensions to include",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        analyzers = resolve_analyzers(args.analyzers.split(",")) if args.analyzers else None
+    except ValueError as exc:
+        parser.error(str(exc))
+    extensions = {f".{ext.strip().lower().lstrip('.')}" for ext in args.extensions.split(",") if ext.strip()}
+    stats = run_catalog(
+        args.root,
+        args.output,
+        mode=args.mode,
+        genre=args.genre,
+        vocal_style=args.vocal_style,
+        analyzers=analyzers,
+        workers=max(1, args.workers),
+        max_in_flight=args.max_in_flight,
+        extensions=extensions,
+    )
+    print(stats.summary(), file=sys.stderr)
+    return 0 if stats.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
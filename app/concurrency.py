@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .config import settings
+
+try:
+    import soundfile as sf
+except Exception:  # pragma: no cover - optional dependency
+    sf = None
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_SR = 48000
+# Peak RSS growth of a default job was ~200 MB plus ~6x the decoded float32 audio
+# (measured on 1, 4 and 10 minute stereo mixes).
+JOB_BASE_MB = 200.0
+# Decoded bytes per file byte when the header gives no duration (lossy input, ~128 kbit/s).
+DECODED_BYTES_PER_FILE_BYTE = 24.0
+CPU_HIGH = 0.9
+CPU_LOW = 0.6
+MAX_DECISIONS = 50
+_MB = 1024.0 * 1024.0
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+# (limit, usage, stat, reclaimable cache key): cgroup v2 first, then the v1 memory controller.
+CGROUP_MEMORY_FILES = (
+    ("memory.max", "memory.current", "memory.stat", "inactive_file"),
+    ("memory/memory.limit_in_bytes", "memory/memory.usage_in_bytes", "memory/memory.stat", "total_inactive_file"),
+)
+# cgroup v1 reports "no limit" as a page-rounded 2**63 - 1.
+CGROUP_V1_UNLIMITED = 1 << 62
+
+
+@dataclass
+class SystemSample:
+    cpu_utilization: Optional[float]
+    available_mb: Optional[float]
+    total_mb: Optional[float]
+
+
+@dataclass
+class ConcurrencyDecision:
+    at: float
+    action: str  # admit | defer | raise | lower
+    target: int
+    in_flight: int
+    reason: str
+    job_id: Optional[str] = None
+    footprint_mb: Optional[float] = None
+    cpu_utilization: Optional[float] = None
+    available_mb: Optional[float] = None
+
+
+def _meminfo() -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as handle:
+            for line in handle:
+                name, _, rest = line.partition(":")
+                values[name] = float(rest.split()[0]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return values
+
+
+def _cpu_times() -> Optional[Tuple[float, float]]:
+    """(busy, total) jiffies over all CPUs since boot."""
+    try:
+        with open("/proc/stat", "r", encoding="ascii") as handle:
+            fields = [float(value) for value in handle.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0.0)
+    return sum(fields) - idle, sum(fields)
+
+
+def _read_cgroup(root: str, name: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, name), "r", encoding="ascii") as handle:
+            return handle.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_stat(root: str, name: str, key: str) -> Optional[float]:
+    for line in (_read_cgroup(root, name) or "").splitlines():
+        field, _, value = line.partition(" ")
+        if field == key:
+            return float(value)
+    return None
+
+
+def cgroup_memory_mb(root: str = CGROUP_ROOT) -> Optional[Tuple[float, float]]:
+    """(limit, in use) of the container's memory cgroup, or None without a limit.
+
+    Reclaimable page cache (inactive files) is not counted as in use, like
+    the working set container runtimes report.
+    """
+    for limit_name, usage_name, stat_name, cache_key in CGROUP_MEMORY_FILES:
+        limit, usage = _read_cgroup(root, limit_name), _read_cgroup(root, usage_name)
+        if limit is None or usage is None:
+            continue
+        try:
+            if limit == "max" or int(limit) >= CGROUP_V1_UNLIMITED:
+                return None
+            cache = _cgroup_stat(root, stat_name, cache_key) or 0.0
+            return int(limit) / _MB, max(0.0, int(usage) - cache) / _MB
+        except ValueError:
+            return None
+    return None
+
+
+def cgroup_cpus(root: str = CGROUP_ROOT) -> Optional[float]:
+    """CPUs the container's quota allows, or None without a quota."""
+    quota = _read_cgroup(root, "cpu.max")
+    if quota is not None:
+        quota, _, period = quota.partition(" ")
+    else:
+        quota, period = _read_cgroup(root, "cpu/cpu.cfs_quota_us"), _read_cgroup(root, "cpu/cpu.cfs_period_us")
+    try:
+        cpus = float(quota) / float(period or 100000)
+    except (TypeError, ValueError):
+        return None
+    return cpus if cpus > 0 else None
+
+
+def _cgroup_cpu_seconds(root: str) -> Optional[float]:
+    """CPU time used by the container's cgroup."""
+    usage = _cgroup_stat(root, "cpu.stat", "usage_usec")
+    if usage is not None:
+        return usage / 1e6
+    usage = _read_cgroup(root, "cpuacct/cpuacct.usage")
+    try:
+        return float(usage) / 1e9 if usage is not None else None
+    except ValueError:
+        return None
+
+
+class SystemSampler:
+    """CPU utilization between calls and available memory, from /proc with portable fallbacks.
+
+    Inside a container with a memory limit or CPU quota (cgroup v2, or v1 on
+    older hosts) those replace the host-wide figures, which would otherwise
+    show the whole machine as free.
+    """
+
+    def __init__(self, cgroup_root: str = CGROUP_ROOT) -> None:
+        self._cgroup_root = cgroup_root
+        self._cpus = cgroup_cpus(cgroup_root)
+        self._last = self._cpu_times()
+
+    def _cpu_times(self) -> Optional[Tuple[float, float]]:
+        """(busy, total) CPU time: the cgroup's usage against its quota, else /proc/stat."""
+        if self._cpus is not None:
+            used = _cgroup_cpu_seconds(self._cgroup_root)
+            if used is not None:
+                return used, time.monotonic() * self._cpus
+        return _cpu_times()
+
+    def sample(self) -> SystemSample:
+        current = self._cpu_times()
+        utilization = None
+        if current is not None and self._last is not None and current[1] > self._last[1]:
+            utilization = min(1.0, (current[0] - self._last[0]) / (current[1] - self._last[1]))
+        elif hasattr(os, "getloadavg"):
+            utilization = min(1.0, os.getloadavg()[0] / (self._cpus or os.cpu_count() or 1))
+        self._last = current
+        meminfo = _meminfo()
+        available, total = meminfo.get("MemAvailable"), meminfo.get("MemTotal")
+        cgroup = cgroup_memory_mb(self._cgroup_root)
+        if cgroup is not None:
+            limit, used = cgroup
+            total = min(total, limit) if total is not None else limit
+            available = min(available, limit - used) if available is not None else limit - used
+        return SystemSample(utilization, available, total)
+
+
+def _audio_mb(path: Optional[str], start_sec: Optional[float], end_sec: Optional[float]) -> float:
+    if not path or not os.path.exists(path):
+        return 0.0
+    if sf is not None:
+        try:
+            info = sf.info(path)
+            duration = info.frames / float(info.samplerate)
+            duration = min(duration, end_sec or duration) - min(start_sec or 0.0, duration)
+            return max(duration, 0.0) * ANALYSIS_SR * info.channels * 4 / _MB
+        except Exception:
+            pass
+    return os.path.getsize(path) * DECODED_BYTES_PER_FILE_BYTE / _MB
+
+
+def estimate_footprint_mb(payload: Dict[str, Any]) -> float:
+    """Peak memory a job is expected to need, from its inputs' duration and channels."""
+    start_sec, end_sec = payload.get("start_sec"), payload.get("end_sec")
+    audio = _audio_mb(payload.get("audio_path"), start_sec, end_sec)
+    stems = [_audio_mb(item.get("path"), start_sec, end_sec) for item in payload.get("stem_uploads") or []]
+    if stems and not payload.get("audio_path"):
+        audio = max(stems)
+    references = [_audio_mb(item.get("path"), None, None) for item in payload.get("reference_uploads") or []]
+    # Stems and references are held decoded next to the mix but only go through lighter analyses.
+    held = sum(stems) + sum(references)
+    return JOB_BASE_MB + settings.job_memory_per_audio_mb * audio + held
+
+
+class ConcurrencyController:
+    """Decides how many analysis jobs run at once.
+
+    A job starts when a slot is free and its estimated footprint fits the
+    memory budget: a fixed share of total memory, further capped by what the
+    system reports available plus what running jobs already hold. The part of
+    a reservation a running job has not grown into yet is not free memory, so
+    it stays out of the budget. The slot
+    target moves between `minimum` and `maximum` with the measured CPU
+    utilization. A job always starts when nothing else is running, however
+    large it is. Non-adaptive controllers keep a fixed slot count and skip
+    the memory check, like the plain worker pool.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        adaptive: bool = True,
+        memory_fraction: float = 0.7,
+        headroom_mb: float = 512.0,
+        interval_sec: float = 2.0,
+        sampler: Optional[SystemSampler] = None,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or initial)
+        self.target = min(max(initial, self.minimum), self.maximum)
+        self.adaptive = adaptive
+        self.memory_fraction = memory_fraction
+        self.headroom_mb = headroom_mb
+        self.interval_sec = interval_sec
+        self._sampler = sampler
+        self._sample = SystemSample(None, None, None)
+        self._running: Dict[str, float] = {}
+        self._idle_available_mb: Optional[float] = None
+        self._waiting: Optional[Tuple[str, float, str]] = None
+        self._decisions: Deque[ConcurrencyDecision] = deque(maxlen=MAX_DECISIONS)
+        self._condition = asyncio.Condition()
+
+    @property
+    def reserved_mb(self) -> float:
+        return sum(self._running.values())
+
+    @property
+    def consumed_mb(self) -> float:
+        """Memory running jobs hold now: the drop in available memory since the last idle sample.
+
+        Capped at their reservations; before any idle sample nothing counts
+        as consumed, so every reservation is treated as still to come.
+        """
+        if self._idle_available_mb is None or self._sample.available_mb is None:
+            return 0.0
+        return min(self.reserved_mb, max(0.0, self._idle_available_mb - self._sample.available_mb))
+
+    def memory_budget_mb(self) -> Optional[float]:
+        limits = []
+        if self._sample.total_mb is not None:
+            limits.append(self._sample.total_mb * self.memory_fraction)
+        if self._sample.available_mb is not None:
+            limits.append(self._sample.available_mb + self.consumed_mb - self.headroom_mb)
+        return min(limits) if limits else None
+
+    def _blocked_by(self, footprint_mb: float) -> Optional[str]:
+        if not self._running:
+            return None
+        if len(self._running) >= self.target:
+            return "slots"
+        budget = self.memory_budget_mb()
+        if self.adaptive and budget is not None and self.reserved_mb + footprint_mb > budget:
+            return "memory"
+        return None
+
+    def _record(self, action: str, reason: str, job_id: Optional[str] = None, footprint_mb: Optional[float] = None) -> None:
+        decision = ConcurrencyDecision(
+            at=time.time(),
+            action=action,
+            target=self.target,
+            in_flight=len(self._running),
+            reason=reason,
+            job_id=job_id,
+            footprint_mb=footprint_mb,
+            cpu_utilization=self._sample.cpu_utilization,
+            available_mb=self._sample.available_mb,
+        )
+        self._decisions.append(decision)
+        if action in {"raise", "lower", "defer"}:
+            logger.info("Concurrency %s (%s): target=%d in_flight=%d", action, reason, self.target, len(self._running))
+
+    async def admit(self, job_id: str, footprint_mb: float) -> None:
+        """Wait until the job may start, then reserve its footprint."""
+        async with self._condition:
+            deferred = None
+            while True:
+                reason = self._blocked_by(footprint_mb)
+                if reason is None:
+                    break
+                if reason != deferred:
+                    self._record("defer", reason, job_id, footprint_mb)
+                    deferred = reason
+                self._waiting = (job_id, footprint_mb, reason)
+                await self._condition.wait()
+            self._waiting = None
+            self._running[job_id] = footprint_mb
+            self._record("admit", "fits", job_id, footprint_mb)
+
+    async def release(self, job_id: str) -> None:
+        async with self._condition:
+            self._running.pop(job_id, None)
+            self._condition.notify_all()
+
+    def adjust(self, sample: SystemSample) -> None:
+        """Move the slot target one step based on a fresh system sample."""
+        self._sample = sample
+        if not self._running and sample.available_mb is not None:
+            self._idle_available_mb = sample.available_mb
+        if not self.adaptive or sample.cpu_utilization is None:
+            return
+        if sample.cpu_utilization > CPU_HIGH and self.target > self.minimum:
+            self.target -= 1
+            self._record("lower", f"cpu {sample.cpu_utilization:.0%}")
+        elif (
+            sample.cpu_utilization < CPU_LOW
+            and self.target < self.maximum
+            and self._waiting is not None
+            and self._waiting[2] == "slots"
+        ):
+            self.target += 1
+            self._record("raise", f"cpu {sample.cpu_utilization:.0%}")
+
+    async def run(self) -> None:
+        sampler = self._sampler or SystemSampler()
+        while True:
+            sample = await asyncio.to_thread(sampler.sample)
+            async with self._condition:
+                self.adjust(sample)
+                self._condition.notify_all()
+            await asyncio.sleep(self.interval_sec)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "adaptive": self.adaptive,
+            "target": self.target,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "in_flight": len(self._running),
+            "reserved_mb": self.reserved_mb,
+            "consumed_mb": self.consumed_mb,
+            "memory_budget_mb": self.memory_budget_mb(),
+            "waiting": (
+                {"job_id": self._waiting[0], "footprint_mb": self._waiting[1], "blocked_by": self._waiting[2]}
+                if self._waiting
+                else None
+            ),
+            "system": asdict(self._sample),
+            "decisions": [asdict(decision) for decision in reversed(self._decisions)],
+        }
@@ -11,9 +11,35 @@ class Settings(BaseSettings):
     data_dir: str = "data"
     uploads_dir: str = "data/uploads"
     results_dir: str = "data/results"
+    features_dir: str = "data/features"
+    previews_dir: str = "data/previews"
+    references_dir: str = "data/references"
+    segments_dir: str = "data/segments"
+    results_index_path: str = "data/results_index.sqlite3"
     genre_profiles_path: str = "config/genre_profiles.json"
+    platform_targets_path: str = "config/platform_targets.json"
     demo_seed: int = 42
     max_upload_mb: int = 500
+    worker_concurrency: int = 2  # starting slot count; fixed when adaptive_concurrency is off
+    adaptive_concurrency: bool = True
+    worker_min_concurrency: int = 1
+    worker_max_concurrency: int = 0  # 0 = one per CPU core, at least worker_concurrency
+    job_memory_per_audio_mb: float = 6.0  # estimated peak MB per MB of decoded audio
+    job_memory_fraction: float = 0.7  # share of total memory analysis jobs may reserve
+    memory_headroom_mb: int = 512
+    concurrency_interval_sec: float = 2.0
+    result_compression_level: int = 6
+    upload_policy: str = "flac"  # keep | flac | delete, applied once analysis is written
+    upload_ttl_hours: float = 168.0
+    result_ttl_days: float = 90.0
+    disk_quota_mb: int = 20000
+    retention_interval_sec: float = 600.0
+    segment_cache_mb: int = 2000
+    # Inputs at least this long have their segments analyzed in a process pool.
+    chunked_min_sec: float = 600.0
+    chunk_workers: int = 0  # 0 = one per CPU core; 1 disables the pool
+    # Lets jobs opt into cProfile/tracemalloc capture (`profile=true`); off unless an admin enables it.
+    profiling_enabled: bool = False
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
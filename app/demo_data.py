@@ -16,6 +16,7 @@ def demo_result(job_id: str, mode: str, genre: str, vocal_style: Optional[str])
 
     report: Dict[str, Any] = {
         "job_id": job_id,
+        "demo": True,
         "mode": mode,
         "genre": genre,
         "vocal_style": vocal_style,
@@ -4,7 +4,9 @@ import asyncio
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set
+
+from .concurrency import ConcurrencyController, estimate_footprint_mb
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +22,23 @@ class JobRecord:
     payload: Dict[str, Any] = field(default_factory=dict)
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    partial: Optional[Dict[str, Any]] = None
+    version: int = 0
+
+
+@dataclass
+class BatchRecord:
+    batch_id: str
+    job_ids: List[str]
+    created_at: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+    album: Optional[Dict[str, Any]] = None
 
 
 class JobStore:
     def __init__(self) -> None:
         self._jobs: Dict[str, JobRecord] = {}
+        self._batches: Dict[str, BatchRecord] = {}
         self._lock = asyncio.Lock()
 
     async def create(self, job_id: str, payload: Dict[str, Any]) -> JobRecord:
@@ -65,18 +79,70 @@ class JobStore:
                 record.error = error
             record.updated_at = time.time()
 
+    async def publish(self, job_id: str, sections: Dict[str, Any]) -> None:
+        """Merge provisional result sections and bump the version pollers compare against."""
+        async with self._lock:
+            record = self._jobs.get(job_id)
+            if not record:
+                return
+            record.partial = {**(record.partial or {}), **sections}
+            record.version += 1
+            record.updated_at = time.time()
+
     async def get(self, job_id: str) -> Optional[JobRecord]:
         async with self._lock:
             return self._jobs.get(job_id)
 
+    async def active_job_ids(self) -> Set[str]:
+        async with self._lock:
+            return {job_id for job_id, record in self._jobs.items() if record.status in {"queued", "processing"}}
+
+    async def protected_job_ids(self) -> Set[str]:
+        """Active jobs plus the jobs whose uploads they re-analyze, which must outlive them."""
+        async with self._lock:
+            active = [record for record in self._jobs.values() if record.status in {"queued", "processing"}]
+            sources = {record.payload.get("source_job_id") for record in active} - {None}
+            return {record.job_id for record in active} | sources
+
+    async def remove(self, job_id: str) -> None:
+        async with self._lock:
+            self._jobs.pop(job_id, None)
+
+    async def create_batch(self, batch_id: str, job_ids: List[str], payload: Dict[str, Any]) -> BatchRecord:
+        async with self._lock:
+            record = BatchRecord(batch_id=batch_id, job_ids=list(job_ids), created_at=time.time(), payload=payload)
+            self._batches[batch_id] = record
+            return record
+
+    async def get_batch(self, batch_id: str) -> Optional[BatchRecord]:
+        async with self._lock:
+            return self._batches.get(batch_id)
+
+    async def set_batch_album(self, batch_id: str, album: Dict[str, Any]) -> None:
+        async with self._lock:
+            record = self._batches.get(batch_id)
+            if record:
+                record.album = album
+
 
 class JobWorker:
-    def __init__(self, store: JobStore, processor) -> None:
+    """Runs queued jobs in order, starting each one when the controller admits it."""
+
+    def __init__(self, store: JobStore, processor, concurrency: int = 1, controller=None) -> None:
         self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
         self._store = store
         self._processor = processor
+        self._controller = controller or ConcurrencyController(concurrency, concurrency, concurrency, adaptive=False)
+        self._tasks: Set[asyncio.Task] = set()
         self._running = False
 
+    @property
+    def controller(self) -> ConcurrencyController:
+        return self._controller
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
     async def enqueue(self, payload: Dict[str, Any]) -> None:
         await self._queue.put(payload)
 
@@ -84,28 +150,40 @@ class JobWorker:
         if self._running:
             return
         self._running = True
-        logger.info("Job worker started")
+        controller = self._controller
+        logger.info("Job worker started with %d-%d slots", controller.minimum, controller.maximum)
+        if controller.adaptive:
+            self._tasks.add(asyncio.create_task(controller.run()))
         while True:
             payload = await self._queue.get()
             job_id = payload.get("job_id")
-            try:
-                await self._store.update(job_id, status="processing", progress=0.05, stage="ingest")
-                result = await self._processor(payload, self._store)
-                await self._store.update(
-                    job_id,
-                    status="done",
-                    progress=1.0,
-                    stage="complete",
-                    result=result,
-                )
-            except Exception as exc:
-                logger.exception("Job failed: %s", job_id)
-                await self._store.update(
-                    job_id,
-                    status="failed",
-                    progress=1.0,
-                    stage="failed",
-                    error=str(exc),
-                )
-            finally:
-                self._queue.task_done()
+            footprint = await asyncio.to_thread(estimate_footprint_mb, payload)
+            await controller.admit(job_id, footprint)
+            task = asyncio.create_task(self._process(payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, payload: Dict[str, Any]) -> None:
+        job_id = payload.get("job_id")
+        try:
+            await self._store.update(job_id, status="processing", progress=0.05, stage="ingest")
+            result = await self._processor(payload, self._store)
+            await self._store.update(
+                job_id,
+                status="done",
+                progress=1.0,
+                stage="complete",
+                result=result,
+            )
+        except Exception as exc:
+            logger.exception("Job failed: %s", job_id)
+            await self._store.update(
+                job_id,
+                status="failed",
+                progress=1.0,
+                stage="failed",
+                error=str(exc),
+            )
+        finally:
+            await self._controller.release(job_id)
+            self._queue.task_done()
@@ -4,35 +4,96 @@ import asyncio
 import json
 import logging
 import os
-from typing import Optional
+from dataclasses import asdict
+from typing import List, Optional
 from uuid import uuid4
 
-from fastapi import FastAPI, File, Form, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, Form, Query, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from .analysis import process_job
+from .analysis.album import compute_album_report
+from .analysis.alignment import align_feature_dirs
+from .analysis.analyzers import resolve_analyzers
+from .analysis.features import read_feature_slice
+from .analysis.partials import shutdown_segment_pool
+from .analysis.fingerprint import load_fingerprint
+from .analysis.quick import ANALYSIS_TIERS, quick_estimate
+from .analysis.previews import load_preview_manifest, read_waveform_tile, spectrogram_tile_path
+from .analysis.streaming import STREAM_FORMATS, PcmDecoder, StreamingAnalyzer
+from .concurrency import ConcurrencyController
 from .config import settings
 from .demo_data import demo_result
 from .jobs import JobStore, JobWorker
-from .schemas import JobCreateResponse, JobStatusResponse
-from .storage import ensure_dirs, result_path, safe_extension, save_upload
+from .references import reference_library
+from .results_index import results_index
+from .retention import RetentionManager, touch_job
+from .schemas import (
+    BatchCreateResponse,
+    BatchStatusResponse,
+    BatchTrackStatus,
+    JobCreateResponse,
+    JobStatusResponse,
+)
+from .storage import (
+    ensure_dirs,
+    features_path,
+    find_upload,
+    previews_path,
+    negotiate_result_file,
+    profile_path,
+    profile_stats_path,
+    result_etag,
+    result_path,
+    safe_extension,
+    save_upload,
+    write_result,
+)
 from .analysis.genre_profiles import load_profiles
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_REFERENCES = 8
+MAX_STEMS = 32
+MAX_STREAM_CHANNELS = 8
+PREVIEW_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 app = FastAPI(title=settings.app_name)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 store = JobStore()
-worker = JobWorker(store, process_job)
+worker = JobWorker(
+    store,
+    process_job,
+    controller=ConcurrencyController(
+        settings.worker_concurrency,
+        minimum=settings.worker_min_concurrency,
+        maximum=settings.worker_max_concurrency or max(os.cpu_count() or 1, settings.worker_concurrency),
+        adaptive=settings.adaptive_concurrency,
+        memory_fraction=settings.job_memory_fraction,
+        headroom_mb=settings.memory_headroom_mb,
+        interval_sec=settings.concurrency_interval_sec,
+    ),
+)
+retention = RetentionManager(store)
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
     ensure_dirs()
+    if await asyncio.to_thread(results_index.count) == 0:
+        indexed = await asyncio.to_thread(results_index.rebuild)
+        if indexed:
+            logger.info("Indexed %d existing results", indexed)
     asyncio.create_task(worker.run())
+    asyncio.create_task(retention.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    await asyncio.to_thread(shutdown_segment_pool)
 
 
 @app.get("/")
@@ -45,6 +106,17 @@ async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/api/storage")
+async def storage_usage() -> dict:
+    return asdict(await asyncio.to_thread(retention.usage))
+
+
+@app.get("/api/metrics")
+async def service_metrics() -> dict:
+    """Job queue and concurrency controller state, with its recent decisions."""
+    return {"queued": worker.queued(), "concurrency": worker.controller.snapshot()}
+
+
 @app.get("/api/genres")
 async def genres() -> dict:
     profiles = load_profiles()
@@ -60,32 +132,78 @@ async def create_job(
     demo: Optional[str] = Form(None),
     audio: Optional[UploadFile] = File(None),
     reference: Optional[UploadFile] = File(None),
+    references: Optional[List[UploadFile]] = File(None),
+    reference_id: Optional[str] = Form(None),
+    reference_ids: Optional[str] = Form(None),
+    stems: Optional[List[UploadFile]] = File(None),
+    start_sec: Optional[float] = Form(None),
+    end_sec: Optional[float] = Form(None),
+    tier: str = Form("standard"),
+    analyzers: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
 ) -> JobCreateResponse:
     job_id = str(uuid4())
     is_demo = str(demo).lower() in {"1", "true", "yes"}
+    is_profiled = str(profile).lower() in {"1", "true", "yes"}
+    if is_profiled and not settings.profiling_enabled:
+        return JSONResponse(status_code=403, content={"error": "Profiling is disabled on this server"})
+    region_error = _region_error(start_sec, end_sec)
+    if region_error:
+        return JSONResponse(status_code=400, content={"error": region_error})
+    if tier not in ANALYSIS_TIERS:
+        return JSONResponse(status_code=400, content={"error": f"tier must be one of {', '.join(ANALYSIS_TIERS)}"})
+    selected = None
+    if analyzers:
+        try:
+            selected = resolve_analyzers(analyzers.split(","))
+        except ValueError as exc:
+            return JSONResponse(status_code=400, content={"error": str(exc)})
 
     if is_demo:
         result = demo_result(job_id, mode, genre, vocal_style)
         await store.create(job_id, {"mode": mode, "genre": genre})
         await store.update(job_id, status="done", progress=1.0, stage="complete", result=result)
-        with open(result_path(job_id), "w", encoding="utf-8") as handle:
-            json.dump(result, handle, indent=2)
+        write_result(job_id, result, index=False)
         return JobCreateResponse(job_id=job_id, status="done")
 
-    if audio is None:
+    stems = list(stems or [])
+    if len(stems) > MAX_STEMS:
+        return JSONResponse(status_code=400, content={"error": f"At most {MAX_STEMS} stems per job"})
+    if audio is None and len(stems) < 2:
         await store.create(job_id, {"mode": mode, "genre": genre})
         await store.update(job_id, status="failed", progress=1.0, stage="failed", error="Lydfil mangler")
         return JobCreateResponse(job_id=job_id, status="failed")
 
-    ext = safe_extension(audio.filename)
-    audio_path = os.path.join(settings.uploads_dir, f"{job_id}{ext or '.wav'}")
-    await save_upload(audio, audio_path)
+    ids = [reference_id] if reference_id else []
+    ids += [item.strip() for item in (reference_ids or "").split(",") if item.strip()]
+    files = ([reference] if reference is not None else []) + list(references or [])
+    if len(ids) + len(files) > MAX_REFERENCES:
+        return JSONResponse(status_code=400, content={"error": f"At most {MAX_REFERENCES} references per job"})
+    missing = [item for item in ids if reference_library.get(item) is None]
+    if missing:
+        return JSONResponse(status_code=404, content={"error": f"Reference not found: {', '.join(missing)}"})
+
+    audio_path = None
+    if audio is not None:
+        ext = safe_extension(audio.filename)
+        audio_path = os.path.join(settings.uploads_dir, f"{job_id}{ext or '.wav'}")
+        await save_upload(audio, audio_path)
+    else:
+        ext = safe_extension(stems[0].filename)
+
+    stem_uploads = []
+    for index, upload in enumerate(stems):
+        stem_ext = safe_extension(upload.filename)
+        stem_path = os.path.join(settings.uploads_dir, f"{job_id}-stem{index}{stem_ext or '.wav'}")
+        await save_upload(upload, stem_path)
+        stem_uploads.append({"path": stem_path, "name": upload.filename})
 
-    reference_path = None
-    if reference is not None:
-        ref_ext = safe_extension(reference.filename)
-        reference_path = os.path.join(settings.uploads_dir, f"{job_id}-ref{ref_ext or '.wav'}")
-        await save_upload(reference, reference_path)
+    reference_uploads = []
+    for index, upload in enumerate(files):
+        ref_ext = safe_extension(upload.filename)
+        reference_path = os.path.join(settings.uploads_dir, f"{job_id}-ref{index}{ref_ext or '.wav'}")
+        await save_upload(upload, reference_path)
+        reference_uploads.append({"path": reference_path, "name": upload.filename})
 
     payload = {
         "job_id": job_id,
@@ -93,17 +211,81 @@ async def create_job(
         "genre": genre,
         "vocal_style": vocal_style,
         "audio_path": audio_path,
-        "reference_path": reference_path,
+        "reference_uploads": reference_uploads,
+        "reference_ids": ids,
+        "stem_uploads": stem_uploads,
         "extension": ext,
+        "start_sec": start_sec,
+        "end_sec": end_sec,
+        "tier": tier,
+        "analyzers": selected,
+        "profile": is_profiled,
     }
 
+    await store.create(job_id, payload)
+    await worker.enqueue(payload)
+    provisional = None
+    if tier == "quick" and audio_path:
+        # Computed in the request on a worker thread, so it does not wait behind other jobs
+        # and the event loop stays free while the file decodes.
+        try:
+            provisional = await asyncio.to_thread(quick_estimate, audio_path, start_sec, end_sec)
+            await store.publish(job_id, provisional)
+        except Exception:
+            logger.exception("Quick estimate failed for %s", job_id)
+    return JobCreateResponse(job_id=job_id, status="queued", provisional=provisional)
+
+
+def _region_error(start_sec: Optional[float], end_sec: Optional[float]) -> Optional[str]:
+    if start_sec is not None and start_sec < 0:
+        return "start_sec must be zero or positive"
+    if end_sec is not None and end_sec <= (start_sec or 0.0):
+        return "end_sec must be greater than start_sec"
+    return None
+
+
+@app.post("/api/jobs/{source_job_id}/reanalyze", response_model=JobCreateResponse)
+async def reanalyze_job(
+    source_job_id: str,
+    mode: Optional[str] = Form(None),
+    genre: Optional[str] = Form(None),
+    vocal_style: Optional[str] = Form(None),
+    start_sec: Optional[float] = Form(None),
+    end_sec: Optional[float] = Form(None),
+) -> JobCreateResponse:
+    region_error = _region_error(start_sec, end_sec)
+    if region_error:
+        return JSONResponse(status_code=400, content={"error": region_error})
+    source = await store.get(source_job_id)
+    source_payload = source.payload if source else {}
+    if source and source.status in {"queued", "processing"}:
+        return JSONResponse(status_code=409, content={"error": "Source job is still running"})
+    audio_path = source_payload.get("audio_path") or find_upload(source_job_id)
+    if not audio_path or not os.path.exists(audio_path):
+        return JSONResponse(status_code=404, content={"error": "Original upload not found"})
+
+    job_id = str(uuid4())
+    payload = {
+        "job_id": job_id,
+        "mode": mode or source_payload.get("mode", "mix"),
+        "genre": genre or source_payload.get("genre", "default"),
+        "vocal_style": vocal_style or source_payload.get("vocal_style"),
+        "audio_path": audio_path,
+        "reference_uploads": [],
+        "extension": source_payload.get("extension") or os.path.splitext(audio_path)[1].lower(),
+        "start_sec": start_sec,
+        "end_sec": end_sec,
+        "analyzers": source_payload.get("analyzers"),
+        "source_job_id": source_job_id,
+        "owns_upload": False,
+    }
     await store.create(job_id, payload)
     await worker.enqueue(payload)
     return JobCreateResponse(job_id=job_id, status="queued")
 
 
 @app.get("/api/jobs/{job_id}", response_model=JobStatusResponse)
-async def job_status(job_id: str) -> JobStatusResponse:
+async def job_status(job_id: str, since: int = Query(-1)) -> JobStatusResponse:
     record = await store.get(job_id)
     if record is None:
         return JobStatusResponse(job_id=job_id, status="not_found", progress=0.0, stage="unknown")
@@ -114,14 +296,338 @@ async def job_status(job_id: str) -> JobStatusResponse:
         stage=record.stage,
         result=record.result,
         error=record.error,
+        version=record.version,
+        # Pollers pass the last version they saw and only get sections again when something changed.
+        partial=record.partial if record.result is None and record.version > since else None,
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {token.strip().removeprefix("W/") for token in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@app.post("/api/batches", response_model=BatchCreateResponse)
+async def create_batch(
+    mode: str = Form(...),
+    genre: str = Form(...),
+    vocal_style: Optional[str] = Form(None),
+    files: List[UploadFile] = File(...),
+) -> BatchCreateResponse:
+    batch_id = str(uuid4())
+    job_ids: List[str] = []
+    payloads = []
+    for upload in files:
+        job_id = str(uuid4())
+        ext = safe_extension(upload.filename)
+        audio_path = os.path.join(settings.uploads_dir, f"{job_id}{ext or '.wav'}")
+        await save_upload(upload, audio_path)
+        payloads.append(
+            {
+                "job_id": job_id,
+                "mode": mode,
+                "genre": genre,
+                "vocal_style": vocal_style,
+                "audio_path": audio_path,
+                "reference_uploads": [],
+                "extension": ext,
+                "batch_id": batch_id,
+                "filename": upload.filename,
+            }
+        )
+        job_ids.append(job_id)
+
+    await store.create_batch(batch_id, job_ids, {"mode": mode, "genre": genre, "vocal_style": vocal_style})
+    for payload in payloads:
+        await store.create(payload["job_id"], payload)
+        await worker.enqueue(payload)
+    return BatchCreateResponse(batch_id=batch_id, job_ids=job_ids, status="queued")
+
+
+@app.get("/api/batches/{batch_id}", response_model=BatchStatusResponse)
+async def batch_status(batch_id: str) -> BatchStatusResponse:
+    batch = await store.get_batch(batch_id)
+    if batch is None:
+        return BatchStatusResponse(batch_id=batch_id, status="not_found", progress=0.0, tracks=[])
+
+    records = [await store.get(job_id) for job_id in batch.job_ids]
+    tracks = [
+        BatchTrackStatus(
+            job_id=job_id,
+            filename=record.payload.get("filename") if record else None,
+            status=record.status if record else "not_found",
+            progress=record.progress if record else 0.0,
+            stage=record.stage if record else "unknown",
+            error=record.error if record else None,
+        )
+        for job_id, record in zip(batch.job_ids, records)
+    ]
+    statuses = {track.status for track in tracks}
+    if statuses & {"queued", "processing"}:
+        status = "processing" if statuses - {"queued"} else "queued"
+    elif "done" in statuses:
+        status = "done"
+    else:
+        status = "failed"
+
+    if status == "done" and batch.album is None:
+        results = [record.result for record in records if record and record.status == "done" and record.result]
+        album = compute_album_report(
+            results,
+            batch.payload["genre"],
+            batch.payload["mode"],
+            batch.payload.get("vocal_style"),
+        )
+        await store.set_batch_album(batch_id, asdict(album))
+        batch = await store.get_batch(batch_id)
+
+    progress = sum(track.progress for track in tracks) / max(len(tracks), 1)
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        status=status,
+        progress=progress,
+        tracks=tracks,
+        album=batch.album,
     )
 
 
+@app.post("/api/references")
+async def create_reference(audio: UploadFile = File(...), name: Optional[str] = Form(None)) -> JSONResponse:
+    ext = safe_extension(audio.filename)
+    upload_path = os.path.join(settings.references_dir, f"upload-{uuid4()}{ext or '.wav'}")
+    await save_upload(audio, upload_path)
+    try:
+        entry = await asyncio.to_thread(reference_library.add, upload_path, name or audio.filename)
+    except Exception as exc:
+        logger.exception("Reference analysis failed")
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+    return JSONResponse(content=asdict(entry))
+
+
+@app.get("/api/references")
+async def list_references() -> dict:
+    return {"references": [asdict(entry) for entry in reference_library.list()]}
+
+
+@app.get("/api/references/{ref_id}")
+async def get_reference(ref_id: str) -> JSONResponse:
+    data = await asyncio.to_thread(reference_library.describe, ref_id)
+    if data is None:
+        return JSONResponse(status_code=404, content={"error": "Reference not found"})
+    return JSONResponse(content=data)
+
+
+@app.get("/api/references/{ref_id}/similar")
+async def similar_references(
+    ref_id: str,
+    k: int = Query(5, ge=1, le=100),
+    metric: str = Query("l2", pattern="^(l2|cosine)$"),
+) -> JSONResponse:
+    entry = reference_library.get(ref_id)
+    if entry is None:
+        return JSONResponse(status_code=404, content={"error": "Reference not found"})
+    matches = reference_library.suggest(entry.fingerprint, k=k, metric=metric, exclude=ref_id)
+    return JSONResponse(content={"ref_id": ref_id, "metric": metric, "references": matches})
+
+
+@app.delete("/api/references/{ref_id}")
+async def delete_reference(ref_id: str) -> JSONResponse:
+    if not reference_library.delete(ref_id):
+        return JSONResponse(status_code=404, content={"error": "Reference not found"})
+    return JSONResponse(content={"deleted": ref_id})
+
+
+@app.get("/api/results")
+async def query_results(
+    request: Request,
+    sort: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    group_by: Optional[str] = Query(None),
+    metrics: Optional[str] = Query(None),
+) -> JSONResponse:
+    params = dict(request.query_params)
+    metric_names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else None
+    try:
+        page = await asyncio.to_thread(results_index.query, params, sort, limit, offset)
+        page["stats"] = (await asyncio.to_thread(results_index.aggregate, params, metric_names))[0]
+        if group_by:
+            page["groups"] = await asyncio.to_thread(results_index.aggregate, params, metric_names, group_by)
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    return JSONResponse(content=page)
+
+
+@app.get("/api/results/genre-fit")
+async def results_genre_fit(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=20000),
+    offset: int = Query(0, ge=0),
+) -> JSONResponse:
+    try:
+        page = await asyncio.to_thread(results_index.genre_fit, dict(request.query_params), limit, offset)
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    return JSONResponse(content=page)
+
+
 @app.get("/api/results/{job_id}")
-async def job_result(job_id: str) -> JSONResponse:
+async def job_result(job_id: str, request: Request) -> Response:
     path = result_path(job_id)
     if not os.path.exists(path):
         return JSONResponse(status_code=404, content={"error": "Result not found"})
-    with open(path, "r", encoding="utf-8") as handle:
-        data = json.load(handle)
-    return JSONResponse(content=data)
+    etag = result_etag(job_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    # Revalidations are reads too; with no-cache they are most of the reads of a result in use.
+    touch_job(job_id)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    served_path, encoding = negotiate_result_file(job_id, request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return FileResponse(served_path, media_type="application/json", headers=headers)
+
+
+@app.get("/api/jobs/{job_id}/profile")
+async def job_profile(job_id: str, format: str = Query("json")) -> Response:
+    """Profile of a job submitted with `profile=true`: a JSON summary, or the raw pstats dump."""
+    if not settings.profiling_enabled:
+        return JSONResponse(status_code=403, content={"error": "Profiling is disabled on this server"})
+    if format not in {"json", "pstats"}:
+        return JSONResponse(status_code=400, content={"error": "format must be json or pstats"})
+    path = profile_path(job_id) if format == "json" else profile_stats_path(job_id)
+    if not os.path.exists(path):
+        return JSONResponse(status_code=404, content={"error": "Profile not found"})
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{job_id}.pstats")
+    return FileResponse(path, media_type="application/json")
+
+
+@app.get("/api/jobs/{job_id}/features")
+async def job_features(
+    job_id: str,
+    start: float = Query(0.0, ge=0.0),
+    end: Optional[float] = Query(None, ge=0.0),
+    tracks: Optional[str] = Query(None),
+) -> JSONResponse:
+    names = [name.strip() for name in tracks.split(",") if name.strip()] if tracks else None
+    try:
+        data = await asyncio.to_thread(read_feature_slice, features_path(job_id), start, end, names)
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "Features not found"})
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    return JSONResponse(content={"job_id": job_id, **data})
+
+
+@app.get("/api/jobs/{job_id}/align/{other_job_id}")
+async def align_jobs(
+    job_id: str,
+    other_job_id: str,
+    segment_sec: float = Query(10.0, ge=1.0, le=120.0),
+    drift: bool = Query(True),
+) -> JSONResponse:
+    try:
+        alignment = await asyncio.to_thread(
+            align_feature_dirs, features_path(job_id), features_path(other_job_id), segment_sec, drift
+        )
+    except FileNotFoundError:
+        return JSONResponse(status_code=404, content={"error": "Features not found"})
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    return JSONResponse(content={"job_id": job_id, "other_job_id": other_job_id, **asdict(alignment)})
+
+
+@app.get("/api/jobs/{job_id}/suggested-references")
+async def suggested_references(
+    job_id: str,
+    k: int = Query(5, ge=1, le=100),
+    metric: str = Query("l2", pattern="^(l2|cosine)$"),
+) -> JSONResponse:
+    fingerprint = load_fingerprint(features_path(job_id))
+    if fingerprint is None:
+        return JSONResponse(status_code=404, content={"error": "Fingerprint not found"})
+    matches = reference_library.suggest(fingerprint, k=k, metric=metric)
+    return JSONResponse(content={"job_id": job_id, "metric": metric, "references": matches})
+
+
+@app.websocket("/api/stream")
+async def stream_analysis(
+    websocket: WebSocket,
+    sr: int = 48000,
+    channels: int = 2,
+    format: str = "f32",
+) -> None:
+    """Rolling meters for PCM pushed while a mix plays.
+
+    Binary messages carry interleaved little-endian PCM (`f32`, `s16` or
+    `s32`); each one is answered with a metrics snapshot. The text message
+    `{"type": "reset"}` starts a new measurement.
+    """
+    await websocket.accept()
+    if format not in STREAM_FORMATS or not 1 <= channels <= MAX_STREAM_CHANNELS or not 8000 <= sr <= 192000:
+        await websocket.close(code=1008, reason="Unsupported stream format")
+        return
+    analyzer = StreamingAnalyzer(sr, channels)
+    decoder = PcmDecoder(format, channels)
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                audio = decoder.decode(message["bytes"])
+                snapshot = await asyncio.to_thread(analyzer.update, audio)
+                await websocket.send_json(asdict(snapshot))
+            elif _stream_command(message.get("text")) == "reset":
+                analyzer = StreamingAnalyzer(sr, channels)
+                decoder = PcmDecoder(format, channels)
+                await websocket.send_json({"type": "reset"})
+    except WebSocketDisconnect:
+        pass
+
+
+def _stream_command(text: Optional[str]) -> Optional[str]:
+    try:
+        command = json.loads(text or "")
+    except ValueError:
+        return None
+    return command.get("type") if isinstance(command, dict) else None
+
+
+@app.get("/api/jobs/{job_id}/previews")
+async def job_previews(job_id: str) -> JSONResponse:
+    manifest = load_preview_manifest(previews_path(job_id))
+    if manifest is None:
+        return JSONResponse(status_code=404, content={"error": "Previews not found"})
+    return JSONResponse(content={"job_id": job_id, **manifest})
+
+
+@app.get("/api/jobs/{job_id}/waveform/{level}/{tile}")
+async def waveform_tile(job_id: str, level: int, tile: int, request: Request) -> Response:
+    # Existence first: a tile evicted by retention must not be confirmed by a stale ETag.
+    data = read_waveform_tile(previews_path(job_id), level, tile)
+    if data is None:
+        return JSONResponse(status_code=404, content={"error": "Tile not found"})
+    etag = f'"{job_id}-w{level}-{tile}"'
+    headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type="application/octet-stream", headers=headers)
+
+
+@app.get("/api/jobs/{job_id}/spectrogram/{level}/{tile}.png")
+async def spectrogram_tile(job_id: str, level: int, tile: int, request: Request) -> Response:
+    path = spectrogram_tile_path(previews_path(job_id), level, tile)
+    if not os.path.exists(path):
+        return JSONResponse(status_code=404, content={"error": "Tile not found"})
+    etag = f'"{job_id}-s{level}-{tile}"'
+    headers = {"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/png", headers=headers)
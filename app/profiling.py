@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from .storage import profile_stats_path, write_profile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_ALLOCATIONS = 25
+# Frames kept per allocation, enough to reach from numpy up into librosa/scipy and the analyzer.
+TRACEMALLOC_FRAMES = 12
+
+_MB = 1024.0 * 1024.0
+# tracemalloc is process-wide, so only one profiled job at a time traces memory.
+_memory_lock = threading.Lock()
+# So is cProfile from Python 3.12 (it runs on sys.monitoring), where a second
+# enabled profiler raises; one profiled job at a time collects call statistics.
+_cpu_lock = threading.Lock()
+_IGNORED_FRAMES = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _function_label(key: tuple) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name
+    return f"{filename}:{line}({name})"
+
+
+class JobProfiler:
+    """cProfile plus tracemalloc around one job's analysis.
+
+    Up to Python 3.11 cProfile only sees the thread that calls `start`; from
+    3.12 it records every thread of the process, so calls of jobs running
+    alongside show up too. Segment work handed to the process pool is never
+    profiled. A job that starts while another one holds cProfile (or
+    tracemalloc) runs without it rather than failing. Memory is sampled at
+    every progress stage: the peak of the stage that just ended, and a
+    snapshot whose largest allocation sites are kept from the stage boundary
+    with the biggest live footprint.
+    """
+
+    def __init__(self, job_id: str) -> None:
+        self.job_id = job_id
+        self._profile = cProfile.Profile()
+        self._trace_memory = False
+        self._profile_cpu = False
+        self._started = 0.0
+        self._wall_sec = 0.0
+        self._stage = "decode"
+        self._stage_started = 0.0
+        self._stages: List[Dict[str, Any]] = []
+        self._largest: Optional[tracemalloc.Snapshot] = None
+        self._largest_bytes = -1
+
+    def start(self) -> None:
+        self._started = self._stage_started = time.perf_counter()
+        self._trace_memory = not tracemalloc.is_tracing() and _memory_lock.acquire(blocking=False)
+        if self._trace_memory:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._profile_cpu = _cpu_lock.acquire(blocking=False)
+        if self._profile_cpu:
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Another tool (a debugger, coverage) holds the profiler hook.
+                _cpu_lock.release()
+                self._profile_cpu = False
+        if not self._profile_cpu:
+            logger.info("cProfile is busy; profiling %s without call statistics", self.job_id)
+
+    def mark(self, stage: str) -> None:
+        if stage == self._stage:
+            return
+        if self._profile_cpu:
+            self._profile.disable()
+        self._close_stage()
+        self._stage = stage
+        self._stage_started = time.perf_counter()
+        if self._profile_cpu:
+            self._profile.enable()
+
+    def _close_stage(self) -> None:
+        entry: Dict[str, Any] = {"stage": self._stage, "elapsed_sec": time.perf_counter() - self._stage_started}
+        if self._trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            entry["current_mb"] = current / _MB
+            entry["peak_mb"] = peak / _MB
+            if current > self._largest_bytes:
+                self._largest_bytes = current
+                self._largest = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            tracemalloc.reset_peak()
+        self._stages.append(entry)
+
+    def stop(self) -> Dict[str, Any]:
+        if self._profile_cpu:
+            self._profile.disable()
+        self._wall_sec = time.perf_counter() - self._started
+        self._close_stage()
+        if self._trace_memory:
+            tracemalloc.stop()
+            _memory_lock.release()
+        if self._profile_cpu:
+            _cpu_lock.release()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        stats = pstats.Stats(self._profile).stats if self._profile_cpu else {}
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+        functions = [
+            {
+                "function": _function_label(key),
+                "calls": calls,
+                "total_sec": total,
+                "cumulative_sec": cumulative,
+            }
+            for key, (_, calls, total, cumulative, _) in ranked
+        ]
+        allocations: List[Dict[str, Any]] = []
+        if self._largest is not None:
+            for stat in self._largest.statistics("traceback")[:PROFILE_TOP_ALLOCATIONS]:
+                allocations.append(
+                    {
+                        "size_mb": stat.size / _MB,
+                        "blocks": stat.count,
+                        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    }
+                )
+        return {
+            "job_id": self.job_id,
+            "wall_sec": self._wall_sec,
+            "memory_traced": self._trace_memory,
+            "calls_profiled": self._profile_cpu,
+            "stages": self._stages,
+            "functions": functions,
+            "allocations": allocations,
+        }
+
+    def save(self, summary: Dict[str, Any]) -> None:
+        """Store the summary and the raw stats (loadable with pstats/snakeviz) next to the result."""
+        write_profile(self.job_id, summary)
+        if self._profile_cpu:
+            self._profile.dump_stats(profile_stats_path(self.job_id))
+        logger.info("Stored profile for %s (%.1fs)", self.job_id, summary["wall_sec"])
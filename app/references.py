@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from .analysis.fingerprint import FingerprintIndex, Neighbor, profile_fingerprint
+from .analysis.channels import stereo_downmix
+from .analysis.ingest import load_audio
+from .analysis.reference import THIRD_OCTAVE_CENTERS_HZ, ReferenceProfile, build_reference_profile
+from .config import settings
+
+
+@dataclass
+class ReferenceEntry:
+    ref_id: str
+    name: str
+    sha256: str
+    created_at: float
+    duration_sec: float
+    metrics: Dict[str, float]
+    fingerprint: Optional[List[float]] = None
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ReferenceLibrary:
+    """Reference tracks analyzed once and kept as compact metrics + curves.
+
+    Entries live in `index.json`; the third-octave spectrum and short-term
+    loudness curve of each entry are stored in `<ref_id>.npz` next to it.
+    Fingerprints are kept in the index too, so the nearest-neighbour matrix
+    is rebuilt without opening any `.npz`.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self._directory = directory
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, ReferenceEntry]] = None
+        self._loaded_from: Optional[str] = None
+        self._profiles: Dict[str, ReferenceProfile] = {}
+        self._fingerprints = FingerprintIndex()
+
+    @property
+    def directory(self) -> str:
+        return self._directory or settings.references_dir
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def _arrays_path(self, ref_id: str) -> str:
+        return os.path.join(self.directory, f"{ref_id}.npz")
+
+    def _load(self) -> Dict[str, ReferenceEntry]:
+        if self._entries is not None and self._loaded_from == self.directory:
+            return self._entries
+        entries: Dict[str, ReferenceEntry] = {}
+        if os.path.exists(self._index_path()):
+            with open(self._index_path(), "r", encoding="utf-8") as handle:
+                for item in json.load(handle):
+                    entries[item["ref_id"]] = ReferenceEntry(**item)
+        self._entries = entries
+        self._loaded_from = self.directory
+        self._profiles = {}
+        missing = [entry for entry in entries.values() if entry.fingerprint is None]
+        for entry in missing:
+            # Entries from before fingerprints existed are backfilled from their arrays once.
+            entry.fingerprint = [float(value) for value in profile_fingerprint(self.profile(entry.ref_id))]
+        if missing:
+            self._save()
+        self._fingerprints.rebuild(
+            list(entries), [np.asarray(entry.fingerprint, dtype=np.float32) for entry in entries.values()]
+        )
+        return entries
+
+    def _save(self) -> None:
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self._index_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump([asdict(entry) for entry in self._load().values()], handle)
+        os.replace(tmp_path, self._index_path())
+
+    def list(self) -> List[ReferenceEntry]:
+        with self._lock:
+            return sorted(self._load().values(), key=lambda entry: entry.created_at)
+
+    def get(self, ref_id: str) -> Optional[ReferenceEntry]:
+        with self._lock:
+            return self._load().get(ref_id)
+
+    def find_by_digest(self, sha256: str) -> Optional[ReferenceEntry]:
+        with self._lock:
+            for entry in self._load().values():
+                if entry.sha256 == sha256:
+                    return entry
+            return None
+
+    def profile(self, ref_id: str) -> Optional[ReferenceProfile]:
+        """Cached metrics and curves of an entry; never decodes audio."""
+        with self._lock:
+            entry = self._load().get(ref_id)
+            if entry is None:
+                return None
+            if ref_id not in self._profiles:
+                with np.load(self._arrays_path(ref_id)) as arrays:
+                    self._profiles[ref_id] = ReferenceProfile(
+                        metrics=dict(entry.metrics),
+                        third_octave_db=arrays["third_octave_db"],
+                        loudness_curve=arrays["loudness_curve"].astype(np.float32),
+                        hop_sec=float(arrays["hop_sec"]),
+                        duration_sec=entry.duration_sec,
+                    )
+            return self._profiles[ref_id]
+
+    def add(self, path: str, name: Optional[str] = None, sha256: Optional[str] = None) -> ReferenceEntry:
+        """Analyze a reference file unless the same content is already in the library."""
+        digest = sha256 or file_sha256(path)
+        existing = self.find_by_digest(digest)
+        if existing is not None:
+            return existing
+
+        data = load_audio(path)
+        data.audio = stereo_downmix(data.audio)
+        profile = build_reference_profile(data)
+        entry = ReferenceEntry(
+            ref_id=str(uuid4()),
+            name=name or os.path.basename(path),
+            sha256=digest,
+            created_at=time.time(),
+            duration_sec=profile.duration_sec,
+            metrics=profile.metrics,
+            fingerprint=[float(value) for value in profile_fingerprint(profile)],
+        )
+        with self._lock:
+            existing = self.find_by_digest(digest)
+            if existing is not None:
+                return existing
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+            np.savez(
+                self._arrays_path(entry.ref_id),
+                third_octave_db=profile.third_octave_db.astype(np.float32),
+                loudness_curve=profile.loudness_curve.astype(np.float16),
+                hop_sec=np.float32(profile.hop_sec),
+            )
+            self._load()[entry.ref_id] = entry
+            self._profiles[entry.ref_id] = profile
+            self._fingerprints.add(entry.ref_id, np.asarray(entry.fingerprint, dtype=np.float32))
+            self._save()
+        return entry
+
+    def delete(self, ref_id: str) -> bool:
+        with self._lock:
+            entry = self._load().pop(ref_id, None)
+            if entry is None:
+                return False
+            self._profiles.pop(ref_id, None)
+            self._fingerprints.remove(ref_id)
+            try:
+                os.remove(self._arrays_path(ref_id))
+            except FileNotFoundError:
+                pass
+            self._save()
+            return True
+
+    def nearest(
+        self,
+        fingerprint: np.ndarray,
+        k: int = 5,
+        metric: str = "l2",
+        exclude: Optional[str] = None,
+    ) -> List[Neighbor]:
+        """The k entries whose fingerprints are closest to `fingerprint`."""
+        with self._lock:
+            self._load()
+            return self._fingerprints.search(fingerprint, k=k, metric=metric, exclude=exclude)
+
+    def suggest(self, fingerprint: np.ndarray, k: int = 5, metric: str = "l2", exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = self._load()
+            return [
+                {"ref_id": item.ref_id, "name": entries[item.ref_id].name, "distance": round(item.distance, 4)}
+                for item in self.nearest(fingerprint, k=k, metric=metric, exclude=exclude)
+            ]
+
+    def describe(self, ref_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.get(ref_id)
+        profile = self.profile(ref_id) if entry else None
+        if entry is None or profile is None:
+            return None
+        return {
+            **asdict(entry),
+            "third_octave_hz": [round(float(value), 1) for value in THIRD_OCTAVE_CENTERS_HZ],
+            "third_octave_db": [round(float(value), 2) for value in profile.third_octave_db],
+            "loudness_curve_hop_sec": profile.hop_sec,
+            "loudness_curve": [round(float(value), 2) for value in profile.loudness_curve],
+        }
+
+
+reference_library = ReferenceLibrary()
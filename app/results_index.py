@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+TEXT_COLUMNS = ["mode", "genre", "vocal_style", "key"]
+NUMERIC_COLUMNS = [
+    "created_at",
+    "duration_sec",
+    "integrated_lufs",
+    "short_term_lufs",
+    "true_peak_db",
+    "crest_factor_db",
+    "spectral_tilt_db_per_oct",
+    "stereo_width",
+    "stereo_correlation",
+    "bpm",
+    "score_loudness",
+    "score_spectral_balance",
+    "score_stereo",
+    "score_dynamics",
+    "score_noise",
+]
+COLUMNS = ["job_id"] + TEXT_COLUMNS + NUMERIC_COLUMNS
+GROUPABLE = TEXT_COLUMNS + ["month"]
+MAX_PAGE_SIZE = 500
+# Genre fit pages are scored in one vectorized pass, so they may be much larger.
+MAX_FIT_PAGE_SIZE = 20000
+FIT_COLUMNS = ["integrated_lufs", "spectral_tilt_db_per_oct", "stereo_width", "crest_factor_db"]
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+def _row_from_report(report: Dict[str, Any], created_at: float) -> Dict[str, Any]:
+    metrics = report.get("metrics", {})
+    loudness = metrics.get("loudness", {})
+    spectral = metrics.get("spectral", {})
+    stereo = metrics.get("stereo", {})
+    bpm_key = report.get("bpm_key") or {}
+    scores = report.get("scores", {})
+    return {
+        "job_id": report["job_id"],
+        "mode": report.get("mode"),
+        "genre": report.get("genre"),
+        "vocal_style": report.get("vocal_style"),
+        "key": bpm_key.get("key"),
+        "created_at": created_at,
+        "duration_sec": _number(report.get("duration_sec")),
+        "integrated_lufs": _number(loudness.get("integrated_lufs")),
+        "short_term_lufs": _number(loudness.get("short_term_lufs")),
+        "true_peak_db": _number(loudness.get("true_peak_db")),
+        "crest_factor_db": _number(loudness.get("crest_factor_db")),
+        "spectral_tilt_db_per_oct": _number(spectral.get("spectral_tilt_db_per_oct")),
+        "stereo_width": _number(stereo.get("width")),
+        "stereo_correlation": _number(stereo.get("correlation")),
+        "bpm": _number(bpm_key.get("bpm")),
+        "score_loudness": _number(scores.get("loudness")),
+        "score_spectral_balance": _number(scores.get("spectral_balance")),
+        "score_stereo": _number(scores.get("stereo")),
+        "score_dynamics": _number(scores.get("dynamics")),
+        "score_noise": _number(scores.get("noise")),
+    }
+
+
+def parse_timestamp(value: str) -> float:
+    """Accept epoch seconds or an ISO date/datetime."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def build_filters(params: Dict[str, str]) -> Tuple[str, List[Any]]:
+    """Translate query parameters into a WHERE clause.
+
+    Text columns match exactly (`genre=Pop`), numeric columns take `<col>_min`
+    and `<col>_max`, and `since`/`until` bound `created_at`.
+    """
+    clauses: List[str] = []
+    args: List[Any] = []
+    for column in TEXT_COLUMNS:
+        if params.get(column):
+            clauses.append(f"{column} = ?")
+            args.append(params[column])
+    for column in NUMERIC_COLUMNS:
+        for suffix, operator in (("_min", ">="), ("_max", "<=")):
+            raw = params.get(f"{column}{suffix}")
+            if raw is None or raw == "":
+                continue
+            try:
+                args.append(float(raw))
+            except ValueError as exc:
+                raise ValueError(f"{column}{suffix} must be a number") from exc
+            clauses.append(f"{column} {operator} ?")
+    for name, operator in (("since", ">="), ("until", "<")):
+        if params.get(name):
+            clauses.append(f"created_at {operator} ?")
+            args.append(parse_timestamp(params[name]))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, args
+
+
+class ResultIndex:
+    """Scalar metrics of every stored result in an embedded SQLite table."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._initialized_for: Optional[str] = None
+
+    @property
+    def path(self) -> str:
+        return self._path or settings.results_index_path
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        path = self.path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            try:
+                if self._initialized_for != path:
+                    self._create_schema(conn)
+                    self._initialized_for = path
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection) -> None:
+        columns = ", ".join(
+            ["job_id TEXT PRIMARY KEY"]
+            + [f"{name} TEXT" for name in TEXT_COLUMNS]
+            + [f"{name} REAL" for name in NUMERIC_COLUMNS]
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS results ({columns})")
+        for column in ("genre", "mode", "created_at", "integrated_lufs"):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_results_{column} ON results ({column})")
+
+    def add(self, report: Dict[str, Any], created_at: Optional[float] = None) -> None:
+        row = _row_from_report(report, time.time() if created_at is None else created_at)
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [row[name] for name in COLUMNS],
+            )
+
+    def remove(self, job_ids: Iterable[str]) -> None:
+        ids = [(job_id,) for job_id in job_ids]
+        if not ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM results WHERE job_id = ?", ids)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM results").fetchone()[0])
+
+    def query(
+        self,
+        params: Dict[str, str],
+        sort: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        where, args = build_filters(params)
+        order = "created_at DESC"
+        if sort:
+            column = sort.lstrip("-")
+            if column not in COLUMNS:
+                raise ValueError(f"Cannot sort by {column}")
+            order = f"{column} {'DESC' if sort.startswith('-') else 'ASC'}"
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        with self._connect() as conn:
+            total = int(conn.execute(f"SELECT COUNT(*) FROM results {where}", args).fetchone()[0])
+            rows = conn.execute(
+                f"SELECT * FROM results {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                [*args, limit, max(0, offset)],
+            ).fetchall()
+        return {"total": total, "limit": limit, "offset": max(0, offset), "items": [dict(row) for row in rows]}
+
+    def aggregate(
+        self,
+        params: Dict[str, str],
+        metrics: Optional[List[str]] = None,
+        group_by: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Count plus avg/min/max of each metric, optionally per genre/mode/key/vocal_style/month."""
+        where, args = build_filters(params)
+        metrics = metrics or [name for name in NUMERIC_COLUMNS if name != "created_at"]
+        unknown = [name for name in metrics if name not in NUMERIC_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+        if group_by and group_by not in GROUPABLE:
+            raise ValueError(f"Cannot group by {group_by}")
+
+        selects = ["COUNT(*) AS count"]
+        for name in metrics:
+            selects += [f"AVG({name}) AS {name}_avg", f"MIN({name}) AS {name}_min", f"MAX({name}) AS {name}_max"]
+        group_expr = ""
+        if group_by == "month":
+            group_expr = "strftime('%Y-%m', created_at, 'unixepoch')"
+        elif group_by:
+            group_expr = group_by
+        if group_expr:
+            selects.insert(0, f"{group_expr} AS {group_by}")
+        sql = f"SELECT {', '.join(selects)} FROM results {where}"
+        if group_expr:
+            sql += f" GROUP BY {group_expr} ORDER BY {group_expr}"
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, args).fetchall()]
+
+    def genre_fit(self, params: Dict[str, str], limit: int = 1000, offset: int = 0) -> Dict[str, Any]:
+        """Best-fitting genre profile of every matching result, newest first, plus a count per genre."""
+        # Imported here: the analysis package imports storage, which imports this module.
+        from .analysis.genre_fit import best_fits
+
+        where, args = build_filters(params)
+        limit = max(1, min(limit, MAX_FIT_PAGE_SIZE))
+        with self._connect() as conn:
+            total = int(conn.execute(f"SELECT COUNT(*) FROM results {where}", args).fetchone()[0])
+            rows = conn.execute(
+                f"SELECT job_id, genre, mode, vocal_style, {', '.join(FIT_COLUMNS)} FROM results {where} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                [*args, limit, max(0, offset)],
+            ).fetchall()
+        values = np.array(
+            [[np.nan if row[name] is None else row[name] for name in FIT_COLUMNS] for row in rows],
+            dtype=np.float64,
+        ).reshape(len(rows), len(FIT_COLUMNS))
+        fits = best_fits(values, [row["mode"] for row in rows], [row["vocal_style"] for row in rows])
+        items = [
+            {"job_id": row["job_id"], "genre": row["genre"], "mode": row["mode"], "best_fit": fit}
+            for row, fit in zip(rows, fits)
+        ]
+        counts: Dict[str, int] = {}
+        for fit in fits:
+            if fit is not None:
+                counts[fit["genre"]] = counts.get(fit["genre"], 0) + 1
+        return {
+            "total": total,
+            "limit": limit,
+            "offset": max(0, offset),
+            "genres": dict(sorted(counts.items(), key=lambda item: -item[1])),
+            "items": items,
+        }
+
+    def rebuild(self, results_dir: Optional[str] = None) -> int:
+        """Backfill from result files on disk, e.g. for results written before the index existed."""
+        directory = results_dir or settings.results_dir
+        if not os.path.isdir(directory):
+            return 0
+        indexed = 0
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as handle:
+                    report = json.load(handle)
+                if report.get("demo"):
+                    continue
+                self.add(report, created_at=os.path.getmtime(path))
+                indexed += 1
+            except Exception:
+                logger.warning("Skipping unreadable result %s", path)
+        return indexed
+
+
+results_index = ResultIndex()
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .config import settings
+from .results_index import results_index
+
+try:
+    import soundfile as sf
+except Exception:  # pragma: no cover - optional dependency
+    sf = None
+
+logger = logging.getLogger(__name__)
+
+UNCOMPRESSED_EXTENSIONS = {".wav", ".wave", ".aif", ".aiff"}
+_FLAC_SUBTYPES = {"PCM_S8": "PCM_S8", "PCM_U8": "PCM_S8", "PCM_16": "PCM_16", "PCM_24": "PCM_24"}
+_JOB_ID_LENGTH = 36
+
+
+@dataclass
+class JobFootprint:
+    job_id: str
+    paths: List[str] = field(default_factory=list)
+    size_bytes: int = 0
+    last_access: float = 0.0
+
+
+@dataclass
+class DiskUsage:
+    uploads_bytes: int
+    results_bytes: int
+    total_bytes: int
+    quota_bytes: int
+    jobs: int
+    evicted_jobs: int
+    last_sweep_at: Optional[float]
+
+
+def tracked_dirs() -> List[str]:
+    """Directories whose entries are named after the job that produced them."""
+    return [settings.uploads_dir, settings.results_dir, settings.features_dir, settings.previews_dir]
+
+
+def _job_id_from_name(name: str) -> Optional[str]:
+    candidate = name[:_JOB_ID_LENGTH]
+    if len(candidate) == _JOB_ID_LENGTH and candidate.count("-") == 4:
+        return candidate
+    return None
+
+
+def _entry_stats(path: str) -> tuple[int, float]:
+    if os.path.isdir(path):
+        size = 0
+        newest = os.path.getmtime(path)
+        for root, _, files in os.walk(path):
+            for name in files:
+                stat = os.stat(os.path.join(root, name))
+                size += stat.st_size
+                newest = max(newest, stat.st_mtime)
+        return size, newest
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime
+
+
+def _dir_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return 0
+    return sum(_entry_stats(os.path.join(path, name))[0] for name in os.listdir(path))
+
+
+def scan_jobs() -> Dict[str, JobFootprint]:
+    jobs: Dict[str, JobFootprint] = {}
+    for directory in tracked_dirs():
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            job_id = _job_id_from_name(name)
+            if job_id is None:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                size, mtime = _entry_stats(path)
+            except FileNotFoundError:
+                continue
+            footprint = jobs.setdefault(job_id, JobFootprint(job_id=job_id))
+            footprint.paths.append(path)
+            footprint.size_bytes += size
+            footprint.last_access = max(footprint.last_access, mtime)
+    return jobs
+
+
+def touch_job(job_id: str) -> None:
+    """Record an access so LRU eviction keeps results that are still being read."""
+    path = os.path.join(settings.results_dir, f"{job_id}.json")
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def transcode_to_flac(path: str) -> str:
+    """Losslessly re-encode an integer PCM upload to FLAC and remove the original.
+
+    FLAC holds at most 24-bit integers, so float and 32-bit uploads are left
+    as they are. The original is only removed once the FLAC decodes to the
+    same samples.
+    """
+    if sf is None:
+        raise RuntimeError("soundfile is required for FLAC transcoding")
+    subtype = _FLAC_SUBTYPES.get(sf.info(path).subtype)
+    if subtype is None:
+        return path
+    dest_path = os.path.splitext(path)[0] + ".flac"
+    tmp_path = f"{dest_path}.tmp"
+    # int32 holds every sample of the integer subtypes above exactly.
+    with sf.SoundFile(path) as src, sf.SoundFile(
+        tmp_path,
+        "w",
+        samplerate=src.samplerate,
+        channels=src.channels,
+        format="FLAC",
+        subtype=subtype,
+    ) as dst:
+        for block in src.blocks(blocksize=1 << 16, dtype="int32", always_2d=True):
+            dst.write(block)
+    if not _same_samples(path, tmp_path):
+        os.remove(tmp_path)
+        raise RuntimeError(f"FLAC transcode of {path} did not round-trip")
+    os.replace(tmp_path, dest_path)
+    os.remove(path)
+    return dest_path
+
+
+def _same_samples(path: str, other_path: str) -> bool:
+    with sf.SoundFile(path) as first, sf.SoundFile(other_path) as second:
+        if (first.frames, first.channels) != (second.frames, second.channels):
+            return False
+        blocks = zip(
+            first.blocks(blocksize=1 << 16, dtype="int32", always_2d=True),
+            second.blocks(blocksize=1 << 16, dtype="int32", always_2d=True),
+        )
+        return all(np.array_equal(a, b) for a, b in blocks)
+
+
+def finalize_upload(path: Optional[str]) -> Optional[str]:
+    """Apply the configured upload policy once a job's analysis has been written."""
+    if not path or not os.path.exists(path):
+        return path
+    policy = settings.upload_policy
+    if policy == "delete":
+        os.remove(path)
+        return None
+    if policy == "flac" and os.path.splitext(path)[1].lower() in UNCOMPRESSED_EXTENSIONS:
+        try:
+            return transcode_to_flac(path)
+        except Exception:
+            logger.exception("FLAC transcode failed; keeping original %s", path)
+    return path
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class RetentionManager:
+    def __init__(self, store) -> None:
+        self._store = store
+        self._running = False
+        self._evicted_jobs = 0
+        self._last_sweep_at: Optional[float] = None
+
+    def usage(self) -> DiskUsage:
+        uploads = _dir_size(settings.uploads_dir)
+        results = _dir_size(settings.results_dir)
+        total = sum(_dir_size(directory) for directory in tracked_dirs())
+        return DiskUsage(
+            uploads_bytes=uploads,
+            results_bytes=results,
+            total_bytes=total,
+            quota_bytes=settings.disk_quota_mb * 1024 * 1024,
+            jobs=len(scan_jobs()),
+            evicted_jobs=self._evicted_jobs,
+            last_sweep_at=self._last_sweep_at,
+        )
+
+    def sweep(self, active: Set[str], now: Optional[float] = None) -> List[str]:
+        """Expire stale uploads and results, then evict least-recently-used jobs over quota."""
+        # Imported here: the analysis engine imports this module to finalize uploads.
+        from .analysis.partials import prune_cache
+
+        now = time.time() if now is None else now
+        upload_cutoff = now - settings.upload_ttl_hours * 3600.0
+        result_cutoff = now - settings.result_ttl_days * 86400.0
+        quota = settings.disk_quota_mb * 1024 * 1024
+
+        if os.path.isdir(settings.uploads_dir):
+            for name in os.listdir(settings.uploads_dir):
+                job_id = _job_id_from_name(name)
+                path = os.path.join(settings.uploads_dir, name)
+                if job_id in active or job_id is None:
+                    continue
+                if os.path.getmtime(path) < upload_cutoff:
+                    _remove(path)
+
+        jobs = scan_jobs()
+        evicted: List[str] = []
+        candidates = sorted(
+            (job for job in jobs.values() if job.job_id not in active),
+            key=lambda job: job.last_access,
+        )
+        total = sum(job.size_bytes for job in jobs.values())
+        for job in candidates:
+            if job.last_access >= result_cutoff and total <= quota:
+                break
+            for path in job.paths:
+                _remove(path)
+            total -= job.size_bytes
+            evicted.append(job.job_id)
+
+        results_index.remove(evicted)
+        # Segment partials are shared between jobs, so they get their own LRU budget.
+        prune_cache(settings.segments_dir, settings.segment_cache_mb * 1024 * 1024)
+        self._evicted_jobs += len(evicted)
+        self._last_sweep_at = now
+        return evicted
+
+    async def run(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        logger.info("Retention manager started")
+        while True:
+            try:
+                active = await self._store.protected_job_ids()
+                evicted = await asyncio.to_thread(self.sweep, active)
+                for job_id in evicted:
+                    await self._store.remove(job_id)
+                if evicted:
+                    logger.info("Retention evicted %d jobs", len(evicted))
+            except Exception:
+                logger.exception("Retention sweep failed")
+            await asyncio.sleep(settings.retention_interval_sec)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 class JobCreateResponse(BaseModel):
     job_id: str
     status: str
+    provisional: Optional[Dict[str, Any]] = None
 
 
 class JobStatusResponse(BaseModel):
@@ -17,3 +18,28 @@ class JobStatusResponse(BaseModel):
     stage: str
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    version: int = 0
+    partial: Optional[Dict[str, Any]] = None
+
+
+class BatchCreateResponse(BaseModel):
+    batch_id: str
+    job_ids: List[str]
+    status: str
+
+
+class BatchTrackStatus(BaseModel):
+    job_id: str
+    filename: Optional[str] = None
+    status: str
+    progress: float
+    stage: str
+    error: Optional[str] = None
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str
+    progress: float
+    tracks: List[BatchTrackStatus]
+    album: Optional[Dict[str, Any]] = None
@@ -2,11 +2,13 @@ const state = {
   mode: 'vocal',
   jobId: null,
   pollTimer: null,
+  version: -1,
 };
 
 const genreSelect = document.getElementById('genreSelect');
 const vocalStyleField = document.getElementById('vocalStyleField');
 const vocalStyleSelect = document.getElementById('vocalStyleSelect');
+const tierSelect = document.getElementById('tierSelect');
 const audioFile = document.getElementById('audioFile');
 const referenceBlock = document.getElementById('referenceBlock');
 const referenceFile = document.getElementById('referenceFile');
@@ -151,6 +153,11 @@ function renderResults(data) {
     const ab = document.createElement('div');
     ab.className = 'result-card';
     const suggestions = (data.ab_compare.match_suggestions || []).map((item) => `<li>${item}</li>`).join('');
+    const perReference = (data.ab_compare.references || []).length > 1
+      ? `<h4>Per referanse</h4><ul class="list">${data.ab_compare.references
+          .map((item) => `<li>${item.reference_name || item.reference_id}: ${item.loudness_diff_lufs.toFixed(1)} LUFS, ${item.spectral_diff_summary}</li>`)
+          .join('')}</ul>`
+      : '';
     ab.innerHTML = `
       <h3>A/B Masteringssammenligning</h3>
       <p><strong>Loudness diff:</strong> ${data.ab_compare.loudness_diff_lufs.toFixed(1)} LUFS</p>
@@ -160,6 +167,7 @@ function renderResults(data) {
       <p>${data.ab_compare.dynamics_diff_summary}</p>
       <h4>Forslag til match</h4>
       <ul class="list">${suggestions}</ul>
+      ${perReference}
     `;
     results.appendChild(ab);
   }
@@ -173,10 +181,36 @@ function renderResults(data) {
   results.appendChild(appendix);
 }
 
+function renderProvisional(partial) {
+  const loudness = partial.metrics?.loudness;
+  if (!loudness) return;
+  results.innerHTML = '';
+  const card = document.createElement('div');
+  card.className = 'result-card';
+  const bands = Object.entries(partial.metrics.spectral?.band_energies_db || {})
+    .map(([name, value]) => `<li>${name}: ${value.toFixed(1)} dB</li>`)
+    .join('');
+  const peak = loudness.true_peak_db !== undefined
+    ? `${loudness.true_peak_db.toFixed(1)} dBTP`
+    : `${loudness.sample_peak_db.toFixed(1)} dBFS`;
+  card.innerHTML = `
+    <h3>Foreløpige målinger</h3>
+    <p><strong>Integrert lydstyrke:</strong> ${loudness.integrated_lufs.toFixed(1)} LUFS</p>
+    <p><strong>Topp:</strong> ${peak}</p>
+    <ul class="list">${bands}</ul>
+    <p class="hint">Resten av analysen fylles inn når den er klar.</p>
+  `;
+  results.appendChild(card);
+}
+
 async function pollJob(jobId) {
   try {
-    const response = await fetch(`/api/jobs/${jobId}`);
+    const response = await fetch(`/api/jobs/${jobId}?since=${state.version}`);
     const data = await response.json();
+    if (data.partial) {
+      state.version = data.version;
+      renderProvisional(data.partial);
+    }
     if (data.status === 'done') {
       setStatus('Analyse ferdig.');
       setProgress(1, 'Ferdig');
@@ -203,6 +237,7 @@ function submitJob({ demo }) {
   const form = new FormData();
   form.append('mode', state.mode);
   form.append('genre', genreSelect.value);
+  form.append('tier', tierSelect.value);
   if (state.mode === 'vocal') {
     form.append('vocal_style', vocalStyleSelect.value);
   }
@@ -214,8 +249,8 @@ function submitJob({ demo }) {
       return;
     }
     form.append('audio', audioFile.files[0]);
-    if (state.mode === 'mix' && referenceFile.files.length) {
-      form.append('reference', referenceFile.files[0]);
+    if (state.mode === 'mix') {
+      Array.from(referenceFile.files).forEach((file) => form.append('references', file));
     }
   }
 
@@ -233,6 +268,8 @@ function submitJob({ demo }) {
     if (xhr.status >= 200 && xhr.status < 300) {
       const data = JSON.parse(xhr.responseText);
       state.jobId = data.job_id;
+      state.version = -1;
+      if (data.provisional) renderProvisional(data.provisional);
       setStatus('I kø.');
       setProgress(0.2, 'I kø');
       if (state.pollTimer) clearInterval(state.pollTimer);
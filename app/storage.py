@@ -1,17 +1,35 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from fastapi import UploadFile
 
 from .config import settings
+from .results_index import results_index
+
+try:
+    import orjson
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None
 
 
 def ensure_dirs() -> None:
     Path(settings.uploads_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.results_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.features_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.previews_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.references_dir).mkdir(parents=True, exist_ok=True)
+    Path(settings.segments_dir).mkdir(parents=True, exist_ok=True)
 
 
 def safe_extension(filename: Optional[str]) -> str:
@@ -33,5 +51,128 @@ async def save_upload(upload: UploadFile, dest_path: str) -> None:
             handle.write(chunk)
 
 
+def find_upload(job_id: str) -> Optional[str]:
+    """Locate a job's original upload, whatever extension retention left it with."""
+    directory = Path(settings.uploads_dir)
+    if not directory.is_dir():
+        return None
+    for candidate in sorted(directory.glob(f"{job_id}.*")):
+        if not candidate.name.endswith(".tmp"):
+            return str(candidate)
+    return None
+
+
 def result_path(job_id: str) -> str:
     return os.path.join(settings.results_dir, f"{job_id}.json")
+
+
+def features_path(job_id: str) -> str:
+    return os.path.join(settings.features_dir, job_id)
+
+
+def previews_path(job_id: str) -> str:
+    return os.path.join(settings.previews_dir, job_id)
+
+
+def result_etag_path(job_id: str) -> str:
+    return os.path.join(settings.results_dir, f"{job_id}.json.etag")
+
+
+def profile_path(job_id: str) -> str:
+    # Not `.json`, so the results index never mistakes it for a report.
+    return os.path.join(settings.results_dir, f"{job_id}.profile")
+
+
+def profile_stats_path(job_id: str) -> str:
+    return os.path.join(settings.results_dir, f"{job_id}.pstats")
+
+
+def dumps_json(data: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(tmp_path, path)
+
+
+def write_result(job_id: str, report: Dict[str, Any], index: bool = True) -> str:
+    """Write a result once as compact JSON plus precompressed variants.
+
+    Returns the strong ETag so the result can later be served straight from
+    disk without parsing or re-serializing it. Only results of real analyses
+    should be indexed; `index=False` keeps e.g. demo reports out of the
+    aggregates.
+    """
+    Path(settings.results_dir).mkdir(parents=True, exist_ok=True)
+    payload = dumps_json(report)
+    etag = f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+    path = result_path(job_id)
+    _write_atomic(f"{path}.gz", gzip.compress(payload, compresslevel=settings.result_compression_level, mtime=0))
+    if zstandard is not None:
+        _write_atomic(f"{path}.zst", zstandard.ZstdCompressor(level=10).compress(payload))
+    _write_atomic(path, payload)
+    _write_atomic(result_etag_path(job_id), etag.encode("ascii"))
+    if index:
+        results_index.add(report)
+    return etag
+
+
+def write_profile(job_id: str, summary: Dict[str, Any]) -> str:
+    Path(settings.results_dir).mkdir(parents=True, exist_ok=True)
+    path = profile_path(job_id)
+    _write_atomic(path, dumps_json(summary))
+    return path
+
+
+def result_etag(job_id: str) -> Optional[str]:
+    """Return the stored ETag, computing it once for results written before ETags existed."""
+    etag_path = result_etag_path(job_id)
+    if os.path.exists(etag_path):
+        with open(etag_path, "r", encoding="ascii") as handle:
+            return handle.read().strip()
+    path = result_path(job_id)
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:32]}"'
+    _write_atomic(etag_path, etag.encode("ascii"))
+    return etag
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+
+def negotiate_result_file(job_id: str, accept_encoding: str) -> Tuple[str, Optional[str]]:
+    """Pick the precompressed variant the client accepts, falling back to plain JSON."""
+    path = result_path(job_id)
+    accepted = _accepted_encodings(accept_encoding or "")
+    for encoding, suffix in (("zstd", ".zst"), ("gzip", ".gz")):
+        if accepted.get(encoding, 0.0) > 0.0 and os.path.exists(f"{path}{suffix}"):
+            return f"{path}{suffix}", encoding
+    return path, None
@@ -0,0 +1,40 @@
+import pytest
+
+_accuracy_rows = pytest.StashKey[list]()
+
+
+@pytest.fixture(scope="session")
+def accuracy_report(request):
+    """Rows recorded by tests/test_accuracy.py, printed at the end of the run.
+
+    A path gets one timing row (`signals`, `fast_sec`, `reference_sec`,
+    optional `note`) and any number of rows of `deltas`.
+    """
+    return request.config.stash.setdefault(_accuracy_rows, [])
+
+
+def _pace(fast_sec, reference_sec):
+    ratio = reference_sec / max(fast_sec, 1e-9)
+    return f"{ratio:.2f}x faster" if ratio >= 1.0 else f"{1.0 / max(ratio, 1e-9):.2f}x slower"
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    rows = config.stash.get(_accuracy_rows, [])
+    if not rows:
+        return
+    paths = {}
+    for row in rows:
+        entry = paths.setdefault(row["path"], {"deltas": []})
+        entry.update({key: value for key, value in row.items() if key not in ("path", "deltas")})
+        entry["deltas"].extend(row.get("deltas", []))
+    terminalreporter.section("fast path accuracy")
+    for path, entry in paths.items():
+        line = path
+        if "fast_sec" in entry:
+            line = (
+                f"{path}: {entry['signals']} signals, {entry['fast_sec']:.2f}s vs "
+                f"{entry['reference_sec']:.2f}s reference ({_pace(entry['fast_sec'], entry['reference_sec'])})"
+            )
+        terminalreporter.write_line(f"{line}; {entry['note']}" if entry.get("note") else line)
+        for metric, delta, tolerance in entry["deltas"]:
+            terminalreporter.write_line(f"    {metric:<40} max |delta| {delta:<10.4g} tolerance {tolerance:g}")
@@ -0,0 +1,24 @@
+from app.analysis.ab_compare import compare_references
+
+
+def _metrics(lufs, tilt):
+    return {
+        "integrated_lufs": lufs,
+        "short_term_lufs": lufs + 1.0,
+        "true_peak_db": -1.0,
+        "crest_factor_db": 9.0,
+        "spectral_tilt_db_per_oct": tilt,
+        "stereo_width": 0.3,
+        "stereo_correlation": 0.8,
+    }
+
+
+def test_consensus_is_median_of_references():
+    mix = _metrics(-14.0, -1.0)
+    references = [_metrics(-9.0, -1.0), _metrics(-10.0, -0.9), _metrics(-20.0, -2.5)]
+
+    comparison = compare_references(mix, references)
+
+    assert comparison.consensus_target["integrated_lufs"] == -10.0
+    assert comparison.consensus.loudness_diff_lufs == -4.0
+    assert [item.loudness_diff_lufs for item in comparison.per_reference] == [-5.0, -4.0, 6.0]
@@ -0,0 +1,596 @@
+"""Fast and streaming analyzer paths against the straightforward whole-signal analyzers.
+
+Every path runs over the same generated corpus. Each metric of every analyzer
+a path serves must stay within its tolerance of `DirectSignal` (the plain
+analyzer functions); fields without a tolerance (notes, flags, keys, band
+lists) must match exactly. `analyze_channels` is held against per-channel
+`DirectSignal` runs, and the batched stem masking against a per-stem scipy
+STFT with pairwise loops. The worst deltas and the timings are printed in
+the "fast path accuracy" section of the pytest summary.
+"""
+
+import time
+from dataclasses import asdict, is_dataclass
+
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("librosa")
+pyln = pytest.importorskip("pyloudnorm")
+
+from scipy.signal import stft
+
+from app.analysis import partials, stems
+from app.analysis.channels import analyze_channels
+from app.analysis.partials import DirectSignal, SegmentedSignal, compute_statistics
+from app.analysis.quick import quick_estimate
+from app.analysis.streaming import StreamingAnalyzer
+
+SR = 48000
+SECONDS = 26.0  # three segments
+# Divides neither the 4800-sample loudness block nor the STFT hops, so every
+# carry-over between pushes is exercised.
+STREAM_CHUNK = 1000
+CREST_FACTOR_DB = 12.0
+EXTENSION = ".wav"
+
+SECTIONS = (
+    "loudness",
+    "spectral",
+    "stereo",
+    "vocal",
+    "reverb",
+    "masking",
+    "low_end",
+    "transients",
+    "artifacts",
+    "qa",
+    "tempo",
+    "key",
+    "feature_tracks",
+    "third_octave",
+)
+STATISTICS_SECTIONS = ("loudness", "stereo", "qa")
+STREAMING_SECTIONS = ("loudness", "spectral", "stereo", "qa", "low_end")
+QUICK_SECTIONS = ("loudness", "spectral", "stereo")
+
+# Largest accepted |fast - reference| per metric, keyed by section and field.
+# Fields not listed here must be equal.
+TOLERANCES = {
+    "loudness.integrated_lufs": 0.1,
+    "loudness.short_term_lufs": 0.1,
+    "loudness.true_peak_db": 0.2,
+    "loudness.sample_peak_db": 0.01,
+    "loudness.crest_factor_db": 0.1,
+    "loudness.dynamic_range_db": 0.2,
+    "loudness.noise_floor_db": 0.2,
+    "spectral.band_energies_db": 0.1,
+    "spectral.spectral_tilt_db_per_oct": 0.02,
+    "spectral.centroid_hz": 2.0,
+    "spectral.rolloff_hz": 12.0,  # one STFT bin
+    "stereo.width": 0.005,
+    "stereo.correlation": 0.005,
+    "stereo.mono_compatibility": 0.005,
+    "vocal.sibilance_severity": 0.01,
+    "vocal.plosive_severity": 0.01,
+    "vocal.roominess_score": 0.01,
+    "vocal.sibilance_bands": 0.1,
+    "reverb.depth_score": 0.01,
+    "reverb.forwardness_score": 0.01,
+    "low_end.low_end_score": 0.01,
+    "low_end.side_energy_ratio": 0.01,
+    "transients.punch_score": 0.01,
+    "transients.limiter_vulnerability": 0.01,
+    "qa.dc_offset_db": 0.1,
+    "qa.channel_imbalance_db": 0.1,
+    "tempo.bpm": 0.5,
+    "tempo.confidence": 0.02,
+    # chroma_cqt estimates tuning per segment.
+    "key.confidence": 0.05,
+    "feature_tracks.short_term_lufs": 0.1,
+    "feature_tracks.band_energies_db": 0.1,
+    "feature_tracks.correlation": 0.005,
+    "feature_tracks.sibilance_db": 0.1,
+    "feature_tracks.onset_strength": 0.01,
+    "feature_tracks.spectrogram_db": 0.1,
+    "third_octave": 0.1,
+    "stems.levels_db": 0.1,
+    "stems.overlap": 0.01,
+}
+# Levels this far down only hold window leakage; below it both sides count as equal.
+LEVEL_FLOOR_DB = -90.0
+FLOORED = {
+    "spectral.band_energies_db",
+    "feature_tracks.band_energies_db",
+    "feature_tracks.sibilance_db",
+    "feature_tracks.spectrogram_db",
+    "third_octave",
+    "stems.levels_db",
+}
+# Building segments computes every analyzer's partials up front. Timed over
+# all sections that pays off; a job that only wants loudness, spectral and
+# stereo is about three times slower segmented than with the reference.
+SEGMENTED_NOTE = "includes building the segments; slower than the reference when only a few sections are wanted"
+CACHED_NOTE = "every segment read back from the cache"
+POOL_NOTE = "slower than serial segments on inputs this short: every partial crosses a process boundary"
+# Without a pitched source the key is a near tie, which per-segment tuning
+# estimates can tip either way.
+SEGMENTED_BLIND_SPOTS = {"anti_phase": ("key",), "intersample_peaks": ("key",)}
+# A live stream never sees the zero-padded frames the offline STFT adds after
+# the last sample, which moves its integrated spectrum and low-end score slightly.
+STREAMING_TOLERANCES = {
+    **TOLERANCES,
+    "spectral.spectral_tilt_db_per_oct": 0.1,
+    "spectral.centroid_hz": 5.0,
+    "low_end.low_end_score": 0.05,
+}
+# The provisional estimate subsamples on purpose; it only has to be close.
+QUICK_TOLERANCES = {
+    **TOLERANCES,
+    "loudness.integrated_lufs": 0.5,
+    "spectral.band_energies_db": 3.0,
+    "spectral.spectral_tilt_db_per_oct": 1.0,
+    "spectral.centroid_hz": 150.0,
+    "spectral.rolloff_hz": 250.0,
+    "stereo.width": 0.03,
+    "stereo.correlation": 0.03,
+    "stereo.mono_compatibility": 0.03,
+}
+# Sections the estimate cannot see by construction: sparse STFT frames miss
+# isolated clicks, and taking every eighth sample aliases an fs/4 tone to DC.
+QUICK_BLIND_SPOTS = {"clicks": ("spectral",), "intersample_peaks": ("stereo",)}
+
+
+def _tone(rng, t):
+    return (0.25 * np.sin(2 * np.pi * 1000 * t))[:, None]
+
+
+def _pink_noise(rng, t):
+    white = rng.standard_normal((len(t), 2))
+    spectrum = np.fft.rfft(white, axis=0)
+    spectrum[1:] /= np.sqrt(np.arange(1, len(spectrum)))[:, None]
+    pink = np.fft.irfft(spectrum, n=len(t), axis=0)
+    return 0.2 * pink / np.max(np.abs(pink))
+
+
+def _dynamic_song(rng, t):
+    # Chords under a swelling envelope, with silent gaps the loudness gate has to drop.
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (110.0, 138.6, 164.8, 220.0)) / 4
+    envelope = 0.1 + 0.5 * (1 + np.sin(2 * np.pi * t / 7.0)) / 2
+    envelope[(t % 10.0) > 8.5] = 0.0
+    left = chord * envelope + 0.01 * rng.standard_normal(len(t))
+    right = np.roll(left, 240) * 0.8
+    return np.stack([left, right], axis=1)
+
+
+def _intersample_peaks(rng, t):
+    # fs/4 at 45 degrees: every sample sits 3 dB below the waveform's crest.
+    crest = np.sin(2 * np.pi * (SR / 4) * t + np.pi / 4)
+    return np.stack([0.95 * crest, 0.5 * crest], axis=1)
+
+
+def _anti_phase(rng, t):
+    # Mostly out of phase, with enough mid left for width and loudness to be defined.
+    noise = 0.2 * rng.standard_normal(len(t))
+    return np.stack([noise, -0.8 * noise + 0.02 * rng.standard_normal(len(t))], axis=1)
+
+
+def _clicks(rng, t):
+    audio = 0.002 * rng.standard_normal((len(t), 2))
+    for start in range(0, len(t) - 480, SR // 3):
+        audio[start : start + 480] += np.hanning(480)[:, None] * np.array([0.9, 0.6])
+    return audio
+
+
+CORPUS = [_tone, _pink_noise, _dynamic_song, _intersample_peaks, _anti_phase, _clicks]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    t = np.arange(int(SECONDS * SR)) / SR
+    signals = {}
+    for index, generate in enumerate(CORPUS):
+        audio = generate(np.random.default_rng(index), t)
+        signals[generate.__name__.lstrip("_")] = np.ascontiguousarray(audio, dtype=np.float32)
+    return signals
+
+
+def _analyze(signal, section):
+    if section == "transients":
+        return signal.transients(CREST_FACTOR_DB)
+    if section == "artifacts":
+        return signal.artifacts(EXTENSION)
+    return getattr(signal, section)()
+
+
+def _flatten(section, values):
+    """`{key: (tolerance field, value)}`; dicts of numbers get one key per entry."""
+    values = asdict(values) if is_dataclass(values) else values
+    if not isinstance(values, dict):
+        return {section: (section, values)}
+    flat = {}
+    for name, value in values.items():
+        field = f"{section}.{name}"
+        if isinstance(value, dict) and all(isinstance(item, (int, float)) for item in value.values()):
+            flat.update({f"{field}.{key}": (field, float(item)) for key, item in value.items()})
+        else:
+            flat[field] = (field, value)
+    return flat
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _delta(field, value, target):
+    """|value - target| (largest element for arrays); inf for any other mismatch."""
+    if isinstance(target, np.ndarray):
+        if not isinstance(value, np.ndarray) or value.shape != target.shape:
+            return np.inf
+        value, target = value.astype(np.float64), target.astype(np.float64)
+        ignored = np.isnan(value) & np.isnan(target)
+        if field in FLOORED:
+            ignored |= np.maximum(value, target) < LEVEL_FLOOR_DB
+        diff = np.where(ignored, 0.0, np.abs(value - target))
+        return float(np.max(diff, initial=0.0)) if np.all(np.isfinite(diff)) else np.inf
+    if _is_number(value) and _is_number(target):
+        if value == target or (np.isnan(value) and np.isnan(target)):
+            return 0.0
+        if field in FLOORED and max(value, target) < LEVEL_FLOOR_DB:
+            return 0.0
+        delta = abs(float(value) - float(target))
+        return delta if np.isfinite(delta) else np.inf
+    return 0.0 if value == target else np.inf
+
+
+def _describe(value):
+    if isinstance(value, np.ndarray):
+        return f"array{value.shape}"
+    return f"{value:.4f}" if _is_number(value) else repr(value)
+
+
+def _warm_up():
+    # librosa compiles its kernels on first use; keep that out of every timing.
+    t = np.arange(3 * SR) / SR
+    signal = DirectSignal(np.stack([np.sin(2 * np.pi * 440 * t)] * 2, axis=1).astype(np.float32), SR)
+    for section in SECTIONS:
+        _analyze(signal, section)
+
+
+@pytest.fixture(scope="module")
+def reference(corpus):
+    """Whole-signal metrics per signal and section, and the time each section took."""
+    _warm_up()
+    results = {}
+    for name, audio in corpus.items():
+        direct = DirectSignal(audio, SR)
+        metrics, timings = {}, {}
+        for section in SECTIONS:
+            started = time.perf_counter()
+            value = _analyze(direct, section)
+            timings[section] = time.perf_counter() - started
+            metrics[section] = _flatten(section, value)
+        results[name] = {"metrics": metrics, "timings": timings}
+    return results
+
+
+def _measure(path, inputs, analyze, sections, reference, accuracy_report, note=None):
+    """Run `analyze(input) -> {section: value}` per signal and record the timing row for `path`."""
+    results, fast_sec = {}, 0.0
+    for name, item in inputs.items():
+        started = time.perf_counter()
+        values = analyze(item)
+        fast_sec += time.perf_counter() - started
+        results[name] = {section: _flatten(section, value) for section, value in values.items()}
+    reference_sec = sum(reference[name]["timings"][section] for name in inputs for section in sections)
+    accuracy_report.append(
+        {"path": path, "note": note, "signals": len(inputs), "fast_sec": fast_sec, "reference_sec": reference_sec}
+    )
+    return results
+
+
+def _compare(path, section, measured, expected, tolerances, accuracy_report, blind_spots=None):
+    """Record the worst delta per field of `section` and return the metrics out of tolerance."""
+    worst, failures = {}, []
+    for name, sections in measured.items():
+        if section not in sections or section in (blind_spots or {}).get(name, ()):
+            continue
+        for key, (field, value) in sections[section].items():
+            target = expected[name][section][key][1]
+            delta = _delta(field, value, target)
+            tolerance = tolerances.get(field, 0.0)
+            worst[field] = (max(worst.get(field, (0.0,))[0], delta), tolerance)
+            if delta > tolerance:
+                failures.append(f"{name} {key}: {_describe(value)} vs {_describe(target)} (|delta| {delta:.4g})")
+    accuracy_report.append(
+        {"path": path, "deltas": [(field, delta, tolerance) for field, (delta, tolerance) in sorted(worst.items())]}
+    )
+    return failures
+
+
+def _reference_metrics(reference):
+    return {name: entry["metrics"] for name, entry in reference.items()}
+
+
+def _segmented(signal):
+    return {section: _analyze(signal, section) for section in SECTIONS}
+
+
+@pytest.fixture(scope="module")
+def segmented(corpus, reference, accuracy_report):
+    return _measure(
+        "segmented",
+        corpus,
+        lambda audio: _segmented(SegmentedSignal.from_audio(audio, SR)),
+        SECTIONS,
+        reference,
+        accuracy_report,
+        SEGMENTED_NOTE,
+    )
+
+
+@pytest.fixture(scope="module")
+def cached(corpus, reference, accuracy_report, tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("segments"))
+    for audio in corpus.values():
+        SegmentedSignal.from_audio(audio, SR, cache_dir)
+    return _measure(
+        "segmented, cached",
+        corpus,
+        lambda audio: _segmented(SegmentedSignal.from_audio(audio, SR, cache_dir)),
+        SECTIONS,
+        reference,
+        accuracy_report,
+        CACHED_NOTE,
+    )
+
+
+@pytest.fixture(scope="module")
+def pooled(corpus, reference, accuracy_report):
+    pool = partials.segment_pool(2)
+    try:
+        pool.submit(int).result()  # start the workers outside the timings
+        return _measure(
+            "segmented, process pool",
+            corpus,
+            lambda audio: _segmented(SegmentedSignal.from_audio(audio, SR, executor=pool)),
+            SECTIONS,
+            reference,
+            accuracy_report,
+            POOL_NOTE,
+        )
+    finally:
+        partials.shutdown_segment_pool()
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_segmented_signal(segmented, reference, accuracy_report, section):
+    expected = _reference_metrics(reference)
+    failures = _compare(
+        "segmented", section, segmented, expected, TOLERANCES, accuracy_report, SEGMENTED_BLIND_SPOTS
+    )
+    assert failures == []
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_cached_segments(cached, reference, accuracy_report, section):
+    expected = _reference_metrics(reference)
+    failures = _compare(
+        "segmented, cached", section, cached, expected, TOLERANCES, accuracy_report, SEGMENTED_BLIND_SPOTS
+    )
+    assert failures == []
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_process_pool_segments(pooled, reference, accuracy_report, section):
+    expected = _reference_metrics(reference)
+    failures = _compare(
+        "segmented, process pool", section, pooled, expected, TOLERANCES, accuracy_report, SEGMENTED_BLIND_SPOTS
+    )
+    assert failures == []
+
+
+@pytest.fixture(scope="module")
+def statistics_only(corpus, reference, accuracy_report):
+    def analyze(audio):
+        signal = SegmentedSignal(compute_statistics(audio, SR), SR, audio.shape[1])
+        return {section: _analyze(signal, section) for section in STATISTICS_SECTIONS}
+
+    return _measure("statistics only", corpus, analyze, STATISTICS_SECTIONS, reference, accuracy_report)
+
+
+@pytest.mark.parametrize("section", STATISTICS_SECTIONS)
+def test_statistics_only(statistics_only, reference, accuracy_report, section):
+    expected = _reference_metrics(reference)
+    assert _compare("statistics only", section, statistics_only, expected, TOLERANCES, accuracy_report) == []
+
+
+def _stream(audio):
+    analyzer = StreamingAnalyzer(SR, audio.shape[1])
+    for start in range(0, len(audio), STREAM_CHUNK):
+        analyzer.push(audio[start : start + STREAM_CHUNK])
+    snapshot = analyzer.snapshot()
+    loudness = {
+        "integrated_lufs": snapshot.integrated_lufs,
+        "true_peak_db": snapshot.true_peak_db,
+        "sample_peak_db": snapshot.sample_peak_db,
+    }
+    return {"loudness": loudness, **snapshot.integrated}
+
+
+@pytest.fixture(scope="module")
+def streamed(corpus, reference, accuracy_report):
+    return _measure("streaming", corpus, _stream, STREAMING_SECTIONS, reference, accuracy_report)
+
+
+@pytest.mark.parametrize("section", STREAMING_SECTIONS)
+def test_streaming_analyzer(streamed, reference, accuracy_report, section):
+    expected = _reference_metrics(reference)
+    assert _compare("streaming", section, streamed, expected, STREAMING_TOLERANCES, accuracy_report) == []
+
+
+@pytest.fixture(scope="module")
+def quick(corpus, reference, accuracy_report, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("quick")
+    paths = {}
+    for name, audio in corpus.items():
+        paths[name] = directory / f"{name}.wav"
+        sf.write(paths[name], audio, SR, subtype="FLOAT")
+    return _measure(
+        "quick estimate",
+        paths,
+        lambda path: quick_estimate(str(path))["metrics"],
+        QUICK_SECTIONS,
+        reference,
+        accuracy_report,
+    )
+
+
+@pytest.mark.parametrize("section", QUICK_SECTIONS)
+def test_quick_estimate(corpus, quick, reference, accuracy_report, section):
+    blind_spots = dict(QUICK_BLIND_SPOTS)
+    for name, audio in corpus.items():
+        if audio.shape[1] == 1:
+            # The estimate treats mono as two identical channels; the reference has no stereo image.
+            blind_spots[name] = blind_spots.get(name, ()) + ("stereo",)
+    expected = _reference_metrics(reference)
+    failures = _compare("quick estimate", section, quick, expected, QUICK_TOLERANCES, accuracy_report, blind_spots)
+    assert failures == []
+
+
+def _surround(corpus):
+    """5.0 (L R C Ls Rs) from the corpus: the song in front, the tone in the centre, noise around."""
+    return np.ascontiguousarray(
+        np.concatenate([corpus["dynamic_song"], corpus["tone"], corpus["pink_noise"]], axis=1)
+    )
+
+
+def _channel_sections(report):
+    sections = {"channels": {"integrated_lufs": report.integrated_lufs, "true_peak_db": report.true_peak_db}}
+    for index, channel in enumerate(report.channels):
+        sections[f"channel {index}"] = {
+            "integrated_lufs": channel.integrated_lufs,
+            "true_peak_db": channel.true_peak_db,
+            "sample_peak_db": channel.sample_peak_db,
+            "band_energies_db": channel.band_energies_db,
+        }
+    return sections
+
+
+def _channel_reference(audio):
+    """`DirectSignal` on every channel alone, and pyloudnorm's BS.1770 sum over all of them."""
+    sections = {"channels": {"integrated_lufs": pyln.Meter(SR).integrated_loudness(audio.astype(np.float64))}}
+    peaks = []
+    for index in range(audio.shape[1]):
+        direct = DirectSignal(audio[:, index : index + 1], SR)
+        loudness, spectral = direct.loudness(), direct.spectral()
+        peaks.append(loudness.true_peak_db)
+        sections[f"channel {index}"] = {
+            "integrated_lufs": loudness.integrated_lufs,
+            "true_peak_db": loudness.true_peak_db,
+            "sample_peak_db": loudness.sample_peak_db,
+            "band_energies_db": spectral.band_energies_db,
+        }
+    sections["channels"]["true_peak_db"] = max(peaks)
+    return sections
+
+
+# Channel metrics are held to the loudness and spectral tolerances.
+CHANNEL_FIELDS = {
+    "integrated_lufs": "loudness.integrated_lufs",
+    "true_peak_db": "loudness.true_peak_db",
+    "sample_peak_db": "loudness.sample_peak_db",
+    "band_energies_db": "spectral.band_energies_db",
+}
+
+
+def _channel_flatten(sections):
+    flat = {}
+    for section, values in sections.items():
+        for key, (field, value) in _flatten(section, values).items():
+            flat[key] = (CHANNEL_FIELDS[field.split(".", 1)[1]], value)
+    return flat
+
+
+def test_channel_analysis(corpus, accuracy_report):
+    signals = {**corpus, "surround": _surround(corpus)}
+    measured, expected = {}, {}
+    fast_sec = reference_sec = 0.0
+    for name, audio in signals.items():
+        started = time.perf_counter()
+        report = analyze_channels(audio, SR)
+        fast_sec += time.perf_counter() - started
+        measured[name] = {"channels": _channel_flatten(_channel_sections(report))}
+        started = time.perf_counter()
+        expected[name] = {"channels": _channel_flatten(_channel_reference(audio))}
+        reference_sec += time.perf_counter() - started
+    accuracy_report.append(
+        {
+            "path": "channel analysis",
+            "note": "one pass over all channels against DirectSignal per channel",
+            "signals": len(signals),
+            "fast_sec": fast_sec,
+            "reference_sec": reference_sec,
+        }
+    )
+    assert _compare("channel analysis", "channels", measured, expected, TOLERANCES, accuracy_report) == []
+
+
+def _reference_stem_levels(mono):
+    """(stems, frames, bands) band power from scipy's STFT, one stem and one band at a time."""
+    edges = stems.CRITICAL_BAND_EDGES_HZ
+    levels = []
+    for stem in mono:
+        freqs, _, spectrum = stft(
+            stem.astype(np.float64), fs=SR, nperseg=stems.STEM_FFT_SIZE, noverlap=stems.STEM_FFT_SIZE - stems.STEM_HOP
+        )
+        power = np.abs(spectrum) ** 2
+        bands = [power[(freqs >= low) & (freqs < high)].sum(axis=0) for low, high in zip(edges[:-1], edges[1:])]
+        levels.append(10.0 * np.log10(np.array(bands).T + 1e-12))
+    # scipy pads one more all-zero frame when the length is not a whole number of hops.
+    return np.array(levels)[:, : len(mono[0]) // stems.STEM_HOP + 1]
+
+
+def _reference_overlap(levels):
+    """(bands, stems, stems) masking share, one band and one pair at a time."""
+    count, frames, bands = levels.shape
+    total = 10.0 * np.log10(np.sum(10.0 ** (levels / 10.0), axis=0) + 1e-12)
+    floor = total.max() - stems.SILENCE_RANGE_DB
+    matrix = np.zeros((bands, count, count))
+    for band in range(bands):
+        mix = total[:, band]
+        active = [(levels[i, :, band] > mix - stems.ACTIVE_RANGE_DB) & (mix > floor) for i in range(count)]
+        for i in range(count):
+            for j in range(count):
+                if i != j:
+                    close = np.abs(levels[i, :, band] - levels[j, :, band]) <= stems.MASKING_RANGE_DB
+                    matrix[band, i, j] = np.mean(active[i] & active[j] & close)
+    return matrix
+
+
+def test_stem_masking(corpus, accuracy_report):
+    names = ("tone", "dynamic_song", "pink_noise", "clicks")
+    mono = np.stack([np.mean(corpus[name], axis=1) for name in names])
+
+    started = time.perf_counter()
+    levels = stems.stem_band_levels(mono, SR)
+    overlap = stems.overlap_matrix(levels)
+    fast_sec = time.perf_counter() - started
+    started = time.perf_counter()
+    reference_levels = _reference_stem_levels(mono)
+    reference_overlap = _reference_overlap(reference_levels)
+    reference_sec = time.perf_counter() - started
+
+    accuracy_report.append(
+        {
+            "path": "stem masking",
+            "note": "batched float32 STFT and pair matrix against per-stem scipy STFT and pair loops",
+            "signals": 1,
+            "fast_sec": fast_sec,
+            "reference_sec": reference_sec,
+        }
+    )
+    measured = {"stems": {"stems": _flatten("stems", {"levels_db": levels, "overlap": overlap})}}
+    expected = {"stems": {"stems": _flatten("stems", {"levels_db": reference_levels, "overlap": reference_overlap})}}
+    assert _compare("stem masking", "stems", measured, expected, TOLERANCES, accuracy_report) == []
@@ -0,0 +1,28 @@
+from app.analysis.album import compute_album_report
+
+
+def _result(job_id, lufs, tilt, true_peak):
+    return {
+        "job_id": job_id,
+        "metrics": {
+            "loudness": {"integrated_lufs": lufs, "true_peak_db": true_peak},
+            "spectral": {"spectral_tilt_db_per_oct": tilt},
+        },
+    }
+
+
+def test_album_report_flags_spread_and_peak_overs():
+    results = [
+        _result("a", -10.0, -0.8, -1.5),
+        _result("b", -13.5, -0.1, -0.2),
+        _result("c", -11.0, -0.6, -1.2),
+    ]
+
+    album = compute_album_report(results, "Pop", "mix")
+
+    assert album.track_count == 3
+    assert abs(album.loudness_spread_lu - 3.5) < 1e-9
+    assert abs(album.tilt_spread_db_per_oct - 0.7) < 1e-9
+    assert album.true_peak_max_db == -0.2
+    assert album.true_peak_margin_db < 0
+    assert len(album.notes) >= 3
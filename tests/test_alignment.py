@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.analysis.alignment import align_tracks
+
+
+def _tracks(onset, lufs):
+    frames = len(onset)
+    return {
+        "onset_strength": onset,
+        "short_term_lufs": lufs,
+        "correlation": np.zeros(frames),
+        "band_energies_db": np.zeros((frames, 2)),
+    }
+
+
+def _warp(values, offset, drift, frames):
+    positions = (np.arange(frames) - offset) / (1.0 + drift)
+    return np.interp(positions, np.arange(len(values)), values, left=0.0, right=0.0)
+
+
+def test_alignment_recovers_offset_drift_and_level_change():
+    rng = np.random.default_rng(3)
+    onset = np.abs(rng.standard_normal(3400)) ** 3
+    lufs = -12.0 + np.sin(np.arange(3400) / 40.0)
+    frames = 3000
+    later = _tracks(_warp(onset, 42.0, 0.002, frames), _warp(lufs, 42.0, 0.002, frames) + 2.0)
+
+    alignment = align_tracks(later, _tracks(onset, lufs), 0.1, ["low", "high"])
+
+    assert abs(alignment.offset_sec - 4.2) < 0.05
+    assert abs(alignment.drift_ratio - 0.002) < 2e-4
+    assert abs(alignment.loudness_diff_lu - 2.0) < 0.05
+    assert all(abs(segment.loudness_diff_lu - 2.0) < 0.1 for segment in alignment.segments)
@@ -0,0 +1,36 @@
+import pytest
+
+from app.analysis.analyzers import default_analyzers, resolve_analyzers
+from app.analysis.report import build_report
+
+
+def test_resolve_expands_groups_and_dependencies():
+    assert resolve_analyzers(["delivery"]) == ["loudness"]
+    assert resolve_analyzers(["transient", "qa"]) == ["loudness", "transient", "qa"]
+    assert resolve_analyzers(["fingerprint"])[:3] == ["loudness", "spectral", "stereo"]
+    with pytest.raises(ValueError):
+        resolve_analyzers(["loudness", "lyrics"])
+    assert "bpm_key" not in default_analyzers("vocal")
+    assert "bpm_key" in default_analyzers("vocal", full=True)
+
+
+def test_report_covers_only_sections_that_ran():
+    loudness = {
+        "integrated_lufs": -14.0,
+        "true_peak_db": -0.5,
+        "crest_factor_db": 10.0,
+        "noise_floor_db": -70.0,
+    }
+    report = build_report(
+        job_id="job",
+        mode="mix",
+        genre="default",
+        vocal_style=None,
+        duration_sec=10.0,
+        metrics={"loudness": loudness},
+        warnings=[],
+        analyzers=["loudness"],
+    )
+    assert set(report["scores"]) == {"loudness", "dynamics", "noise"}
+    assert report["analyzers"] == ["loudness"]
+    assert any("true-peak" in fix for fix in report["recommendations"]["mixing"])
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+pyln = pytest.importorskip("pyloudnorm")
+pytest.importorskip("scipy")
+
+from app.analysis.channels import analyze_channels, channel_layout, stereo_downmix
+from app.analysis.metrics import compute_loudness, compute_spectral
+
+
+def _surround(channels, seconds=6.0, sr=48000):
+    rng = np.random.default_rng(3)
+    t = np.arange(int(seconds * sr)) / sr
+    columns = [
+        0.2 * np.sin(2 * np.pi * (110.0 * (index + 1)) * t) * (1 + np.sin(2 * np.pi * t / (2 + index))) / 2
+        + 0.01 * rng.standard_normal(len(t))
+        for index in range(channels)
+    ]
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+def test_weighted_loudness_matches_bs1770_reference():
+    sr = 48000
+    audio = _surround(5)
+    report = analyze_channels(audio, sr)
+
+    assert report.layout == "5.0"
+    # pyloudnorm weights L R C Ls Rs as 1, 1, 1, 1.41, 1.41.
+    expected = pyln.Meter(sr).integrated_loudness(audio.astype(np.float64))
+    assert report.integrated_lufs == pytest.approx(expected, abs=1e-6)
+
+
+def test_per_channel_results_match_single_channel_analysis():
+    sr = 48000
+    audio = _surround(6)
+    report = analyze_channels(audio, sr)
+
+    assert [channel.name for channel in report.channels] == ["L", "R", "C", "LFE", "Ls", "Rs"]
+    assert report.channels[3].weight == 0.0
+    for index, channel in enumerate(report.channels):
+        single = audio[:, index : index + 1]
+        loudness = compute_loudness(single, sr)
+        assert channel.integrated_lufs == pytest.approx(loudness.integrated_lufs, abs=1e-6)
+        assert channel.true_peak_db == pytest.approx(loudness.true_peak_db, abs=1e-6)
+        bands = compute_spectral(single, sr).band_energies_db
+        assert all(channel.band_energies_db[name] == pytest.approx(bands[name], abs=1e-3) for name in bands)
+
+
+def test_downmix_folds_center_and_surrounds_and_drops_lfe():
+    frame = np.array([[1.0, 0.0, 1.0, 1.0, 1.0, 0.0]], dtype=np.float32)
+    assert np.allclose(stereo_downmix(frame), [[1.0 + 2 * 0.7071, 0.7071]])
+    stereo = np.zeros((4, 2), dtype=np.float32)
+    assert stereo_downmix(stereo) is stereo
+    assert channel_layout(10).channels[-1] == "Ch10"
+
+
+def test_surround_delivery_loudness_comes_from_channels_not_downmix(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    from app.analysis.engine import run_analysis
+
+    sr = 48000
+    t = np.arange(4 * sr) / sr
+    # The same tone on every channel at -1.5 dBFS; the BS.775 downmix sums to about +6 dBTP.
+    tone = 10 ** (-1.5 / 20) * np.sin(2 * np.pi * 1000.0 * t)
+    path = tmp_path / "surround.wav"
+    sf.write(path, np.repeat(tone[:, None], 6, axis=1), sr, subtype="FLOAT")
+
+    report = run_analysis(
+        {
+            "job_id": "surround",
+            "mode": "mix",
+            "genre": "pop",
+            "audio_path": str(path),
+            "extension": ".wav",
+            "analyzers": ["loudness"],
+        },
+        persist=False,
+    )
+
+    loudness, channels = report["metrics"]["loudness"], report["metrics"]["channels"]
+    assert loudness["true_peak_db"] == pytest.approx(-1.5, abs=0.1)
+    assert loudness["integrated_lufs"] == channels["integrated_lufs"]
+    assert "channels" in report["analyzers"]
+    assert not any(entry["clips"] for entry in report["platforms"])
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("pyloudnorm")
+
+from app.cli import completed_digests, file_digest, run_catalog
+
+
+def _catalog(root):
+    t = np.arange(2 * 48000) / 48000
+    (root / "album").mkdir(parents=True)
+    sf.write(root / "a.wav", 0.3 * np.sin(2 * np.pi * 440.0 * t), 48000)
+    sf.write(root / "album" / "b.flac", 0.1 * np.sin(2 * np.pi * 440.0 * t), 48000)
+    (root / "broken.wav").write_bytes(b"RIFF not really audio")
+    (root / "notes.txt").write_text("skipped by extension")
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_catalog_writes_one_line_per_file_and_resumes_by_digest(tmp_path):
+    root, output = tmp_path / "catalog", tmp_path / "results.jsonl"
+    _catalog(root)
+
+    stats = run_catalog(str(root), str(output), analyzers=["loudness"], workers=2, report_every=0)
+
+    assert (stats.analyzed, stats.failed, stats.skipped) == (2, 1, 0)
+    records = {record["path"]: record for record in _lines(output)}
+    assert sorted(records) == sorted(str(root / name) for name in ("a.wav", "album/b.flac", "broken.wav"))
+    # A file that cannot be decoded is recorded and the rest of the run carries on.
+    broken = records[str(root / "broken.wav")]
+    assert broken["error"] and "result" not in broken
+    loud, quiet = records[str(root / "a.wav")], records[str(root / "album/b.flac")]
+    assert loud["sha256"] == file_digest(str(root / "a.wav"))
+    assert loud["result"]["analyzers"] == ["loudness"]
+    lufs = [record["result"]["metrics"]["loudness"]["integrated_lufs"] for record in (loud, quiet)]
+    assert lufs[0] - lufs[1] == pytest.approx(20 * np.log10(3), abs=0.1)
+
+    # Only results count as done: the failure is retried, analyzed files are skipped.
+    assert completed_digests(str(output)) == {loud["sha256"], quiet["sha256"]}
+    with open(output, "a") as handle:
+        handle.write('{"path": "cut off mid-wri')
+    stats = run_catalog(str(root), str(output), analyzers=["loudness"], workers=1, report_every=0)
+
+    assert (stats.analyzed, stats.failed, stats.skipped) == (0, 1, 2)
+    lines = output.read_text().splitlines()
+    assert lines[3] == '{"path": "cut off mid-wri'
+    assert json.loads(lines[4])["path"] == str(root / "broken.wav")
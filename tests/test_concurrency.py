@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+from app.concurrency import ConcurrencyController, SystemSample, SystemSampler, cgroup_cpus, cgroup_memory_mb
+
+
+def test_memory_gates_admission_and_cpu_moves_the_target():
+    async def scenario():
+        controller = ConcurrencyController(2, minimum=1, maximum=3)
+        controller.adjust(SystemSample(cpu_utilization=0.5, available_mb=4000.0, total_mb=5000.0))
+
+        await controller.admit("a", 2000.0)
+        blocked = asyncio.create_task(controller.admit("b", 2000.0))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        assert controller.snapshot()["waiting"]["blocked_by"] == "memory"
+
+        await controller.release("a")
+        await asyncio.wait_for(blocked, 1.0)
+        await controller.admit("c", 100.0)
+        assert controller.snapshot()["in_flight"] == 2
+
+        waiting = asyncio.create_task(controller.admit("d", 100.0))
+        await asyncio.sleep(0)
+        controller.adjust(SystemSample(cpu_utilization=0.3, available_mb=4000.0, total_mb=5000.0))
+        assert controller.target == 3
+        controller.adjust(SystemSample(cpu_utilization=0.97, available_mb=4000.0, total_mb=5000.0))
+        assert controller.target == 2
+        waiting.cancel()
+
+        actions = [item["action"] for item in controller.snapshot()["decisions"]]
+        assert actions[:2] == ["lower", "raise"]
+        assert "defer" in actions
+
+    asyncio.run(scenario())
+
+
+def test_unused_reservations_of_running_jobs_are_not_free():
+    async def scenario():
+        controller = ConcurrencyController(4, minimum=1, maximum=4, headroom_mb=500.0)
+        controller.adjust(SystemSample(cpu_utilization=0.5, available_mb=4000.0, total_mb=10000.0))
+        await controller.admit("a", 2000.0)
+
+        # "a" has grown into 500 MB of its 2000 MB so far; 1500 MB of the 3500 MB available is still its.
+        controller.adjust(SystemSample(cpu_utilization=0.5, available_mb=3500.0, total_mb=10000.0))
+        assert controller.consumed_mb == 500.0
+        assert controller.memory_budget_mb() == 3500.0
+
+        blocked = asyncio.create_task(controller.admit("b", 1600.0))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        blocked.cancel()
+        await controller.admit("c", 1400.0)
+        assert controller.snapshot()["in_flight"] == 2
+
+    asyncio.run(scenario())
+
+
+def _cgroup(root, files):
+    for name, text in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text)
+    return str(root)
+
+
+def test_cgroup_v2_limits_replace_host_memory_and_cpu(tmp_path):
+    mb = 1024 * 1024
+    root = _cgroup(
+        tmp_path,
+        {
+            "memory.max": f"{1024 * mb}\n",
+            "memory.current": f"{600 * mb}\n",
+            "memory.stat": f"anon {400 * mb}\ninactive_file {200 * mb}\n",
+            "cpu.max": "200000 100000\n",
+            "cpu.stat": "usage_usec 1000000\nuser_usec 800000\n",
+        },
+    )
+    sampler = SystemSampler(cgroup_root=root)
+    (tmp_path / "cpu.stat").write_text("usage_usec 1100000\n")
+    time.sleep(0.2)
+    sample = sampler.sample()
+
+    assert sample.total_mb == 1024.0 and sample.available_mb == 624.0
+    # 0.1 s of CPU over at least 0.2 s against a two-CPU quota.
+    assert 0.05 < sample.cpu_utilization <= 0.25
+    assert cgroup_cpus(_cgroup(tmp_path / "open", {"cpu.max": "max 100000\n"})) is None
+    assert cgroup_memory_mb(_cgroup(tmp_path / "open", {"memory.max": "max\n", "memory.current": "1\n"})) is None
+
+
+def test_cgroup_v1_limits_are_read_when_v2_is_absent(tmp_path):
+    mb = 1024 * 1024
+    root = _cgroup(
+        tmp_path,
+        {
+            "memory/memory.limit_in_bytes": f"{2048 * mb}\n",
+            "memory/memory.usage_in_bytes": f"{1024 * mb}\n",
+            "memory/memory.stat": f"cache {300 * mb}\ntotal_inactive_file {256 * mb}\n",
+            "cpu/cpu.cfs_quota_us": "150000\n",
+            "cpu/cpu.cfs_period_us": "100000\n",
+        },
+    )
+    assert cgroup_memory_mb(root) == (2048.0, 768.0)
+    assert cgroup_cpus(root) == 1.5
+
+    unlimited = _cgroup(
+        tmp_path / "open",
+        {
+            "memory/memory.limit_in_bytes": "9223372036854771712\n",
+            "memory/memory.usage_in_bytes": "1\n",
+            "cpu/cpu.cfs_quota_us": "-1\n",
+            "cpu/cpu.cfs_period_us": "100000\n",
+        },
+    )
+    assert cgroup_memory_mb(unlimited) is None and cgroup_cpus(unlimited) is None
@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.analysis.features import compute_feature_tracks, read_feature_slice, save_feature_tracks
+from app.analysis.metrics import compute_loudness
+
+
+def _tone(seconds, sr=48000):
+    t = np.arange(int(seconds * sr)) / sr
+    return 0.1 * np.sin(2 * np.pi * 440 * t)
+
+
+def test_feature_tracks_match_offline_loudness():
+    sr = 48000
+    mono = _tone(6.0, sr)
+    audio = np.stack([mono, mono], axis=1)
+
+    tracks = compute_feature_tracks(audio, sr)
+    loudness = compute_loudness(audio, sr)
+
+    assert tracks.num_frames == 60
+    assert tracks.band_energies_db.shape == (60, len(tracks.band_names))
+    assert abs(tracks.short_term_lufs[-1] - loudness.integrated_lufs) < 0.1
+    assert np.allclose(tracks.correlation, 1.0, atol=1e-6)
+
+
+def test_read_feature_slice_returns_requested_window(tmp_path):
+    sr = 48000
+    tracks = compute_feature_tracks(_tone(4.0, sr)[:, None], sr)
+    save_feature_tracks(tracks, str(tmp_path))
+
+    data = read_feature_slice(str(tmp_path), 1.0, 2.0, ["short_term_lufs", "band_energies_db"])
+
+    assert data["start_sec"] == 1.0
+    assert len(data["tracks"]["short_term_lufs"]) == 10
+    assert len(data["tracks"]["band_energies_db"][0]) == len(data["columns"]["band_energies_db"])
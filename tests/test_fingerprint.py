@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.analysis.fingerprint import FINGERPRINT_SIZE, FingerprintIndex, fingerprint_vector
+
+
+def _vector(tilt, lufs):
+    bands = np.linspace(0.0, tilt * 10.0, FINGERPRINT_SIZE - 6)
+    metrics = {"integrated_lufs": lufs, "crest_factor_db": 10.0, "stereo_width": 0.3, "stereo_correlation": 0.8}
+    return fingerprint_vector(bands, metrics, np.full(100, lufs))
+
+
+def test_index_returns_nearest_first_and_excludes():
+    index = FingerprintIndex()
+    index.rebuild(["dark", "bright", "loud"], [_vector(-3.0, -14.0), _vector(1.0, -14.0), _vector(-3.0, -6.0)])
+
+    for metric in ("l2", "cosine"):
+        matches = index.search(_vector(-2.8, -13.0), k=2, metric=metric)
+        assert matches[0].ref_id == "dark"
+
+    excluded = index.search(_vector(-3.0, -14.0), k=1, exclude="dark")
+    assert excluded[0].ref_id != "dark"
+
+    index.remove("dark")
+    index.add("dark2", _vector(-3.0, -14.0))
+    assert len(index) == 3
+    assert index.search(_vector(-3.0, -14.0), k=1)[0].ref_id == "dark2"
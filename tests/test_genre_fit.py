@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.analysis.genre_fit import best_fits, fit_matrix, metric_vector, rank_genres
+from app.analysis.genre_profiles import PROFILE_DEFAULTS, PROFILE_RANGES, get_profile, profile_matrix
+from app.analysis.report import _score_range
+
+METRICS = {
+    "loudness": {"integrated_lufs": -9.5, "crest_factor_db": 7.0},
+    "spectral": {"spectral_tilt_db_per_oct": -0.9},
+    "stereo": {"width": 0.55},
+}
+
+
+def test_fit_matrix_matches_scalar_scoring():
+    matrix = profile_matrix()
+    values = metric_vector(METRICS)
+    fits = fit_matrix(values, matrix)[0]
+    for row, (genre, mode, style) in enumerate(zip(matrix.genres, matrix.modes, matrix.vocal_styles)):
+        profile = get_profile(genre, mode, style)
+        expected = np.mean(
+            [
+                _score_range(value, *profile.get(name, PROFILE_DEFAULTS[name]))
+                for value, name in zip(values, PROFILE_RANGES)
+            ]
+        )
+        assert abs(fits[row] - expected) < 1e-9
+
+
+def test_rank_and_bulk_fits_respect_mode_and_missing_metrics():
+    ranked = rank_genres(METRICS, "vocal", "rap")
+    assert len(ranked) == 3
+    assert all(entry["mode"] == "vocal" and entry["vocal_style"] == "rap" for entry in ranked)
+    assert [entry["fit"] for entry in ranked] == sorted((entry["fit"] for entry in ranked), reverse=True)
+
+    # Only loudness was analyzed: the fit is the mean over the two loudness metrics.
+    loudness_only = rank_genres({"loudness": METRICS["loudness"]}, "mix")
+    assert loudness_only and loudness_only[0]["mode"] == "mix"
+
+    values = np.vstack([metric_vector(METRICS), np.full(4, np.nan)])
+    fits = best_fits(values, ["mix", "mix"], [None, None])
+    assert fits[0] == rank_genres(METRICS, "mix")[0]
+    assert fits[1] is None
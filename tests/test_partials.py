@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+
+from app.analysis import partials
+from app.analysis.partials import (
+    SEGMENT_SAMPLES,
+    DirectSignal,
+    PARTIAL_GROUPS,
+    SegmentedSignal,
+    compute_segment,
+    compute_statistics,
+    merge_partials,
+    open_signal,
+    partial_groups,
+    segment_partials,
+)
+
+
+def _mix(seconds=30.0, sr=48000):
+    rng = np.random.default_rng(5)
+    t = np.arange(int(seconds * sr)) / sr
+    left = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 0.5 * t)) / 2
+    right = 0.2 * np.sin(2 * np.pi * 330 * t)
+    noise = 0.05 * rng.standard_normal((len(t), 2))
+    return (np.stack([left, right], axis=1) + noise).astype(np.float32)
+
+
+def test_segmented_metrics_match_whole_signal():
+    audio = _mix()
+    direct = DirectSignal(audio, 48000)
+    segmented = SegmentedSignal.from_audio(audio, 48000)
+
+    assert segmented.loudness().integrated_lufs == pytest.approx(direct.loudness().integrated_lufs, abs=1e-4)
+    assert segmented.loudness().true_peak_db == pytest.approx(direct.loudness().true_peak_db, abs=1e-4)
+    assert segmented.spectral().centroid_hz == pytest.approx(direct.spectral().centroid_hz, rel=1e-5)
+    assert segmented.stereo().correlation == pytest.approx(direct.stereo().correlation, abs=1e-6)
+    assert np.allclose(segmented.third_octave(), direct.third_octave(), atol=1e-3)
+
+    tracks_a = direct.feature_tracks()
+    tracks_b = segmented.feature_tracks()
+    assert np.allclose(tracks_a.band_energies_db, tracks_b.band_energies_db, atol=1e-3)
+    assert np.allclose(tracks_a.short_term_lufs, tracks_b.short_term_lufs, atol=1e-2)
+
+
+def test_revision_only_recomputes_changed_segments(tmp_path, monkeypatch):
+    audio = _mix()
+    SegmentedSignal.from_audio(audio, 48000, str(tmp_path))
+
+    computed = []
+    original = partials.compute_segment
+
+    def counting(audio, sr, start, end, **options):
+        computed.append(start)
+        return original(audio, sr, start, end, **options)
+
+    monkeypatch.setattr(partials, "compute_segment", counting)
+    revision = audio.copy()
+    revision[SEGMENT_SAMPLES // 2 : SEGMENT_SAMPLES // 2 + 48000] *= 0.5
+    SegmentedSignal.from_audio(revision, 48000, str(tmp_path))
+
+    assert computed == [0]
+
+
+def test_mapped_segments_reduce_to_the_serial_result():
+    audio = _mix()
+    serial = merge_partials(segment_partials(audio, 48000))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        mapped = merge_partials(segment_partials(audio, 48000, executor=pool))
+
+    assert sorted(mapped) == sorted(serial)
+    assert all(np.array_equal(mapped[name], serial[name]) for name in serial)
+
+
+@pytest.mark.parametrize("fits", [True, False])
+def test_spawned_pool_segments_match_the_serial_result(monkeypatch, fits):
+    # Without room in /dev/shm the workers get pickled context windows instead.
+    monkeypatch.setattr(partials, "shared_memory_fits", lambda nbytes: fits)
+    audio = _mix()
+    serial = merge_partials(segment_partials(audio, 48000))
+    try:
+        mapped = merge_partials(segment_partials(audio, 48000, executor=partials.segment_pool(2)))
+    finally:
+        partials.shutdown_segment_pool()
+
+    assert all(np.array_equal(mapped[name], serial[name]) for name in serial)
+
+
+def test_statistics_partial_is_merged_from_segments():
+    audio = _mix()
+    full = merge_partials(segment_partials(audio, 48000))
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for statistics in (compute_statistics(audio, 48000), compute_statistics(audio, 48000, pool)):
+            assert set(statistics) < set(full)
+            assert all(np.array_equal(statistics[name], full[name]) for name in statistics)
+
+
+def test_segments_only_compute_the_groups_the_analyzers_read(tmp_path):
+    from app.analysis.analyzers import default_analyzers
+
+    assert "chroma" not in partial_groups(default_analyzers("vocal"))
+    assert partial_groups(["spectral"]) == {"spectrum"}
+    assert partial_groups(["bpm_key"]) == {"onset", "chroma"}
+    assert partial_groups(["loudness", "stereo", "qa"]) == set()
+
+    audio = _mix(seconds=15.0)
+    full = compute_segment(audio, 48000, 0, SEGMENT_SAMPLES)
+    spectral = compute_segment(audio, 48000, 0, SEGMENT_SAMPLES, frozenset({"spectrum"}))
+    skipped = {name for group, names in PARTIAL_GROUPS.items() if group != "spectrum" for name in names}
+    assert set(full) - set(spectral) == skipped
+    assert all(np.array_equal(spectral[name], full[name]) for name in spectral)
+
+    # A partial cached for a spectral-only job lacks chroma and must not serve a key estimate.
+    open_signal(audio, 48000, str(tmp_path), ["spectral"]).spectral()
+    cached = len(list(tmp_path.iterdir()))
+    key = open_signal(audio, 48000, str(tmp_path), ["bpm_key"]).key()
+    assert key.key == SegmentedSignal.from_audio(audio, 48000).key().key
+    assert len(list(tmp_path.iterdir())) == 2 * cached
@@ -0,0 +1,33 @@
+import json
+
+import numpy as np
+
+from app.analysis.platforms import load_platforms, platform_report, simulate_normalization
+
+
+def test_policies_shape_gain_and_peaks(tmp_path):
+    path = tmp_path / "platforms.json"
+    path.write_text(
+        json.dumps(
+            {
+                "down": {"target_lufs": -14.0, "policy": "down_only", "true_peak_ceiling_db": -1.0},
+                "peak": {"target_lufs": -14.0, "policy": "peak_limited", "true_peak_ceiling_db": -1.0},
+                "limiter": {"target_lufs": -14.0, "policy": "limiter", "true_peak_ceiling_db": -1.0},
+                "open": {"target_lufs": -14.0, "policy": "up_and_down", "true_peak_ceiling_db": -1.0},
+            }
+        )
+    )
+    table = load_platforms(str(path))
+
+    # A quiet master with 4 dB of true-peak headroom, and a loud one.
+    result = simulate_normalization([-20.0, -8.0], [-4.0, 0.5], table)
+    np.testing.assert_allclose(result["gain_db"][0], [0.0, 3.0, 6.0, 6.0])
+    np.testing.assert_allclose(result["limiter_reduction_db"][0], [0.0, 0.0, 3.0, 0.0])
+    np.testing.assert_allclose(result["playback_true_peak_db"][0], [-4.0, -1.0, -1.0, 2.0])
+    assert result["clips"][0].tolist() == [False, False, False, True]
+    np.testing.assert_allclose(result["gain_db"][1], [-6.0] * 4)
+    assert not result["clips"][1].any()
+
+    section = platform_report({"integrated_lufs": -20.0, "true_peak_db": -4.0}, table)
+    assert [entry["direction"] for entry in section] == ["none", "up", "up", "up"]
+    assert platform_report({"integrated_lufs": float("-inf"), "true_peak_db": -90.0}, table) == []
@@ -0,0 +1,80 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from app.analysis.previews import (
+    PEAK_BASE_SAMPLES,
+    PEAK_TILE_WIDTH,
+    SPECTROGRAM_TILE_WIDTH,
+    build_previews,
+    load_preview_manifest,
+    read_waveform_tile,
+    spectrogram_tile_path,
+)
+from app.config import settings
+
+JOB = "00000000-0000-0000-0000-0000000000aa"
+SR = 48000
+
+
+def _build(directory, seconds=12.0, spectrogram_columns=600):
+    t = np.arange(int(seconds * SR)) / SR
+    audio = np.stack([0.5 * np.sin(2 * np.pi * 220 * t), -0.25 * np.sin(2 * np.pi * 220 * t)], axis=1)
+    spectrogram = np.linspace(-120.0, 0.0, 64 * spectrogram_columns).reshape(64, spectrogram_columns)
+    return build_previews(audio, SR, spectrogram, 0.02, str(directory))
+
+
+def test_pyramids_halve_until_one_tile_and_manifest_describes_them(tmp_path):
+    manifest = _build(tmp_path)
+
+    base_columns = int(np.ceil(12.0 * SR / PEAK_BASE_SAMPLES))
+    assert [level.columns for level in manifest.waveform] == [base_columns, 1125, 563]
+    assert manifest.waveform[-1].tiles == 1 and manifest.waveform[0].tiles == 3
+    assert manifest.waveform[1].seconds_per_column == pytest.approx(2 * PEAK_BASE_SAMPLES / SR)
+    assert [level.columns for level in manifest.spectrogram] == [600, 300, 150]
+    assert [level.tiles for level in manifest.spectrogram] == [3, 2, 1]
+    assert load_preview_manifest(str(tmp_path)) == json.loads(json.dumps(manifest, default=vars))
+
+    # Min/max pairs of the mono mix (0.125 peak), quantized to int8.
+    tile = np.frombuffer(read_waveform_tile(str(tmp_path), 0, 0), dtype=np.int8).reshape(-1, 2)
+    assert tile.shape == (PEAK_TILE_WIDTH, 2)
+    assert tile[:, 0].min() == -16 and tile[:, 1].max() == 16
+    last = read_waveform_tile(str(tmp_path), 0, 2)
+    assert len(last) == 2 * (base_columns - 2 * PEAK_TILE_WIDTH)
+    assert read_waveform_tile(str(tmp_path), 0, 3) is None
+    assert read_waveform_tile(str(tmp_path), 9, 0) is None
+
+    with open(spectrogram_tile_path(str(tmp_path), 0, 2), "rb") as handle:
+        png = handle.read()
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (600 - 2 * SPECTROGRAM_TILE_WIDTH, 64)
+
+
+def test_tile_endpoints_answer_200_304_and_404_after_eviction(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setattr(settings, "previews_dir", str(tmp_path))
+    _build(tmp_path / JOB)
+    client = TestClient(app)
+
+    manifest = client.get(f"/api/jobs/{JOB}/previews")
+    assert manifest.status_code == 200 and manifest.json()["job_id"] == JOB
+    assert client.get("/api/jobs/unknown/previews").status_code == 404
+
+    for url, filename in (
+        (f"/api/jobs/{JOB}/waveform/0/1", "peaks_0.npy"),
+        (f"/api/jobs/{JOB}/spectrogram/0/1.png", "spec_0_1.png"),
+    ):
+        first = client.get(url)
+        assert first.status_code == 200 and first.content
+        etag = first.headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        os.remove(tmp_path / JOB / filename)
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 404
@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.profiling import JobProfiler
+
+
+def _work():
+    return np.sort(np.random.default_rng(0).standard_normal(200_000)).sum()
+
+
+def test_profiler_reports_stages_functions_and_allocations():
+    profiler = JobProfiler("job")
+    profiler.start()
+    _work()
+    profiler.mark("metrics")
+    kept = np.ones(1_000_000)
+    profiler.mark("report")
+    summary = profiler.stop()
+
+    assert [stage["stage"] for stage in summary["stages"]] == ["decode", "metrics", "report"]
+    assert any("_work" in item["function"] for item in summary["functions"])
+    assert summary["memory_traced"]
+    assert summary["stages"][1]["current_mb"] > 7.0
+    assert summary["allocations"][0]["size_mb"] > 7.0
+    assert kept.size
+
+
+def test_second_concurrent_profiler_runs_without_cprofile_and_tracemalloc():
+    first, second = JobProfiler("first"), JobProfiler("second")
+    first.start()
+    second.start()
+    _work()
+    busy = second.stop()
+    summary = first.stop()
+
+    assert not busy["calls_profiled"] and not busy["memory_traced"] and busy["functions"] == []
+    assert summary["calls_profiled"] and any("_work" in item["function"] for item in summary["functions"])
+    third = JobProfiler("third")
+    third.start()
+    assert third.stop()["calls_profiled"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("pyloudnorm")
+
+from app.analysis.metrics import compute_loudness
+from app.analysis.quick import quick_estimate
+
+
+def test_quick_estimate_is_close_to_full_loudness(tmp_path):
+    sr = 48000
+    rng = np.random.default_rng(4)
+    t = np.arange(sr * 20) / sr
+    audio = np.stack([0.3 * np.sin(2 * np.pi * 220 * t), 0.1 * rng.standard_normal(len(t))], axis=1)
+    path = tmp_path / "mix.wav"
+    sf.write(path, audio, sr, subtype="FLOAT")
+
+    estimate = quick_estimate(str(path))
+
+    assert estimate["provisional"] is True
+    assert estimate["duration_sec"] == pytest.approx(20.0)
+    full = compute_loudness(audio, sr)
+    assert estimate["metrics"]["loudness"]["integrated_lufs"] == pytest.approx(full.integrated_lufs, abs=0.5)
+
+
+def test_quick_tier_job_is_queued_before_the_estimate_runs(tmp_path, monkeypatch):
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "uploads_dir", str(tmp_path))
+    events = []
+
+    async def enqueue(payload):
+        events.append("queued")
+
+    def estimate(path, start_sec, end_sec):
+        try:
+            asyncio.get_running_loop()
+            events.append("estimate on the event loop")
+        except RuntimeError:
+            events.append("estimate")
+        return {"loudness": {"integrated_lufs": -14.0}}
+
+    monkeypatch.setattr(main.worker, "enqueue", enqueue)
+    monkeypatch.setattr(main, "quick_estimate", estimate)
+    t = np.arange(48000) / 48000
+    sf.write(tmp_path / "mix.wav", 0.3 * np.sin(2 * np.pi * 440 * t), 48000)
+
+    with open(tmp_path / "mix.wav", "rb") as handle:
+        response = TestClient(main.app).post(
+            "/api/jobs",
+            data={"mode": "mix", "genre": "pop", "tier": "quick"},
+            files={"audio": ("mix.wav", handle, "audio/wav")},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["provisional"] == {"loudness": {"integrated_lufs": -14.0}}
+    assert events == ["queued", "estimate"]
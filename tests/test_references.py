@@ -0,0 +1,91 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("scipy")
+pytest.importorskip("pyloudnorm")
+
+from app.analysis.ab_compare import compare_ab
+from app.analysis.ingest import AudioData
+from app.analysis.metrics import compute_loudness
+from app.analysis.reference import THIRD_OCTAVE_CENTERS_HZ, build_reference_profile, third_octave_spectrum
+from app.references import ReferenceLibrary
+
+SR = 48000
+
+
+def _music(seconds=6.0, gain=1.0):
+    rng = np.random.default_rng(11)
+    t = np.arange(int(seconds * SR)) / SR
+    tone = 0.3 * np.sin(2 * np.pi * 1000.0 * t)
+    noise = 0.05 * rng.standard_normal((len(t), 2))
+    return (gain * (tone[:, None] + noise)).astype(np.float32)
+
+
+def _data(audio):
+    return AudioData(audio, SR, len(audio) / SR, audio.shape[1], [], None)
+
+
+def test_third_octave_bands_follow_tone_and_white_noise():
+    t = np.arange(4 * SR) / SR
+    tone = third_octave_spectrum(0.5 * np.sin(2 * np.pi * 1000.0 * t), SR)
+    assert len(tone) == len(THIRD_OCTAVE_CENTERS_HZ)
+    band = int(np.argmin(np.abs(THIRD_OCTAVE_CENTERS_HZ - 1000.0)))
+    assert int(np.argmax(tone)) == band
+    assert tone[band] == pytest.approx(10 * np.log10(0.5 ** 2 / 2), abs=0.5)
+
+    # White noise has equal power per hertz, so each band is a third of an octave (1 dB) above the last.
+    noise = third_octave_spectrum(np.random.default_rng(2).standard_normal(8 * SR), SR)
+    wide = THIRD_OCTAVE_CENTERS_HZ > 200.0
+    assert np.diff(noise[wide]).mean() == pytest.approx(1.0, abs=0.05)
+
+
+def test_profile_and_comparison_deltas_between_two_levels():
+    loud = build_reference_profile(_data(_music()))
+    quiet = build_reference_profile(_data(_music(gain=0.5)))
+
+    assert loud.metrics["integrated_lufs"] == pytest.approx(compute_loudness(_music(), SR).integrated_lufs)
+    assert loud.duration_sec == 6.0 and len(loud.loudness_curve) == pytest.approx(6.0 / loud.hop_sec, abs=1)
+    np.testing.assert_allclose(loud.third_octave_db - quiet.third_octave_db, 20 * np.log10(2), atol=0.01)
+
+    diff = compare_ab(loud.metrics, quiet.metrics)
+    assert diff.loudness_diff_lufs == pytest.approx(6.02, abs=0.05)
+    assert diff.true_peak_diff_db == pytest.approx(6.02, abs=0.05)
+    assert loud.metrics["crest_factor_db"] == pytest.approx(quiet.metrics["crest_factor_db"], abs=0.01)
+    assert loud.metrics["stereo_width"] == pytest.approx(quiet.metrics["stereo_width"], abs=1e-3)
+
+
+def test_library_reuses_an_entry_for_re_uploaded_content(tmp_path):
+    path = tmp_path / "master.wav"
+    sf.write(path, _music(), SR, subtype="FLOAT")
+    library = ReferenceLibrary(str(tmp_path / "library"))
+
+    entry = library.add(str(path), name="Master")
+    copy = tmp_path / "same master.wav"
+    shutil.copy(path, copy)
+    again = library.add(str(copy), name="Renamed")
+
+    assert again.ref_id == entry.ref_id and again.name == "Master"
+    assert [item.ref_id for item in library.list()] == [entry.ref_id]
+    assert sorted(os.listdir(tmp_path / "library")) == sorted(["index.json", f"{entry.ref_id}.npz"])
+
+    # A fresh library reads the same entry and curves back without decoding audio.
+    reopened = ReferenceLibrary(str(tmp_path / "library"))
+    profile = reopened.profile(entry.ref_id)
+    assert reopened.find_by_digest(entry.sha256).metrics == entry.metrics
+    np.testing.assert_allclose(profile.third_octave_db, library.profile(entry.ref_id).third_octave_db, atol=1e-4)
+    assert reopened.suggest(np.asarray(entry.fingerprint))[0]["ref_id"] == entry.ref_id
+
+    assert reopened.delete(entry.ref_id) and reopened.list() == []
+    assert os.listdir(tmp_path / "library") == ["index.json"]
+
+
+def test_reference_library_imports_before_the_analysis_package():
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", "import app.references"], cwd=root, check=True)
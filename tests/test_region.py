@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+pytest.importorskip("scipy")
+
+from app.analysis.ingest import _trim_padding, load_audio
+
+SR = 44100
+
+
+def _write(path, seconds=4.0):
+    t = np.arange(int(seconds * SR)) / SR
+    rng = np.random.default_rng(5)
+    left = 0.4 * np.sin(2 * np.pi * 440.0 * t) + 0.05 * rng.standard_normal(len(t))
+    right = 0.3 * np.sin(2 * np.pi * 97.0 * t) + 0.05 * rng.standard_normal(len(t))
+    sf.write(path, np.stack([left, right], axis=1), SR, subtype="FLOAT")
+
+
+def test_trim_padding_keeps_the_requested_span():
+    audio = np.arange(100)[:, None]
+    assert _trim_padding(audio, 0.25, 0.5, 40)[:, 0].tolist() == list(range(10, 30))
+
+
+@pytest.mark.parametrize("start_sec, end_sec", [(1.0, 2.5), (0.0, 1.0), (3.5, None)])
+def test_region_matches_slice_of_full_decode(tmp_path, start_sec, end_sec):
+    path = str(tmp_path / "tone.wav")
+    _write(path)
+
+    full = load_audio(path)
+    region = load_audio(path, start_sec=start_sec, end_sec=end_sec)
+
+    first = int(round(start_sec * full.sr))
+    last = len(full.audio) if end_sec is None else int(round(end_sec * full.sr))
+    assert region.sr == full.sr == 48000 and region.start_sec == start_sec
+    assert region.audio.shape == (last - first, 2)
+    np.testing.assert_allclose(region.audio, full.audio[first:last], atol=1e-4)
+
+
+def test_region_outside_the_file_is_rejected(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    _write(path, seconds=1.0)
+    with pytest.raises(ValueError):
+        load_audio(path, start_sec=2.0)
+    with pytest.raises(ValueError):
+        load_audio(path, start_sec=0.5, end_sec=0.5)
+
+
+def test_reanalyze_endpoint_queues_a_region_job_on_the_source_upload(tmp_path, monkeypatch):
+    import asyncio
+
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    path = str(tmp_path / "tone.wav")
+    _write(path, seconds=1.0)
+    queued = []
+
+    async def enqueue(payload):
+        queued.append(payload)
+
+    monkeypatch.setattr(main, "store", main.JobStore())
+    monkeypatch.setattr(main.worker, "enqueue", enqueue)
+    asyncio.run(main.store.create("source", {"audio_path": path, "mode": "master", "genre": "pop"}))
+    client = TestClient(main.app)
+
+    assert client.post("/api/jobs/source/reanalyze", data={"start_sec": 0.2}).status_code == 409
+    asyncio.run(main.store.update("source", status="done"))
+    assert client.post("/api/jobs/source/reanalyze", data={"start_sec": 0.5, "end_sec": 0.2}).status_code == 400
+    assert client.post("/api/jobs/missing/reanalyze", data={"start_sec": 0.2}).status_code == 404
+
+    response = client.post("/api/jobs/source/reanalyze", data={"start_sec": 0.2, "end_sec": 0.6})
+    assert response.status_code == 200
+    (payload,) = queued
+    assert payload["job_id"] == response.json()["job_id"]
+    assert payload["audio_path"] == path and payload["source_job_id"] == "source"
+    assert (payload["mode"], payload["genre"], payload["start_sec"], payload["end_sec"]) == ("master", "pop", 0.2, 0.6)
+    assert payload["owns_upload"] is False
@@ -0,0 +1,65 @@
+from app.results_index import ResultIndex
+
+
+def _report(job_id, genre, lufs, tilt):
+    return {
+        "job_id": job_id,
+        "mode": "mix",
+        "genre": genre,
+        "duration_sec": 180.0,
+        "scores": {"loudness": 90.0},
+        "metrics": {
+            "loudness": {"integrated_lufs": lufs, "true_peak_db": -1.0},
+            "spectral": {"spectral_tilt_db_per_oct": tilt},
+            "stereo": {"width": 0.3, "correlation": 0.5},
+        },
+        "bpm_key": {"bpm": 120.0, "key": "A minor"},
+    }
+
+
+def test_query_filters_sorts_and_aggregates(tmp_path):
+    index = ResultIndex(str(tmp_path / "index.sqlite3"))
+    index.add(_report("a", "Pop", -8.0, -0.5), created_at=100.0)
+    index.add(_report("b", "Pop", -11.0, -0.9), created_at=200.0)
+    index.add(_report("c", "Rock", -7.5, -1.1), created_at=300.0)
+
+    page = index.query({"integrated_lufs_min": "-9"}, sort="-integrated_lufs")
+    assert page["total"] == 2
+    assert [item["job_id"] for item in page["items"]] == ["c", "a"]
+
+    groups = index.aggregate({}, ["spectral_tilt_db_per_oct"], group_by="genre")
+    pop = next(group for group in groups if group["genre"] == "Pop")
+    assert pop["count"] == 2
+    assert abs(pop["spectral_tilt_db_per_oct_avg"] - (-0.7)) < 1e-9
+
+    index.remove(["a"])
+    assert index.query({"genre": "Pop"})["total"] == 1
+
+
+def test_genre_fit_scores_every_matching_result(tmp_path):
+    index = ResultIndex(str(tmp_path / "index.sqlite3"))
+    index.add(_report("a", "Pop", -8.0, -0.5), created_at=100.0)
+    index.add(_report("b", "Pop", -11.0, -0.9), created_at=200.0)
+
+    page = index.genre_fit({"genre": "Pop"})
+    assert page["total"] == 2
+    assert [item["job_id"] for item in page["items"]] == ["b", "a"]
+    assert all(item["best_fit"]["mode"] == "mix" for item in page["items"])
+    assert sum(page["genres"].values()) == 2
+
+
+def test_demo_results_stay_out_of_the_index(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import settings
+    from app.main import app
+    from app.results_index import results_index
+
+    monkeypatch.setattr(settings, "results_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "results_index_path", str(tmp_path / "index.sqlite3"))
+
+    response = TestClient(app).post("/api/jobs", data={"mode": "mix", "genre": "pop", "demo": "true"})
+
+    assert response.json()["status"] == "done"
+    assert results_index.count() == 0
+    assert results_index.rebuild() == 0
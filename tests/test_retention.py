@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.config import settings
+from app.retention import RetentionManager, finalize_upload
+
+JOB_A = "00000000-0000-0000-0000-00000000000a"
+JOB_B = "00000000-0000-0000-0000-00000000000b"
+
+
+def _use_tmp_dirs(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    results = tmp_path / "results"
+    uploads.mkdir()
+    results.mkdir()
+    monkeypatch.setattr(settings, "uploads_dir", str(uploads))
+    monkeypatch.setattr(settings, "results_dir", str(results))
+    monkeypatch.setattr(settings, "results_index_path", str(tmp_path / "index.sqlite3"))
+    return uploads, results
+
+
+def test_finalize_upload_transcodes_wav_to_flac_losslessly(tmp_path, monkeypatch):
+    uploads, _ = _use_tmp_dirs(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "upload_policy", "flac")
+    data = (np.random.default_rng(0).uniform(-0.5, 0.5, (4800, 2)) * 32767).astype(np.int16)
+    wav_path = str(uploads / f"{JOB_A}.wav")
+    sf.write(wav_path, data, 48000, subtype="PCM_16")
+
+    flac_path = finalize_upload(wav_path)
+
+    assert flac_path.endswith(".flac") and not os.path.exists(wav_path)
+    decoded, sr = sf.read(flac_path, dtype="int16")
+    assert sr == 48000
+    assert np.array_equal(decoded, data)
+
+
+def test_sweep_evicts_least_recently_used_over_quota(tmp_path, monkeypatch):
+    _, results = _use_tmp_dirs(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "disk_quota_mb", 1)
+    for job_id, mtime in ((JOB_A, 1000.0), (JOB_B, 2000.0)):
+        path = results / f"{job_id}.json"
+        path.write_bytes(b"x" * (700 * 1024))
+        os.utime(path, (mtime, mtime))
+
+    manager = RetentionManager(store=None)
+    evicted = manager.sweep(active=set(), now=2000.0)
+
+    assert evicted == [JOB_A]
+    assert (results / f"{JOB_B}.json").exists()
+    assert manager.usage().total_bytes <= 1024 * 1024
+
+
+@pytest.mark.parametrize("subtype", ["FLOAT", "DOUBLE", "PCM_32"])
+def test_finalize_upload_keeps_float_and_32_bit_wav_untouched(tmp_path, monkeypatch, subtype):
+    uploads, _ = _use_tmp_dirs(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "upload_policy", "flac")
+    # Float files may peak above full scale; 32-bit PCM has more bits than FLAC.
+    peak = 0.9 if subtype == "PCM_32" else 1.4
+    data = np.random.default_rng(1).uniform(-peak, peak, (4800, 2))
+    wav_path = str(uploads / f"{JOB_A}.wav")
+    sf.write(wav_path, data, 48000, subtype=subtype)
+    before = sf.read(wav_path, dtype="float64")[0]
+
+    assert finalize_upload(wav_path) == wav_path
+    assert os.listdir(uploads) == [f"{JOB_A}.wav"]
+    assert np.array_equal(sf.read(wav_path, dtype="float64")[0], before)
+
+
+def test_run_protects_the_upload_a_running_reanalysis_reads(tmp_path, monkeypatch):
+    import asyncio
+
+    from app.jobs import JobStore
+
+    uploads, _ = _use_tmp_dirs(tmp_path, monkeypatch)
+    monkeypatch.setattr(settings, "upload_ttl_hours", 1)
+    for job_id in (JOB_A, JOB_B):
+        path = uploads / f"{job_id}.wav"
+        path.write_bytes(b"x")
+        os.utime(path, (0.0, 0.0))
+
+    async def protected():
+        store = JobStore()
+        await store.create(JOB_A, {})
+        await store.update(JOB_A, status="done")
+        await store.create(JOB_B, {"source_job_id": JOB_A})
+        return await store.active_job_ids(), await store.protected_job_ids()
+
+    active, protected_ids = asyncio.run(protected())
+    assert active == {JOB_B} and protected_ids == {JOB_A, JOB_B}
+
+    RetentionManager(store=None).sweep(active=protected_ids)
+    assert sorted(os.listdir(uploads)) == [f"{JOB_A}.wav", f"{JOB_B}.wav"]
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from app.analysis.shared import SharedArray, call_with_shared, shared_memory_fits
+
+
+def test_shared_array_lives_until_the_last_reference():
+    audio = np.arange(12, dtype=np.float32).reshape(6, 2)
+    shared = SharedArray(audio)
+    shared.acquire()
+    shared.release()
+
+    assert call_with_shared(shared.handle, lambda array, row: array[row].tolist(), 2) == [4.0, 5.0]
+
+    shared.release()
+    with pytest.raises(FileNotFoundError):
+        call_with_shared(shared.handle, lambda array: None)
+    with pytest.raises(RuntimeError):
+        shared.acquire()
+
+
+def test_shared_memory_fits_checks_free_tmpfs_space(tmp_path):
+    assert shared_memory_fits(1024, str(tmp_path))
+    assert not shared_memory_fits(1 << 60, str(tmp_path))
+    assert shared_memory_fits(1 << 60, str(tmp_path / "missing"))
@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.analysis.stems import analyze_stem_masking, sum_stems
+
+
+def test_overlapping_stems_are_reported_with_time_range():
+    sr = 48000
+    t = np.arange(sr * 12) / sr
+    kick = 0.3 * np.sin(2 * np.pi * 70 * t)
+    bass = np.zeros_like(t)
+    bass[sr * 4 : sr * 8] = 0.3 * np.sin(2 * np.pi * 80 * t[sr * 4 : sr * 8])
+    vocal = 0.2 * np.sin(2 * np.pi * 1500 * t)
+
+    report = analyze_stem_masking([kick, bass, vocal], ["kick", "bass", "vocal"], sr)
+
+    assert len(report.overlap_matrix) == len(report.bands_hz)
+    top = report.conflicts[0]
+    assert top.stems == ["kick", "bass"]
+    assert top.band_hz == "20-100 Hz"
+    start, end = top.time_ranges[0]
+    assert abs(start - 4.0) < 0.1 and abs(end - 8.0) < 0.1
+    assert all("vocal" not in conflict.stems for conflict in report.conflicts)
+
+
+def test_sum_stems_pads_and_spreads_mono():
+    mix = sum_stems([np.ones(4), np.ones((2, 2))])
+    assert mix.shape == (4, 2)
+    assert mix[:, 0].tolist() == [2.0, 2.0, 1.0, 1.0]
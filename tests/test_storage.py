@@ -0,0 +1,51 @@
+import gzip
+import json
+
+from app.config import settings
+from app.storage import negotiate_result_file, result_etag, result_path, write_result
+
+
+def test_write_result_is_compact_and_precompressed(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "results_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "results_index_path", str(tmp_path / "index.sqlite3"))
+    report = {"job_id": "job", "scores": {"loudness": 80.0}, "warnings": []}
+
+    etag = write_result("job", report)
+
+    with open(result_path("job"), "rb") as handle:
+        payload = handle.read()
+    assert b"\n" not in payload
+    assert json.loads(payload) == report
+    with gzip.open(result_path("job") + ".gz", "rb") as handle:
+        assert handle.read() == payload
+    assert etag.startswith('"') and etag == result_etag("job")
+
+
+def test_negotiate_result_file_respects_accept_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "results_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "results_index_path", str(tmp_path / "index.sqlite3"))
+    write_result("job", {"job_id": "job"})
+
+    path, encoding = negotiate_result_file("job", "gzip, deflate")
+    assert encoding == "gzip" and path.endswith(".gz")
+
+    path, encoding = negotiate_result_file("job", "gzip;q=0")
+    assert encoding is None and path == result_path("job")
+
+
+def test_revalidated_result_read_refreshes_its_lru_time(tmp_path, monkeypatch):
+    import os
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setattr(settings, "results_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "results_index_path", str(tmp_path / "index.sqlite3"))
+    etag = write_result("job", {"job_id": "job"})
+    os.utime(result_path("job"), (1000.0, 1000.0))
+
+    response = TestClient(app).get("/api/results/job", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert os.path.getmtime(result_path("job")) > 1000.0
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyloudnorm")
+
+from app.analysis.metrics import compute_loudness, compute_stereo, peak_to_db, true_peak_amplitude
+from app.analysis.streaming import PcmDecoder, StreamingAnalyzer, decode_pcm
+
+
+def test_chunked_stream_matches_offline_metrics():
+    sr = 48000
+    rng = np.random.default_rng(2)
+    t = np.arange(sr * 8) / sr
+    audio = np.stack(
+        [0.3 * np.sin(2 * np.pi * 110 * t) + 0.05 * rng.standard_normal(len(t)), 0.1 * rng.standard_normal(len(t))],
+        axis=1,
+    )
+    analyzer = StreamingAnalyzer(sr, 2)
+    for start in range(0, len(audio), 1000):
+        analyzer.push(audio[start : start + 1000])
+    snapshot = analyzer.snapshot()
+
+    offline = compute_loudness(audio, sr)
+    assert snapshot.integrated_lufs == pytest.approx(offline.integrated_lufs, abs=1e-3)
+    assert snapshot.true_peak_db == pytest.approx(offline.true_peak_db, abs=1e-3)
+    assert snapshot.integrated["stereo"]["correlation"] == pytest.approx(compute_stereo(audio).correlation, abs=1e-6)
+
+
+def test_decode_pcm_scales_integers_and_drops_partial_frames():
+    payload = np.array([16384, -16384, 0], dtype="<i2").tobytes()
+    audio = decode_pcm(payload, "s16", 2)
+    assert audio.shape == (1, 2)
+    assert audio[0].tolist() == [0.5, -0.5]
+
+
+def test_true_peak_ignores_chunk_edges_of_a_clipped_tone():
+    sr = 48000
+    t = np.arange(sr * 2) / sr
+    # 1000-sample chunks cut the 480-sample period at a different phase every time.
+    audio = np.clip(1.2 * np.sin(2 * np.pi * 100 * t), -0.9, 0.9)[:, None]
+    analyzer = StreamingAnalyzer(sr, 1)
+    for start in range(0, len(audio), 1000):
+        analyzer.push(audio[start : start + 1000])
+        offline = peak_to_db(true_peak_amplitude(audio[: start + 1000]))
+        assert analyzer.snapshot().true_peak_db == pytest.approx(offline, abs=1e-6)
+
+
+def test_pcm_decoder_keeps_partial_frames_for_the_next_message():
+    samples = np.arange(12, dtype="<f4").reshape(-1, 2)
+    payload = samples.tobytes()
+    decoder = PcmDecoder("f32", 2)
+    # Splits inside a sample and inside a frame.
+    parts = [decoder.decode(payload[:5]), decoder.decode(payload[5:27]), decoder.decode(payload[27:])]
+    assert [len(part) for part in parts] == [0, 3, 3]
+    assert np.array_equal(np.concatenate(parts), samples)
+    assert decode_pcm(payload[:5], "f32", 2).shape == (0, 2)